@@ -0,0 +1,109 @@
+"""
+效能測試用的合成語料
+
+以固定亂數種子產生中文、英文或中英混合的知識條目，
+相同參數每次產生的內容都相同，測試結果才能互相比較。
+"""
+
+import random
+from typing import Dict, Iterator, List
+
+LANGUAGES = ("cjk", "latin", "mixed")
+
+_CJK_WORDS = [
+    "規格", "驅動", "開發", "測試", "需求", "使用者", "故事", "驗收", "條件", "架構",
+    "設計", "模組", "介面", "資料", "儲存", "搜尋", "索引", "標籤", "匯出", "效能",
+    "學習", "筆記", "知識", "管理", "工具", "流程", "團隊", "溝通", "文件", "範例",
+    "程式", "函式", "物件", "類別", "錯誤", "處理", "部署", "版本", "控制", "重構",
+    "機器", "模型", "訓練", "推論", "語言", "中文", "斷詞", "統計", "分析", "報告",
+]
+
+_LATIN_WORDS = [
+    "spec", "driven", "development", "test", "requirement", "user", "story", "acceptance",
+    "criteria", "architecture", "design", "module", "interface", "data", "storage",
+    "search", "index", "tag", "export", "performance", "python", "javascript", "async",
+    "function", "object", "class", "error", "handling", "deploy", "version", "control",
+    "refactor", "machine", "learning", "model", "training", "inference", "language",
+    "token", "statistics", "analysis", "report", "cache", "query", "latency", "memory",
+    "benchmark", "baseline", "regression", "pipeline",
+]
+
+_TAGS = [
+    "python", "sdd", "tdd", "ai", "工具", "方法論", "教學", "進階", "架構", "測試",
+    "資料庫", "前端", "後端", "效能", "安全", "筆記", "讀書會", "專案", "面試", "雜記",
+]
+
+
+def _words(rng: random.Random, language: str) -> List[str]:
+    if language == "mixed":
+        return _CJK_WORDS if rng.random() < 0.5 else _LATIN_WORDS
+    return _CJK_WORDS if language == "cjk" else _LATIN_WORDS
+
+
+def _sentence(rng: random.Random, words: List[str], length: int) -> str:
+    chosen = rng.choices(words, k=length)
+    if words is _CJK_WORDS:
+        return "".join(chosen) + "。"
+    return " ".join(chosen).capitalize() + ". "
+
+
+def generate_corpus(count: int, language: str = "mixed", seed: int = 0) -> Iterator[Dict]:
+    """
+    產生合成知識條目
+
+    標籤依 Zipf 分佈抽樣（少數標籤很常見，多數標籤很少見），
+    內容長度約 100～1000 字元。
+
+    Args:
+        count: 條目數量
+        language: 語言（cjk/latin/mixed）
+        seed: 亂數種子
+
+    Returns:
+        條目資料的產生器，每筆包含 title、content、tags
+
+    Raises:
+        ValueError: 不支援的語言
+    """
+    if language not in LANGUAGES:
+        raise ValueError(f"不支援的語言: {language}")
+
+    rng = random.Random(seed)
+    tag_weights = [1 / (rank + 1) for rank in range(len(_TAGS))]
+    for _ in range(count):
+        words = _words(rng, language)
+        title = _sentence(rng, words, rng.randint(2, 5)).rstrip("。. ")
+        content = "".join(_sentence(rng, words, rng.randint(5, 15))
+                          for _ in range(rng.randint(3, 20)))
+        tags = sorted(set(rng.choices(_TAGS, weights=tag_weights, k=rng.randint(1, 4))))
+        yield {"title": title, "content": content, "tags": tags}
+
+
+def sample_queries(count: int, language: str = "mixed", seed: int = 1) -> List[str]:
+    """
+    產生搜尋查詢：一半是單一詞彙，一半是兩個詞彙相連的片語
+
+    Args:
+        count: 查詢數量
+        language: 語言（cjk/latin/mixed）
+        seed: 亂數種子
+
+    Returns:
+        查詢字串列表
+    """
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        words = _words(rng, language)
+        if i % 2 == 0:
+            queries.append(rng.choice(words))
+        else:
+            separator = "" if words is _CJK_WORDS else " "
+            queries.append(separator.join(rng.sample(words, 2)))
+    return queries
+
+
+def sample_tags(count: int, seed: int = 2) -> List[List[str]]:
+    """產生標籤過濾條件（每筆 1～2 個標籤）"""
+    rng = random.Random(seed)
+    return [rng.sample(_TAGS, rng.randint(1, 2)) for _ in range(count)]
@@ -0,0 +1,295 @@
+"""
+知識庫效能測試
+
+以合成語料建立不同規模的知識庫，量測各操作的延遲（p50/p99）、
+開啟時間與記憶體用量，並檢查：
+1. 規格（specs/knowledge-base.spec.md「效能需求」）訂定的目標，
+   以及團隊實際使用規模（五萬條目）的搜尋目標
+2. 與 baselines.json 中的基準相比是否退步
+
+用法：
+    python benchmarks/run_benchmarks.py                          # 100/1k/10k，與基準比較
+    python benchmarks/run_benchmarks.py --sizes 50000            # 實際使用規模
+    python benchmarks/run_benchmarks.py --sizes 100000           # 大型知識庫
+    python benchmarks/run_benchmarks.py --backend sqlite --language cjk
+    python benchmarks/run_benchmarks.py --update-baseline        # 以本次結果更新基準
+
+有任何規格目標未達成或效能退步時，以結束碼 1 結束。
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import LANGUAGES, generate_corpus, sample_queries, sample_tags
+from knowledge_base import KnowledgeBase
+
+BASELINE_PATH = Path(__file__).parent / "baselines.json"
+
+# 儲存後端設定：名稱 → (副檔名, KnowledgeBase 參數)
+BACKENDS = {
+    "json": (".json", {}),
+    "journal": (".json", {"journal": True}),
+    "split": (".json", {"journal": True, "split_content": True}),
+    "sqlite": (".db", {}),
+}
+
+# 規格的效能需求：(操作, 知識庫規模（None 代表任何規模）, 上限毫秒)，以 p99 判斷
+SPEC_TARGETS = [
+    ("create", None, 100),
+    ("search", 1000, 500),
+    ("export", 100, 2000),
+]
+# 團隊實際使用規模的目標：(操作, 知識庫規模, 上限毫秒)，以 p50 判斷
+# （p99 取決於結果最多的查詢要讀出多少條目，不適合當作門檻）
+SCALE_TARGETS = [
+    ("search", 50000, 250),
+]
+# 規格要求至少支援的條目數
+SPEC_MIN_ENTRIES = 10000
+
+# 比基準慢不到這麼多毫秒時視為量測誤差
+NOISE_FLOOR_MS = 1.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近秩次法（nearest-rank）百分位數"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict:
+    """將以秒為單位的量測結果整理成毫秒統計"""
+    millis = [sample * 1000 for sample in samples]
+    return {
+        "n": len(millis),
+        "p50": round(percentile(millis, 50), 3),
+        "p99": round(percentile(millis, 99), 3),
+        "mean": round(statistics.fmean(millis), 3),
+    }
+
+
+def measure(operation: Callable, arguments: List) -> Dict:
+    """對每個參數各執行一次 operation，回傳延遲統計"""
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        operation(argument)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run_suite(size: int, language: str = "mixed", backend: str = "journal",
+              operations: int = 100, workdir: Optional[str] = None) -> Dict:
+    """
+    對單一規模執行所有量測
+
+    Args:
+        size: 知識庫條目數
+        language: 語料語言（cjk/latin/mixed）
+        backend: 儲存後端（json/journal/split/sqlite）
+        operations: 每種操作量測的次數
+        workdir: 放置測試檔案的目錄（預設為暫存目錄）
+
+    Returns:
+        操作名稱 → 延遲統計（毫秒），另含 ingest（匯入速度）與 memory（記憶體）
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"不支援的後端: {backend}")
+    suffix, options = BACKENDS[backend]
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        db_path = str(Path(tmp) / f"bench{suffix}")
+        results = {}
+
+        kb = KnowledgeBase(db_path, **options)
+        report = kb.create_many(generate_corpus(size, language))
+        kb.close()
+        results["ingest"] = {"seconds": round(report["elapsed"], 3),
+                             "per_second": round(report["throughput"])}
+
+        def reopen(_):
+            KnowledgeBase(db_path, **options).close()
+        results["load"] = measure(reopen, range(3))
+
+        # 停用查詢快取：sample_queries 會重複抽到相同查詢，快取命中會讓延遲看起來比實際低
+        tracemalloc.start()
+        kb = KnowledgeBase(db_path, cache_size=0, **options)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results["memory"] = {"resident_mb": round(current / 2 ** 20, 2),
+                             "load_peak_mb": round(peak / 2 ** 20, 2)}
+
+        rng = random.Random(size)
+        records = list(generate_corpus(operations, language, seed=size + 1))
+        results["create"] = measure(lambda record: kb.create(**record), records)
+
+        entry_ids = list(kb.entries)
+        targets = rng.sample(entry_ids, min(operations, len(entry_ids)))
+        results["update"] = measure(
+            lambda entry_id: kb.update(entry_id, content="更新後的內容 updated content"), targets)
+
+        queries = sample_queries(operations, language)
+        results["search_cold"] = measure(kb.search, queries[:1])
+        results["search"] = measure(kb.search, queries)
+        results["filter_by_tags"] = measure(kb.filter_by_tags, sample_tags(operations))
+        results["list_page"] = measure(lambda _: kb.list_all(limit=20), range(operations))
+        results["list_all"] = measure(lambda _: kb.list_all(), range(3))
+
+        export_path = str(Path(tmp) / "export.json")
+        results["export"] = measure(lambda _: kb.export("json", export_path), range(3))
+
+        results["delete"] = measure(kb.delete, targets)
+        kb.close()
+    return results
+
+
+def check_spec(results: Dict) -> List[str]:
+    """
+    檢查規格的效能需求
+
+    Args:
+        results: 規模 → run_suite 的結果
+
+    Returns:
+        未達成的目標說明（全部達成時為空列表）
+    """
+    failures = []
+    for operation, size, limit in SPEC_TARGETS:
+        for run_size, stats in results.items():
+            if size is not None and run_size != size:
+                continue
+            p99 = stats[operation]["p99"]
+            if p99 > limit:
+                failures.append(f"{operation}（{run_size} 條目）p99 {p99:.1f}ms 超過規格 {limit}ms")
+    for operation, size, limit in SCALE_TARGETS:
+        if size in results and results[size][operation]["p50"] > limit:
+            p50 = results[size][operation]["p50"]
+            failures.append(f"{operation}（{size} 條目）p50 {p50:.1f}ms 超過目標 {limit}ms")
+    if results and max(results) >= SPEC_MIN_ENTRIES:
+        stats = results[max(results)]
+        if stats["ingest"]["per_second"] <= 0:
+            failures.append(f"無法建立 {max(results)} 條目的知識庫")
+    return failures
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 1.5) -> List[str]:
+    """
+    與基準比較
+
+    延遲以 p50 比較，超過 基準 × tolerance 且差距大於量測誤差時視為退步；
+    記憶體（resident_mb）同樣以 tolerance 比較。
+
+    Args:
+        current: 本次結果（操作 → 統計）
+        baseline: 基準結果（格式相同）
+        tolerance: 容許的倍數
+
+    Returns:
+        退步的項目說明
+    """
+    regressions = []
+    for operation, base in baseline.items():
+        stats = current.get(operation)
+        if stats is None:
+            continue
+        if "p50" in base:
+            limit = max(base["p50"] * tolerance, base["p50"] + NOISE_FLOOR_MS)
+            if stats["p50"] > limit:
+                regressions.append(
+                    f"{operation} p50 {stats['p50']:.2f}ms（基準 {base['p50']:.2f}ms）")
+        elif "resident_mb" in base:
+            if stats["resident_mb"] > base["resident_mb"] * tolerance:
+                regressions.append(
+                    f"{operation} {stats['resident_mb']:.1f}MB（基準 {base['resident_mb']:.1f}MB）")
+    return regressions
+
+
+def baseline_key(backend: str, language: str, size: int) -> str:
+    return f"{backend}/{language}/{size}"
+
+
+def format_report(size: int, stats: Dict) -> str:
+    """將單一規模的結果排成表格"""
+    lines = [f"\n📊 {size} 條目", f"{'操作':<16}{'p50 (ms)':>12}{'p99 (ms)':>12}{'次數':>8}"]
+    for operation, values in stats.items():
+        if "p50" in values:
+            lines.append(f"{operation:<16}{values['p50']:>12.2f}{values['p99']:>12.2f}{values['n']:>8}")
+    lines.append(f"匯入速度: {stats['ingest']['per_second']} 條/秒")
+    lines.append(f"記憶體: 常駐 {stats['memory']['resident_mb']}MB，"
+                 f"開啟時峰值 {stats['memory']['load_peak_mb']}MB")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令列入口，回傳結束碼"""
+    parser = argparse.ArgumentParser(description="知識庫效能測試")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="知識庫規模（預設 100 1000 10000）")
+    parser.add_argument("--language", choices=LANGUAGES, default="mixed", help="語料語言")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="journal", help="儲存後端")
+    parser.add_argument("--operations", type=int, default=100, help="每種操作量測次數")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="基準檔路徑")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="容許退步的倍數")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次結果更新基準")
+    parser.add_argument("--output", help="將完整結果寫成 JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        results[size] = run_suite(size, args.language, args.backend, args.operations)
+        print(format_report(size, results[size]))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({str(size): stats for size, stats in results.items()}, f,
+                      ensure_ascii=False, indent=2)
+
+    baseline_path = Path(args.baseline)
+    baselines = {}
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    failures = check_spec(results)
+    if args.update_baseline:
+        for size, stats in results.items():
+            baselines[baseline_key(args.backend, args.language, size)] = {
+                operation: values for operation, values in stats.items()
+                if operation not in ("ingest", "search_cold")
+            }
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ 已更新基準: {baseline_path}")
+    else:
+        for size, stats in results.items():
+            baseline = baselines.get(baseline_key(args.backend, args.language, size))
+            if baseline is None:
+                continue
+            failures.extend(f"{size} 條目 {message}"
+                            for message in compare(stats, baseline, args.tolerance))
+
+    if failures:
+        print("\n❌ 效能檢查未通過：")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ 效能檢查通過")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+知識庫的 asyncio 介面
+
+AsyncKnowledgeBase 包裝 KnowledgeBase，讓 asyncio 服務不會因為寫檔而卡住事件迴圈：
+- 讀取（read / list_all / search ...）直接由記憶體回答
+- 寫入（create / update / delete）立即套用到記憶體，持久化交給背景的寫入工作
+- 背景工作把一段時間內的所有異動合併成一次 kb.batch()，在執行緒中寫入磁碟
+- 每個寫入的 awaitable 在該批次確實寫入磁碟後才完成
+
+使用方式：
+
+    async with AsyncKnowledgeBase(KnowledgeBase("kb.json", journal=True)) as akb:
+        entry_id = await akb.create(title="標題", content="內容", tags=["標籤"])
+        akb.read(entry_id)
+"""
+
+import asyncio
+import contextlib
+from typing import Callable, Dict, List, Optional
+
+from knowledge_base import KnowledgeBase
+
+
+class AsyncKnowledgeBase:
+    """
+    非阻塞持久化的知識庫介面
+
+    批次寫入磁碟期間到達的異動會先排隊，等這次寫入完成後才套用，
+    確保背景執行緒寫檔時記憶體中的條目不會被同時修改。
+    """
+
+    def __init__(self, kb: KnowledgeBase, flush_interval: float = 0.005,
+                 max_pending: int = 1000):
+        """
+        初始化
+
+        Args:
+            kb: 要包裝的知識庫
+            flush_interval: 批次視窗（秒），第一筆異動後最多等待多久再寫入磁碟
+            max_pending: 累積多少筆異動就不等視窗結束、立即寫入
+        """
+        self.kb = kb
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flush_count = 0       # 已完成的批次寫入次數
+
+        self._batch = None         # 目前開啟的 kb.batch()
+        self._applied = []         # [(future, 結果)] 已套用到記憶體、等待寫入磁碟
+        self._deferred = []        # [(異動, future)] 寫入磁碟期間到達的異動
+        self._flushing = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    # ----- 寫入 -----
+
+    async def create(self, title: str, content: str, tags: List[str]) -> str:
+        """新增知識條目，寫入磁碟後回傳 ID（參數同 KnowledgeBase.create）"""
+        return await self._submit(lambda: self.kb.create(title, content, tags))
+
+    async def update(self, entry_id: str, title: Optional[str] = None,
+                     content: Optional[str] = None, tags: Optional[List[str]] = None,
+                     expected_version: Optional[int] = None) -> bool:
+        """更新條目（參數同 KnowledgeBase.update）"""
+        return await self._submit(lambda: self.kb.update(
+            entry_id, title=title, content=content, tags=tags,
+            expected_version=expected_version))
+
+    async def delete(self, entry_id: str, expected_version: Optional[int] = None) -> bool:
+        """刪除條目（參數同 KnowledgeBase.delete）"""
+        return await self._submit(lambda: self.kb.delete(entry_id, expected_version))
+
+    async def flush(self):
+        """等待目前為止的所有異動寫入磁碟"""
+        await self._submit(lambda: None, urgent=True)
+
+    async def close(self):
+        """寫入所有異動、停止背景工作並關閉知識庫"""
+        if self._flusher is not None:
+            await self.flush()
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        await asyncio.get_running_loop().run_in_executor(None, self.kb.close)
+
+    # ----- 讀取（直接由記憶體回答） -----
+
+    def read(self, entry_id: str) -> Optional[Dict]:
+        return self.kb.read(entry_id)
+
+    def list_all(self, *args, **kwargs) -> List[Dict]:
+        return self.kb.list_all(*args, **kwargs)
+
+    def list_page(self, *args, **kwargs) -> Dict:
+        return self.kb.list_page(*args, **kwargs)
+
+    def search(self, keyword: str, *args, **kwargs) -> List[Dict]:
+        return self.kb.search(keyword, *args, **kwargs)
+
+    def suggest(self, prefix: str, limit: int = 10) -> Dict:
+        return self.kb.suggest(prefix, limit)
+
+    def filter_by_tags(self, *args, **kwargs) -> List[Dict]:
+        return self.kb.filter_by_tags(*args, **kwargs)
+
+    def filter_page(self, *args, **kwargs) -> Dict:
+        return self.kb.filter_page(*args, **kwargs)
+
+    def query_tags(self, expression: str) -> List[Dict]:
+        return self.kb.query_tags(expression)
+
+    def tag_counts(self) -> Dict[str, int]:
+        return self.kb.tag_counts()
+
+    def cache_stats(self) -> Dict:
+        return self.kb.cache_stats()
+
+    # ----- 批次寫入 -----
+
+    async def _submit(self, operation: Callable, urgent: bool = False):
+        """排入一筆異動，等待它所在的批次寫入磁碟"""
+        self._ensure_flusher()
+        future = asyncio.get_running_loop().create_future()
+        if self._flushing:
+            self._deferred.append((operation, future))
+        else:
+            self._apply(operation, future)
+        if urgent:
+            self._full.set()
+        return await future
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._flusher = asyncio.get_running_loop().create_task(self._run_flusher())
+
+    def _apply(self, operation: Callable, future: asyncio.Future):
+        """在目前的批次中套用異動（只改記憶體，持久化延後到批次結束）"""
+        if self._batch is None:
+            self._batch = self.kb.batch()
+            self._batch.__enter__()
+        self._wakeup.set()
+        try:
+            result = operation()
+        except Exception as e:
+            # 異動本身失敗（例如版本衝突）不需要等待寫入
+            future.set_exception(e)
+            return
+        self._applied.append((future, result))
+        if len(self._applied) >= self.max_pending:
+            self._full.set()
+
+    async def _run_flusher(self):
+        """背景工作：等待批次視窗結束（或累積足夠異動）後寫入磁碟"""
+        while True:
+            await self._wakeup.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._full.clear()
+            await self._flush_batch()
+
+    async def _flush_batch(self):
+        """在執行緒中結束目前的批次，完成後通知等待中的寫入"""
+        batch, applied = self._batch, self._applied
+        self._batch, self._applied = None, []
+        if batch is not None:
+            error = None
+            self._flushing = True
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, batch.__exit__, None, None, None)
+            except Exception as e:
+                error = e
+            finally:
+                self._flushing = False
+            self.flush_count += 1
+
+            for future, result in applied:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+        deferred, self._deferred = self._deferred, []
+        for operation, future in deferred:
+            if not future.done():
+                self._apply(operation, future)
@@ -0,0 +1,356 @@
+"""
+精簡的記憶體條目儲存
+
+每個條目若存成巢狀 dict，都會帶著自己的雜湊表、一個 metadata dict、
+一個標籤 list 和兩個 ISO 時間字串；十萬筆時這些結構的開銷比內容本身還大。
+
+這個模組提供：
+- Entry: 以 __slots__ 儲存的條目，時間為整數（epoch 微秒，UTC 時間另加旗標位元），標籤為共用的編號
+- TagTable: 標籤字串 ↔ 編號的對照表，每個標籤字串只存一份
+- EntryStore: 內部存放 Entry、對外行為與 dict 相同的條目映射
+- ContentSegment: 以 mmap 開啟的內容區段檔，條目內容依位移讀取
+
+從 EntryStore 取出的條目會還原成原本格式的 dict，
+因此 read()、匯出與快照檔的內容都與以前相同。
+內容放在區段檔中的條目只記錄 (位移, 長度)，取出條目時才解碼內容。
+"""
+
+import mmap
+import os
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# 含時區的 UTC 時間加上這個旗標；datetime 可表示的範圍遠小於它，與不含時區的時間不會混淆
+_UTC_FLAG = 1 << 60
+
+_REQUIRED_KEYS = frozenset(("id", "title", "content", "tags", "created_at", "updated_at", "metadata"))
+_METADATA_KEYS = frozenset(("word_count", "read_time"))
+
+
+def encode_timestamp(value: str) -> Union[int, str]:
+    """
+    將 ISO 時間字串轉成 epoch 微秒整數
+
+    只有能原樣還原的字串（不含時區或時區為 UTC、與 datetime.isoformat() 的輸出一致）才轉換，
+    其他字串保持原樣，確保還原後與原本完全相同。
+
+    Args:
+        value: ISO 8601 時間字串
+
+    Returns:
+        epoch 微秒整數，或無法無損轉換時的原字串
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.isoformat() != value:
+        return value
+    if moment.tzinfo is None:
+        return (moment - _EPOCH) // _MICROSECOND
+    if moment.utcoffset():
+        return value
+    return (moment.replace(tzinfo=None) - _EPOCH) // _MICROSECOND + _UTC_FLAG
+
+
+def decode_timestamp(value: Union[int, str]) -> str:
+    """將 encode_timestamp 的結果還原成 ISO 時間字串"""
+    if type(value) is int:
+        if value >= _UTC_FLAG // 2:
+            return (_EPOCH_UTC + timedelta(microseconds=value - _UTC_FLAG)).isoformat()
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+
+class TagTable:
+    """
+    標籤對照表
+
+    所有條目共用同一份標籤字串，條目本身只記錄編號。
+    標籤編號不會回收，表的大小等於出現過的不同標籤數。
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, tags: List[str]) -> Tuple[int, ...]:
+        """將標籤列表轉成編號 tuple（保留原順序）"""
+        tag_ids = []
+        for tag in tags:
+            tag_id = self._ids.get(tag)
+            if tag_id is None:
+                tag_id = len(self._names)
+                self._names.append(tag)
+                self._ids[tag] = tag_id
+            tag_ids.append(tag_id)
+        return tuple(tag_ids)
+
+    def names(self, tag_ids: Tuple[int, ...]) -> List[str]:
+        """將編號 tuple 還原成標籤列表"""
+        return [self._names[tag_id] for tag_id in tag_ids]
+
+
+class ContentSegment:
+    """
+    內容區段檔
+
+    所有條目內容的 UTF-8 位元組依序串接成一個檔案，以唯讀 mmap 開啟；
+    只有被讀到的頁面才會載入記憶體，且由作業系統的頁面快取管理。
+    """
+
+    def __init__(self, path: Path):
+        """
+        開啟區段檔
+
+        Args:
+            path: 區段檔路徑
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # 空檔案無法 mmap
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def read_bytes(self, span: Tuple[int, int]) -> bytes:
+        """讀出 (位移, 長度) 範圍的原始位元組"""
+        offset, length = span
+        return self._data[offset:offset + length]
+
+    def read(self, span: Tuple[int, int]) -> str:
+        """讀出並解碼 (位移, 長度) 範圍的內容"""
+        return self.read_bytes(span).decode('utf-8')
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+
+
+class Entry:
+    """
+    以 __slots__ 儲存的知識條目
+
+    content 為字串，或內容位於區段檔時為 (位移, 長度)；
+    沒有 version 欄位的舊條目 version 為 None。
+    """
+
+    __slots__ = ("id", "title", "content", "tag_ids", "created_at", "updated_at",
+                 "version", "word_count", "read_time")
+
+    def __init__(self, entry_id: str, title: str, content: str, tag_ids: Tuple[int, ...],
+                 created_at: Union[int, str], updated_at: Union[int, str],
+                 version, word_count, read_time):
+        self.id = entry_id
+        self.title = title
+        self.content = content
+        self.tag_ids = tag_ids
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.version = version
+        self.word_count = word_count
+        self.read_time = read_time
+
+
+def _is_compactable(entry: Dict) -> bool:
+    """條目是否剛好符合標準格式，可以無損轉成 Entry"""
+    if type(entry) is not dict:
+        return False
+    keys = entry.keys()
+    extra = keys - _REQUIRED_KEYS
+    if not _REQUIRED_KEYS <= keys or not extra <= {"version"}:
+        return False
+    metadata = entry["metadata"]
+    version = entry.get("version")
+    return (type(metadata) is dict and metadata.keys() == _METADATA_KEYS and
+            type(entry["tags"]) is list and all(type(tag) is str for tag in entry["tags"]) and
+            type(entry["created_at"]) is str and type(entry["updated_at"]) is str and
+            (version is None or type(version) is int) and
+            ("version" not in keys or version is not None))
+
+
+class EntryStore(MutableMapping):
+    """
+    精簡的條目映射（ID → 條目）
+
+    寫入時把條目轉成 Entry，讀取時再還原成 dict；
+    格式不標準的條目（多出欄位、型別不同）直接以原本的 dict 保存。
+    讀取得到的 dict 是還原出來的副本，修改後要再寫回才會生效。
+
+    搭配 ContentSegment 時，條目內容可以只記錄在區段檔中的位置，
+    headers() 可在不解碼內容的情況下逐筆取出其餘欄位。
+    """
+
+    def __init__(self, entries=None):
+        self.tags = TagTable()
+        self.segment: Optional[ContentSegment] = None
+        self._items: Dict[str, Union[Entry, Dict]] = {}
+        if entries:
+            self.update(entries)
+
+    def __getitem__(self, entry_id: str) -> Dict:
+        return self._unpack(self._items[entry_id])
+
+    def __setitem__(self, entry_id: str, entry: Dict):
+        self._items[entry_id] = self._pack(entry)
+
+    def __delitem__(self, entry_id: str):
+        del self._items[entry_id]
+
+    def __contains__(self, entry_id) -> bool:
+        return entry_id in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+    def close(self):
+        """關閉內容區段檔"""
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+    def replace_with(self, other: "EntryStore"):
+        """就地換成另一個 EntryStore 的內容（不需逐筆解碼再轉換）"""
+        if self.segment is not other.segment:
+            self.close()
+        self.tags = other.tags
+        self.segment = other.segment
+        self._items = other._items
+
+    def same_entry(self, entry_id: str, other: "EntryStore") -> bool:
+        """
+        條目在兩個 EntryStore 中是否相同
+
+        內容位於同一個區段檔的相同位置時只比較中繼資料，不讀取內容。
+        """
+        mine, theirs = self._items.get(entry_id), other._items.get(entry_id)
+        if mine is None or theirs is None:
+            return mine is theirs
+        if (type(mine) is Entry and type(theirs) is Entry and
+                type(mine.content) is tuple and mine.content == theirs.content and
+                self.segment.path == other.segment.path):
+            return self.header(entry_id) == other.header(entry_id)
+        return self[entry_id] == other[entry_id]
+
+    def headers(self) -> Iterator[Tuple[str, Dict]]:
+        """逐筆取出不含 content 的條目（不讀取區段檔）"""
+        for entry_id, item in self._items.items():
+            if type(item) is Entry:
+                yield entry_id, self._unpack(item, with_content=False)
+            else:
+                yield entry_id, {key: value for key, value in item.items() if key != "content"}
+
+    def load_header(self, entry_id: str, header: Dict):
+        """
+        載入區段檔格式的條目
+
+        Args:
+            entry_id: 條目 ID
+            header: 條目欄位；內容在區段檔中時以 content_span 記錄 [位移, 長度]
+        """
+        if "content_span" in header:
+            header["content"] = tuple(header.pop("content_span"))
+        self._items[entry_id] = self._pack(header)
+
+    def header(self, entry_id: str) -> Dict:
+        """條目的區段檔格式（內容在區段檔中時以 content_span 取代 content）"""
+        item = self._items[entry_id]
+        if type(item) is Entry and type(item.content) is tuple:
+            header = self._unpack(item, with_content=False)
+            header["content_span"] = list(item.content)
+            return header
+        return item if type(item) is not Entry else self._unpack(item)
+
+    def inline_ids(self) -> List[str]:
+        """內容還在記憶體中（尚未寫入區段檔）的條目 ID"""
+        return [entry_id for entry_id, item in self._items.items()
+                if type(item) is Entry and type(item.content) is str]
+
+    def segment_ids(self) -> List[str]:
+        """可以把內容放進區段檔的條目 ID"""
+        return [entry_id for entry_id, item in self._items.items() if type(item) is Entry]
+
+    def live_bytes(self) -> int:
+        """區段檔中仍被條目參照的位元組數"""
+        return sum(item.content[1] for item in self._items.values()
+                   if type(item) is Entry and type(item.content) is tuple)
+
+    def texts(self, entry_ids: List[str]) -> Iterator[Tuple[str, str, str]]:
+        """只取出多筆條目的 (ID, 標題, 內容)（不還原標籤與時間，不存在的 ID 會略過）"""
+        for entry_id in entry_ids:
+            item = self._items.get(entry_id)
+            if item is None:
+                continue
+            if type(item) is not Entry:
+                yield entry_id, item["title"], item["content"]
+                continue
+            content = item.content
+            yield entry_id, item.title, content if type(content) is str else self.segment.read(content)
+
+    def content_bytes(self, entry_id: str) -> bytes:
+        """條目內容的 UTF-8 位元組（內容在區段檔中時不解碼）"""
+        content = self._items[entry_id].content
+        if type(content) is tuple:
+            return self.segment.read_bytes(content)
+        return content.encode('utf-8')
+
+    def attach_segment(self, segment: ContentSegment, spans: Dict[str, Tuple[int, int]]):
+        """
+        改用新的區段檔
+
+        Args:
+            segment: 新的區段檔
+            spans: 內容位置有變動的條目 ID → (位移, 長度)
+        """
+        for entry_id, span in spans.items():
+            self._items[entry_id].content = span
+        if self.segment is not segment:
+            self.close()
+        self.segment = segment
+
+    def _pack(self, entry: Dict) -> Union[Entry, Dict]:
+        if not _is_compactable(entry):
+            return entry
+        metadata = entry["metadata"]
+        return Entry(
+            entry["id"], entry["title"], entry["content"], self.tags.intern(entry["tags"]),
+            encode_timestamp(entry["created_at"]), encode_timestamp(entry["updated_at"]),
+            entry.get("version"), metadata["word_count"], metadata["read_time"]
+        )
+
+    def _unpack(self, item: Union[Entry, Dict], with_content: bool = True) -> Dict:
+        if type(item) is not Entry:
+            return item
+        entry = {"id": item.id, "title": item.title}
+        if with_content:
+            content = item.content
+            entry["content"] = content if type(content) is str else self.segment.read(content)
+        created_at = decode_timestamp(item.created_at)
+        # 沒更新過的條目兩個時間相同，只需還原一次
+        updated_at = created_at if item.updated_at == item.created_at else decode_timestamp(item.updated_at)
+        entry.update({
+            "tags": self.tags.names(item.tag_ids),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        })
+        if item.version is not None:
+            entry["version"] = item.version
+        entry["metadata"] = {
+            "word_count": item.word_count,
+            "read_time": item.read_time
+        }
+        return entry
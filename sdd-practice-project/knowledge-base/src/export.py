@@ -0,0 +1,163 @@
+"""
+知識庫匯出功能
+
+這個模組提供逐筆寫出的匯出器：每個條目讀到就寫，
+不在記憶體中組出整份文件，匯出時的記憶體用量與知識庫大小無關。
+
+支援格式：Markdown、JSON、JSON Lines、HTML，皆可選擇 gzip 壓縮。
+"""
+
+import gzip
+import html
+import json
+from datetime import datetime
+from typing import Dict, Iterable, TextIO
+
+# 格式名稱 → 副檔名
+EXTENSIONS = {
+    "markdown": ".md",
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "html": ".html",
+}
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>知識庫匯出</title>
+<style>
+  body {{ font-family: -apple-system, "Noto Sans TC", "Microsoft JhengHei", sans-serif;
+         max-width: 800px; margin: 2em auto; padding: 0 1em; line-height: 1.7; color: #222; }}
+  header {{ border-bottom: 2px solid #444; margin-bottom: 1.5em; }}
+  article {{ border-bottom: 1px solid #ddd; padding-bottom: 1em; margin-bottom: 1.5em; }}
+  .meta {{ color: #666; font-size: 0.9em; }}
+  .tag {{ display: inline-block; background: #eef; border-radius: 3px; padding: 0 0.4em; margin-right: 0.3em; }}
+  .content {{ white-space: pre-wrap; }}
+  @media print {{
+    body {{ max-width: none; margin: 0; }}
+    article {{ page-break-inside: avoid; }}
+    .tag {{ background: none; border: 1px solid #999; }}
+  }}
+</style>
+</head>
+<body>
+<header>
+<h1>知識庫匯出</h1>
+<p class="meta">匯出時間：{export_time}　總條目數：{total}</p>
+</header>
+"""
+
+_HTML_TAIL = """</body>
+</html>
+"""
+
+
+def open_output(filename: str, compress: bool = False) -> TextIO:
+    """
+    開啟匯出檔案
+
+    Args:
+        filename: 檔案路徑
+        compress: 是否以 gzip 壓縮
+
+    Returns:
+        文字模式的檔案物件
+    """
+    if compress:
+        return gzip.open(filename, 'wt', encoding='utf-8')
+    return open(filename, 'w', encoding='utf-8')
+
+
+def write_markdown(entries: Iterable[Dict], total: int, f: TextIO):
+    """逐筆寫出 Markdown"""
+    f.write("# 知識庫匯出\n\n")
+    f.write(f"**匯出時間：** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    f.write(f"**總條目數：** {total}\n\n")
+    f.write("---\n\n")
+
+    for entry in entries:
+        f.write(f"## {entry['title']}\n\n")
+        f.write(f"**標籤：** {', '.join(entry['tags'])}\n")
+        f.write(f"**建立時間：** {entry['created_at']}\n")
+        f.write(f"**字數：** {entry['metadata']['word_count']}\n\n")
+        f.write(f"{entry['content']}\n\n")
+        f.write("---\n\n")
+
+
+def write_json(entries: Iterable[Dict], total: int, f: TextIO):
+    """逐筆寫出 JSON（格式與 json.dump(..., indent=2) 相同）"""
+    f.write("{\n")
+    f.write(f'  "export_date": {json.dumps(datetime.now().isoformat())},\n')
+    f.write(f'  "total_entries": {total},\n')
+    f.write('  "entries": [')
+
+    separator = "\n"
+    for entry in entries:
+        f.write(separator)
+        text = json.dumps(entry, ensure_ascii=False, indent=2)
+        f.write("    " + text.replace("\n", "\n    "))
+        separator = ",\n"
+
+    f.write("\n  ]\n}\n" if separator != "\n" else "]\n}\n")
+
+
+def write_jsonl(entries: Iterable[Dict], total: int, f: TextIO):
+    """逐筆寫出 JSON Lines（每行一個條目，可直接用 import_jsonl 匯回）"""
+    for entry in entries:
+        f.write(json.dumps(entry, ensure_ascii=False))
+        f.write("\n")
+
+
+def write_html(entries: Iterable[Dict], total: int, f: TextIO):
+    """逐筆寫出 HTML（內含 CSS，支援列印）"""
+    f.write(_HTML_HEAD.format(
+        export_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        total=total
+    ))
+
+    for entry in entries:
+        tags = "".join(f'<span class="tag">{html.escape(tag)}</span>' for tag in entry["tags"])
+        f.write("<article>\n")
+        f.write(f"<h2>{html.escape(entry['title'])}</h2>\n")
+        f.write(f'<p class="meta">標籤：{tags}　建立時間：{html.escape(entry["created_at"])}'
+                f'　字數：{entry["metadata"]["word_count"]}</p>\n')
+        f.write(f'<div class="content">{html.escape(entry["content"])}</div>\n')
+        f.write("</article>\n")
+
+    f.write(_HTML_TAIL)
+
+
+WRITERS = {
+    "markdown": write_markdown,
+    "json": write_json,
+    "jsonl": write_jsonl,
+    "html": write_html,
+}
+
+
+def export_entries(entries: Iterable[Dict], total: int, format: str, filename: str,
+                   compress: bool = False) -> str:
+    """
+    將條目匯出到檔案
+
+    Args:
+        entries: 條目（可以是產生器）
+        total: 條目總數（寫在檔頭）
+        format: 匯出格式 (markdown/json/jsonl/html)
+        filename: 輸出檔案路徑
+        compress: 是否以 gzip 壓縮
+
+    Returns:
+        輸出檔案路徑
+
+    Raises:
+        ValueError: 不支援的格式
+    """
+    writer = WRITERS.get(format)
+    if writer is None:
+        raise ValueError(f"不支援的格式: {format}")
+
+    with open_output(filename, compress) as f:
+        writer(entries, total, f)
+    return filename
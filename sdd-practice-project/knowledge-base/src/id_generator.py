@@ -0,0 +1,81 @@
+"""
+條目 ID 產生器
+
+ID 格式（所有欄位固定寬度，字串排序即時間排序）：
+
+    kb_20261018_142233_123_0007_01a2b3f9c4
+       └日期─┘ └時間┘ └ms┘ └序號┘└節點─┘
+
+- 日期、時間、毫秒：產生 ID 的時間（UTC，夏令時間切換時順序不會倒退）
+- 序號：同一毫秒內的流水號（0000–9999），用完就借用下一毫秒
+- 節點：6 位十六進位的行程 ID + 4 位隨機數，
+  讓多個行程同時寫入同一個知識庫也不會重複
+
+時鐘倒退時沿用上一次的時間，保證同一行程內 ID 單調遞增。
+"""
+
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+_MAX_SEQUENCE = 10000
+
+
+class IdGenerator:
+    """單調遞增、跨行程不重複的 ID 產生器"""
+
+    def __init__(self, prefix: str = "kb"):
+        """
+        初始化產生器
+
+        Args:
+            prefix: ID 前綴
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self._pid = None
+        self._node = ""
+
+    def _node_id(self) -> str:
+        """目前行程的節點代碼（fork 後自動更換）"""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._node = f"{pid & 0xFFFFFF:06x}{secrets.randbits(16):04x}"
+            self._last_ms = 0
+            self._sequence = 0
+        return self._node
+
+    def next(self) -> Tuple[str, datetime]:
+        """
+        產生下一個 ID
+
+        Returns:
+            (ID, ID 所代表的時間)；呼叫者可以直接拿這個時間當建立時間，
+            讓 ID 順序與 created_at 順序一致。
+            回傳的時間與 ID 相同為 UTC（含時區），夏令時間切換時也不會倒退
+        """
+        with self._lock:
+            node = self._node_id()
+            now_ms = time.time_ns() // 1_000_000
+
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # 同一毫秒或時鐘倒退：沿用上次的時間並遞增序號
+                self._sequence += 1
+                if self._sequence >= _MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+
+            seconds, millis = divmod(self._last_ms, 1000)
+            moment = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=millis * 1000)
+            entry_id = (f"{self.prefix}_{moment.strftime('%Y%m%d_%H%M%S')}_"
+                        f"{millis:03d}_{self._sequence:04d}_{node}")
+            return entry_id, moment
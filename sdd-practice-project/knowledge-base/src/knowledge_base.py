@@ -16,42 +16,209 @@ TODO: 根據規格實作以下功能
 - [ ] 匯出功能（Markdown, JSON, HTML）
 """
 
+import base64
+import itertools
 import json
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Optional
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from export import EXTENSIONS, export_entries
+from id_generator import IdGenerator
+from query_cache import QueryCache
+from search import InvertedIndex, SortedIndex, TagIndex
+from storage import StorageBackend, open_storage
+
+
+class VersionConflictError(ValueError):
+    """條目已被其他寫入者修改（update/delete 的 expected_version 與目前版本不符）"""
+    
+    def __init__(self, entry_id: str, expected: int, actual: int):
+        super().__init__(f"條目 {entry_id} 已被修改：預期版本 {expected}，目前版本 {actual}")
+        self.entry_id = entry_id
+        self.expected = expected
+        self.actual = actual
 
 
 class KnowledgeBase:
     """個人知識庫管理器"""
     
-    def __init__(self, db_path: str = "knowledge_base.json"):
+    # 維護排序索引的欄位（list_all / list_page 的 sort_by）
+    SORT_FIELDS = ("created_at", "updated_at", "title")
+    
+    def __init__(self, db_path: str = "knowledge_base.json", journal: bool = False,
+                 fsync_every: int = 64, compact_every: int = 1000,
+                 shared: bool = False, split_content: Optional[bool] = None,
+                 cache_size: int = 256, storage: Optional[StorageBackend] = None):
         """
         初始化知識庫
         
         Args:
-            db_path: 資料庫檔案路徑
+            db_path: 資料庫檔案路徑（.db/.sqlite/.sqlite3 使用 SQLite，其他使用 JSON）
+            journal: 是否啟用日誌模式（異動追加到日誌檔，定期壓縮回快照）
+            fsync_every: 日誌模式下每累積多少筆異動執行一次 fsync
+            compact_every: 日誌模式下累積多少筆異動後壓縮回快照
+            shared: 是否與其他程序共用同一份 JSON 知識庫（以檔案鎖保護寫入，
+                    並自動載入其他程序的異動；建議搭配 journal=True）
+            split_content: 是否把條目內容存到以 mmap 讀取的區段檔，開啟時只載入中繼資料
+                           （None 代表沿用現有檔案的格式）
+            cache_size: search / filter_by_tags / query_tags 結果快取的筆數（0 代表停用）
+            storage: 自訂儲存後端（指定時忽略上面的路徑與日誌選項）
         """
-        self.db_path = Path(db_path)
+        if storage is None:
+            storage = open_storage(db_path, journal=journal, fsync_every=fsync_every,
+                                   compact_every=compact_every, shared=shared,
+                                   split_content=split_content)
+        self._storage = storage
+        self._id_generator = IdGenerator()
+        self.db_path = storage.path
         self.entries = self._load_database()
+        
+        # 後端沒有提供全文索引時，第一次搜尋才建立（開啟時不需要讀取內容）
+        self._search_index = storage.search_index()
+        self._tag_index = storage.tag_index()
+        self._sorted_indexes = {field: storage.sorted_index(field) for field in self.SORT_FIELDS}
+        # 以小寫標題排序的索引，供標題前綴自動完成
+        self._prefix_index = storage.sorted_index("title_prefix")
+        self._build_indexes()
+        
+        # 查詢結果快取：異動時遞增相關的世代計數，快取項目的簽章不符就視為過期
+        # - 標題或內容改變、新增或刪除條目 → _content_generation（search）
+        # - 標籤成員改變 → 該標籤的世代（filter_by_tags）與 _tags_generation（query_tags）
+        self._cache = QueryCache(cache_size)
+        self._content_generation = 0
+        self._tags_generation = 0
+        self._tag_generations: Dict[str, int] = {}
     
-    def _load_database(self) -> Dict:
+    def _load_database(self):
         """載入資料庫"""
-        if self.db_path.exists():
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return self._storage.load()
+    
+    def _build_indexes(self):
+        """為儲存後端沒有提供的查詢建立標籤與排序索引（只需要中繼資料）"""
+        build_tags = self._tag_index is None
+        build_sorted = [field for field, index in self._sorted_indexes.items() if index is None]
+        build_prefix = self._prefix_index is None
+        if build_tags:
+            self._tag_index = TagIndex()
+        for field in build_sorted:
+            self._sorted_indexes[field] = SortedIndex()
+        if build_prefix:
+            self._prefix_index = SortedIndex()
+        
+        if not (build_tags or build_sorted or build_prefix):
+            return
+        headers = getattr(self.entries, "headers", None)
+        for entry_id, entry in (headers() if headers is not None else self.entries.items()):
+            if build_tags:
+                self._tag_index.add(entry_id, entry["tags"], entry["created_at"])
+            for field in build_sorted:
+                self._sorted_indexes[field].add(entry_id, entry[field])
+            if build_prefix:
+                self._prefix_index.add(entry_id, entry["title"].lower())
     
-    def _save_database(self):
-        """儲存資料庫"""
-        with open(self.db_path, 'w', encoding='utf-8') as f:
-            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+    def _ensure_search_index(self):
+        """第一次搜尋時建立全文索引"""
+        if self._search_index is None:
+            index = InvertedIndex()
+            for entry_id, entry in self.entries.items():
+                index.add(entry_id, entry["title"], entry["content"])
+            self._search_index = index
+        return self._search_index
+    
+    def _touch_tags(self, tags: Iterable[str]):
+        """標籤成員改變：讓依賴這些標籤的快取結果過期"""
+        self._tags_generation += 1
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+    
+    def _index_entry(self, entry_id: str, entry: Dict):
+        """將條目加入所有索引"""
+        self._content_generation += 1
+        self._touch_tags(entry["tags"])
+        if self._search_index is not None:
+            self._search_index.add(entry_id, entry["title"], entry["content"])
+        self._tag_index.add(entry_id, entry["tags"], entry["created_at"])
+        for field, index in self._sorted_indexes.items():
+            index.add(entry_id, entry[field])
+        self._prefix_index.add(entry_id, entry["title"].lower())
+    
+    def _unindex_entry(self, entry_id: str, entry: Dict):
+        """將條目從所有索引移除"""
+        self._content_generation += 1
+        self._touch_tags(entry["tags"])
+        self._tag_index.remove(entry_id, entry["tags"], entry["created_at"])
+        if self._search_index is not None:
+            self._search_index.remove(entry_id)
+        for index in self._sorted_indexes.values():
+            index.remove(entry_id)
+        self._prefix_index.remove(entry_id)
+    
+    def refresh(self) -> int:
+        """
+        載入其他程序寫入的異動並更新索引
+        
+        共用模式下每次讀取前都會自動呼叫；快照沒被改寫時只重播日誌新增的部分。
+        
+        Returns:
+            有異動的條目數量
+        """
+        changes = self._storage.refresh()
+        for entry_id, old_entry in changes:
+            if old_entry is not None:
+                self._unindex_entry(entry_id, old_entry)
+            entry = self.entries.get(entry_id)
+            if entry is not None:
+                self._index_entry(entry_id, entry)
+        return len(changes)
+    
+    @contextmanager
+    def _exclusive(self):
+        """取得寫入鎖；剛取得鎖時先載入其他程序的異動，避免覆蓋別人的寫入"""
+        with self._storage.locked() as acquired:
+            if acquired:
+                self.refresh()
+            yield
+    
+    @contextmanager
+    def batch(self):
+        """
+        批次異動
+        
+        區塊內的 create/update/delete 在離開區塊時才一次持久化：
+        
+            with kb.batch():
+                for item in items:
+                    kb.create(**item)
+        
+        共用模式下整個區塊都持有寫入鎖。
+        """
+        with self._exclusive(), self._storage.batch():
+            yield self
+    
+    def compact(self):
+        """整理儲存空間（JSON 日誌模式：將日誌壓縮回快照）"""
+        with self._exclusive():
+            self._storage.compact()
+    
+    def flush(self):
+        """確保所有異動都寫入磁碟"""
+        self._storage.flush()
+    
+    def close(self):
+        """關閉知識庫，確保資料已寫入磁碟"""
+        self._storage.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def _generate_id(self) -> str:
-        """生成唯一 ID"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        count = len(self.entries) + 1
-        return f"kb_{timestamp}_{count:03d}"
+        """生成唯一 ID（依時間排序，與條目數量無關，刪除後也不會重複）"""
+        return self._id_generator.next()[0]
     
     def create(self, title: str, content: str, tags: List[str]) -> str:
         """
@@ -71,7 +238,16 @@ class KnowledgeBase:
         - [ ] 計算字數和預估閱讀時間
         - [ ] 標籤自動去重和標準化
         """
-        entry_id = self._generate_id()
+        with self._exclusive():
+            entry = self._new_entry(title, content, tags)
+            self._add_entry(entry)
+        return entry["id"]
+    
+    def _new_entry(self, title: str, content: str, tags: List[str]) -> Dict:
+        """建立新條目（生成 ID、標準化標籤、計算元數據）"""
+        # 建立時間取自 ID，兩者的排序保證一致
+        entry_id, created = self._id_generator.next()
+        timestamp = created.isoformat(timespec="microseconds")
         
         # TODO: 標籤去重和標準化
         normalized_tags = list(set([tag.lower() for tag in tags]))
@@ -80,23 +256,124 @@ class KnowledgeBase:
         word_count = len(content)
         read_time = max(1, word_count // 200)  # 假設每分鐘讀 200 字
         
-        entry = {
+        return {
             "id": entry_id,
             "title": title,
             "content": content,
             "tags": normalized_tags,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": timestamp,
+            "updated_at": timestamp,
+            "version": 1,
             "metadata": {
                 "word_count": word_count,
                 "read_time": read_time
             }
         }
+    
+    def _add_entry(self, entry: Dict):
+        """將新條目加入索引並寫入儲存後端"""
+        self._index_entry(entry["id"], entry)
+        self._storage.put(entry["id"], entry)
+    
+    def create_many(self, records: Iterable[Dict], chunk_size: Optional[int] = None) -> Dict:
+        """
+        批次新增知識條目
+        
+        逐筆讀取 records（可以是產生器），全部處理完才持久化一次；
+        指定 chunk_size 時則每 chunk_size 筆持久化一次。
+        單筆資料有誤不會中斷匯入，而是記錄在回傳的 errors 中。
         
-        self.entries[entry_id] = entry
-        self._save_database()
+        匯入 examples/sample_data.json 這類匯出檔時，
+        可直接傳入 json.load(f).values()（會重新生成 ID 與時間）。
         
-        return entry_id
+        Args:
+            records: 條目資料，每筆包含 title、content，tags 可省略
+            chunk_size: 每多少筆持久化一次（None 代表全部結束後一次）
+            
+        Returns:
+            匯入報告：
+            {
+                "created": [新建的 ID],
+                "errors": [{"index": 資料序號, "error": 錯誤訊息}],
+                "total": 處理筆數,
+                "elapsed": 耗時（秒）,
+                "throughput": 每秒新增筆數
+            }
+        """
+        return self._ingest(enumerate(records), chunk_size)
+    
+    def import_jsonl(self, path: str, chunk_size: Optional[int] = None) -> Dict:
+        """
+        從 JSON Lines 檔案批次匯入
+        
+        每行一個 JSON 物件（title、content、tags），逐行讀取不會整份載入記憶體。
+        錯誤報告中的 index 為行號（從 1 開始）。
+        
+        Args:
+            path: JSONL 檔案路徑
+            chunk_size: 每多少筆持久化一次
+            
+        Returns:
+            匯入報告（格式同 create_many）
+        """
+        def numbered_records():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        record = ValueError(f"JSON 格式錯誤: {e}")
+                    yield line_number, record
+        
+        return self._ingest(numbered_records(), chunk_size)
+    
+    def _ingest(self, numbered_records, chunk_size: Optional[int]) -> Dict:
+        """批次匯入的共用流程，numbered_records 為 (序號, 資料) 的迭代器"""
+        report = {"created": [], "errors": [], "total": 0}
+        start = time.perf_counter()
+        
+        numbered_records = iter(numbered_records)
+        finished = False
+        while not finished:
+            finished = True
+            with self.batch():
+                for index, record in numbered_records:
+                    report["total"] += 1
+                    try:
+                        title, content, tags = self._validate_record(record)
+                    except ValueError as e:
+                        report["errors"].append({"index": index, "error": str(e)})
+                    else:
+                        entry = self._new_entry(title, content, tags)
+                        self._add_entry(entry)
+                        report["created"].append(entry["id"])
+                    
+                    if chunk_size and report["total"] % chunk_size == 0:
+                        finished = False
+                        break
+        
+        report["elapsed"] = time.perf_counter() - start
+        report["throughput"] = len(report["created"]) / report["elapsed"] if report["elapsed"] else 0.0
+        return report
+    
+    @staticmethod
+    def _validate_record(record) -> tuple:
+        """檢查批次匯入的單筆資料，回傳 (title, content, tags)"""
+        if isinstance(record, ValueError):
+            raise record
+        if not isinstance(record, dict):
+            raise ValueError("資料必須是物件")
+        for field in ("title", "content"):
+            if field not in record:
+                raise ValueError(f"缺少 {field} 欄位")
+            if not isinstance(record[field], str):
+                raise ValueError(f"{field} 必須是字串")
+        tags = record.get("tags", [])
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError("tags 必須是字串列表")
+        return record["title"], record["content"], tags
     
     def read(self, entry_id: str) -> Optional[Dict]:
         """
@@ -106,12 +383,15 @@ class KnowledgeBase:
             entry_id: 條目 ID
             
         Returns:
-            條目內容，如果不存在則回傳 None
+            條目內容（version 欄位可作為 update/delete 的 expected_version），
+            如果不存在則回傳 None
         """
+        self.refresh()
         return self.entries.get(entry_id)
     
     def update(self, entry_id: str, title: Optional[str] = None,
-               content: Optional[str] = None, tags: Optional[List[str]] = None) -> bool:
+               content: Optional[str] = None, tags: Optional[List[str]] = None,
+               expected_version: Optional[int] = None) -> bool:
         """
         更新條目
         
@@ -120,20 +400,31 @@ class KnowledgeBase:
             title: 新標題（可選）
             content: 新內容（可選）
             tags: 新標籤（可選）
+            expected_version: 讀取時的版本號（可選），與目前版本不符時不更新
             
         Returns:
             更新成功與否
             
+        Raises:
+            VersionConflictError: 條目在讀取後已被修改
+            
         TODO: 實作部分更新功能
         - [ ] 只更新提供的欄位
         - [ ] 自動更新修改時間
         - [ ] 保持建立時間不變
         """
-        if entry_id not in self.entries:
-            return False
-        
-        entry = self.entries[entry_id]
-        
+        with self._exclusive():
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return False
+            self._check_version(entry, expected_version)
+            self._apply_update(entry, title, content, tags)
+        return True
+    
+    def _apply_update(self, entry: Dict, title: Optional[str], content: Optional[str],
+                      tags: Optional[List[str]]):
+        """套用部分更新、遞增版本並寫入儲存後端"""
+        entry_id = entry["id"]
         if title is not None:
             entry["title"] = title
         if content is not None:
@@ -142,165 +433,374 @@ class KnowledgeBase:
             entry["metadata"]["word_count"] = len(content)
             entry["metadata"]["read_time"] = max(1, len(content) // 200)
         if tags is not None:
+            self._tag_index.remove(entry_id, entry["tags"], entry["created_at"])
+            old_tags = entry["tags"]
             entry["tags"] = list(set([tag.lower() for tag in tags]))
+            self._tag_index.add(entry_id, entry["tags"], entry["created_at"])
+            self._touch_tags(set(old_tags).symmetric_difference(entry["tags"]))
         
-        entry["updated_at"] = datetime.now().isoformat()
-        self._save_database()
+        if title is not None or content is not None:
+            self._content_generation += 1
+            if self._search_index is not None:
+                self._search_index.add(entry_id, entry["title"], entry["content"])
         
-        return True
+        entry["updated_at"] = datetime.now(timezone.utc).isoformat()
+        entry["version"] = entry.get("version", 1) + 1
+        self._sorted_indexes["title"].add(entry_id, entry["title"])
+        self._sorted_indexes["updated_at"].add(entry_id, entry["updated_at"])
+        self._prefix_index.add(entry_id, entry["title"].lower())
+        self._storage.put(entry_id, entry)
+    
+    @staticmethod
+    def _check_version(entry: Dict, expected_version: Optional[int]):
+        """樂觀並行控制：確認條目版本仍是呼叫者讀到的版本"""
+        actual = entry.get("version", 1)
+        if expected_version is not None and expected_version != actual:
+            raise VersionConflictError(entry["id"], expected_version, actual)
     
-    def delete(self, entry_id: str) -> bool:
+    def delete(self, entry_id: str, expected_version: Optional[int] = None) -> bool:
         """
         刪除條目
         
         Args:
             entry_id: 條目 ID
+            expected_version: 讀取時的版本號（可選），與目前版本不符時不刪除
             
         Returns:
             刪除成功與否
+            
+        Raises:
+            VersionConflictError: 條目在讀取後已被修改
         """
-        if entry_id in self.entries:
-            del self.entries[entry_id]
-            self._save_database()
-            return True
-        return False
+        with self._exclusive():
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return False
+            self._check_version(entry, expected_version)
+            self._unindex_entry(entry_id, entry)
+            self._storage.remove(entry_id)
+        return True
     
-    def list_all(self, sort_by: str = "created_at", order: str = "desc") -> List[Dict]:
+    def list_all(self, sort_by: str = "created_at", order: str = "desc",
+                 limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
         列出所有條目
         
+        排序由增量維護的排序索引提供，取一頁只需 O(log N + 頁面大小)。
+        
         Args:
-            sort_by: 排序欄位
+            sort_by: 排序欄位（created_at/updated_at/title，其他值維持原順序）
             order: 排序方向 (asc/desc)
+            limit: 最多回傳幾筆（None 代表全部）
+            offset: 略過前幾筆
             
         Returns:
             條目列表
+        """
+        self.refresh()
+        index = self._sorted_indexes.get(sort_by)
+        if index is None:
+            stop = None if limit is None else offset + limit
+            entry_ids = list(itertools.islice(self.entries, offset, stop))
+        else:
+            entry_ids = index.page(reverse=(order == "desc"), offset=offset, limit=limit)
+        return self._materialize(entry_ids)
+    
+    def list_page(self, sort_by: str = "created_at", order: str = "desc",
+                  limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        """
+        以游標分頁列出條目
+        
+        游標記錄上一頁最後一筆的位置，翻頁期間新增或刪除條目也不會跳過或重複。
+        
+        Args:
+            sort_by: 排序欄位（created_at/updated_at/title）
+            order: 排序方向 (asc/desc)
+            limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor（None 代表第一頁）
+            
+        Returns:
+            {"entries": 條目列表, "next_cursor": 下一頁游標（沒有下一頁時為 None）}
             
-        TODO: 實作排序功能
+        Raises:
+            ValueError: 排序欄位不支援或游標無效
         """
-        entries = list(self.entries.values())
+        self.refresh()
+        index = self._sorted_indexes.get(sort_by)
+        if index is None:
+            raise ValueError(f"不支援的排序欄位: {sort_by}")
         
-        # 簡單排序實作
-        reverse = (order == "desc")
-        if sort_by in ["created_at", "updated_at"]:
-            entries.sort(key=lambda x: x[sort_by], reverse=reverse)
-        elif sort_by == "title":
-            entries.sort(key=lambda x: x["title"], reverse=reverse)
+        after = self._decode_cursor(cursor) if cursor else None
+        entry_ids = index.page(reverse=(order == "desc"), limit=limit + 1, after=after)
         
-        return entries
+        next_cursor = None
+        if len(entry_ids) > limit:
+            entry_ids = entry_ids[:limit]
+            last_id = entry_ids[-1]
+            next_cursor = self._encode_cursor(index.key(last_id), last_id)
+        
+        return {"entries": self._materialize(entry_ids), "next_cursor": next_cursor}
     
-    def search(self, keyword: str) -> List[Dict]:
+    @staticmethod
+    def _encode_cursor(key: str, entry_id: str) -> str:
+        """將 (排序鍵, ID) 編碼為分頁游標"""
+        raw = json.dumps([key, entry_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        """解碼分頁游標"""
+        try:
+            key, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError):
+            raise ValueError(f"無效的分頁游標: {cursor}")
+        return key, entry_id
+    
+    def _materialize(self, entry_ids: List[str]) -> List[Dict]:
+        """依序取出條目（後端支援時一次批次讀取）"""
+        get_many = getattr(self.entries, "get_many", None)
+        if get_many is not None:
+            return get_many(entry_ids)
+        return [self.entries[entry_id] for entry_id in entry_ids]
+    
+    def search(self, keyword: str, fuzzy: bool = False, limit: Optional[int] = None,
+               min_score: float = 0.3) -> List[Dict]:
         """
         全文搜尋
         
+        先用倒排索引找出候選條目，再比對原文確認，
+        結果依 BM25 相關度排序。
+        
+        模糊模式不要求完整包含關鍵字：以字元 n-gram 相似度容許拼字錯誤與不完整的片語，
+        依相似度分數排序。指定 limit 時只保留分數最高的幾筆（heap 選取），
+        也只讀出這幾筆條目。
+        
         Args:
             keyword: 搜尋關鍵字
+            fuzzy: 是否使用模糊搜尋
+            limit: 最多回傳幾筆（None 代表全部）
+            min_score: 模糊搜尋的相似度下限（0～1）
             
         Returns:
-            符合的條目列表
-            
-        TODO: 實作全文搜尋
-        - [ ] 搜尋標題和內容
-        - [ ] 不區分大小寫
-        - [ ] 支援部分匹配
+            符合的條目列表（相關度高的在前）
         """
-        keyword_lower = keyword.lower()
-        results = []
+        self.refresh()
+        return self._cached(
+            ("search", keyword.lower(), fuzzy, limit, min_score), self._content_generation,
+            lambda: self._materialize(self._search_ids(keyword, fuzzy, limit, min_score)))
+    
+    def _cached(self, key: tuple, generation, compute) -> List[Dict]:
+        """
+        經由結果快取執行查詢
         
-        for entry in self.entries.values():
-            if (keyword_lower in entry["title"].lower() or 
-                keyword_lower in entry["content"].lower()):
-                results.append(entry)
+        快取只保存條目 ID，命中時重新讀出條目，因此只改內容或標籤的更新
+        不會讓結果中的條目過時，只有會改變「哪些條目、什麼順序」的異動才需要讓快取過期。
         
-        return results
+        Args:
+            key: 標準化後的查詢
+            generation: 查詢依賴的世代計數
+            compute: 快取未命中時執行查詢，回傳條目列表
+        """
+        signature = (generation, self._storage.data_version())
+        entry_ids = self._cache.get(key, signature)
+        if entry_ids is not None:
+            return self._materialize(list(entry_ids))
+        entries = compute()
+        self._cache.put(key, signature, tuple(entry["id"] for entry in entries))
+        return entries
     
-    def filter_by_tags(self, tags: List[str]) -> List[Dict]:
+    def cache_stats(self) -> Dict:
+        """
+        查詢結果快取的統計
+        
+        Returns:
+            {"hits", "misses", "hit_rate", "size", "capacity"}
+        """
+        return self._cache.stats()
+    
+    def _search_ids(self, keyword: str, fuzzy: bool, limit: Optional[int],
+                    min_score: float) -> List[str]:
+        """執行搜尋，回傳依相關度排序的條目 ID"""
+        search_index = self._ensure_search_index()
+        if fuzzy:
+            return [entry_id for entry_id, _ in search_index.fuzzy(keyword, limit, min_score)]
+        
+        candidates = search_index.candidates(keyword)
+        if candidates is not None and search_index.exact(keyword):
+            # 單一詞彙的查詢：索引的結果就是答案，不必比對原文
+            return search_index.rank(keyword, sorted(candidates), limit)
+        if candidates is None:
+            candidates = self.entries.keys()
+        
+        # 只讀出標題與內容比對，不還原整個條目
+        keyword_lower = keyword.lower()
+        matched = [entry_id for entry_id, title, content in self.entries.texts(list(candidates))
+                   if keyword_lower in title.lower() or keyword_lower in content.lower()]
+        return search_index.rank(keyword, sorted(matched), limit)
+    
+    def suggest(self, prefix: str, limit: int = 10) -> Dict:
+        """
+        標題與標籤的前綴自動完成（不分大小寫）
+        
+        Args:
+            prefix: 使用者已輸入的文字
+            limit: 標題與標籤各最多幾筆
+            
+        Returns:
+            {"titles": [{"id", "title"}]（依標題排序）,
+             "tags": [{"tag", "count"}]（依使用頻率排序）}
+        """
+        self.refresh()
+        prefix = prefix.lower()
+        if not prefix:
+            return {"titles": [], "tags": []}
+        titles = [{"id": entry_id, "title": self.entries[entry_id]["title"]}
+                  for entry_id in self._prefix_index.prefix(prefix, limit)]
+        tags = [{"tag": tag, "count": count}
+                for tag, count in self._tag_index.suggest(prefix, limit)]
+        return {"titles": titles, "tags": tags}
+    
+    def filter_by_tags(self, tags: List[str], match: str = "any",
+                       exclude: Optional[List[str]] = None,
+                       limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
         按標籤過濾
         
+        標籤索引為每個標籤維護依建立時間排序的條目列表，
+        取一頁只需合併各標籤列表直到取滿，不必取出並排序所有符合的條目。
+        
         Args:
             tags: 標籤列表
+            match: 多標籤組合方式，"any"（OR）或 "all"（AND）
+            exclude: 要排除的標籤（NOT）
+            limit: 最多回傳幾筆（None 代表全部）
+            offset: 略過前幾筆
             
         Returns:
-            符合的條目列表
+            符合的條目列表（按建立時間倒序）
+        """
+        tags, exclude = self._normalize_filter(tags, match, exclude)
+        return self._cached(
+            ("filter_by_tags", tuple(tags), match, tuple(exclude), limit, offset),
+            tuple(self._tag_generations.get(tag, 0) for tag in tags + exclude),
+            lambda: self._materialize(self._tag_index.page(
+                tags, match, exclude, reverse=True, offset=offset, limit=limit)))
+    
+    def filter_page(self, tags: List[str], match: str = "any",
+                    exclude: Optional[List[str]] = None,
+                    limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        """
+        以游標分頁按標籤過濾（按建立時間倒序）
+        
+        Args:
+            tags: 標籤列表
+            match: 多標籤組合方式，"any"（OR）或 "all"（AND）
+            exclude: 要排除的標籤（NOT）
+            limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor（None 代表第一頁）
             
-        TODO: 實作標籤過濾
-        - [ ] 支援單一標籤
-        - [ ] 支援多標籤組合（AND/OR）
+        Returns:
+            {"entries": 條目列表, "next_cursor": 下一頁游標（沒有下一頁時為 None）}
+            
+        Raises:
+            ValueError: 組合方式不支援或游標無效
         """
-        tags_lower = [tag.lower() for tag in tags]
-        results = []
+        tags, exclude = self._normalize_filter(tags, match, exclude)
+        after = self._decode_cursor(cursor) if cursor else None
+        entry_ids = self._tag_index.page(tags, match, exclude, reverse=True,
+                                         limit=limit + 1, after=after)
         
-        for entry in self.entries.values():
-            # 簡單實作：只要有任一標籤符合就回傳
-            if any(tag in entry["tags"] for tag in tags_lower):
-                results.append(entry)
+        has_more = len(entry_ids) > limit
+        entries = self._materialize(entry_ids[:limit])
+        next_cursor = None
+        if has_more:
+            last = entries[-1]
+            next_cursor = self._encode_cursor(last["created_at"], last["id"])
+        return {"entries": entries, "next_cursor": next_cursor}
+    
+    def _normalize_filter(self, tags: List[str], match: str,
+                          exclude: Optional[List[str]]) -> tuple:
+        """檢查組合方式、載入其他程序的異動並標準化標籤"""
+        if match not in ("any", "all"):
+            raise ValueError(f"不支援的組合方式: {match}")
+        self.refresh()
+        return (sorted({tag.lower() for tag in tags}),
+                sorted({tag.lower() for tag in exclude or []}))
+    
+    def query_tags(self, expression: str) -> List[Dict]:
+        """
+        以運算式查詢標籤
+        
+        Args:
+            expression: 例如 'python AND (教學 OR 進階) NOT javascript'，
+                        含空白的標籤用雙引號括住
+            
+        Returns:
+            符合的條目列表（按建立時間倒序）
+            
+        Raises:
+            ValueError: 運算式語法錯誤
+        """
+        self.refresh()
+        return self._cached(
+            ("query_tags", expression.strip()), self._tags_generation,
+            lambda: self._entries_by_newest(self._tag_index.query(expression, self.entries.keys())))
+    
+    def tag_counts(self) -> Dict[str, int]:
+        """
+        各標籤的條目數量
         
-        return results
+        Returns:
+            標籤 → 條目數量，依使用頻率由高到低排序
+        """
+        self.refresh()
+        return self._tag_index.counts()
+    
+    def _entries_by_newest(self, entry_ids) -> List[Dict]:
+        """將條目 ID 轉成條目列表，按建立時間倒序"""
+        entries = self._materialize(list(entry_ids))
+        entries.sort(key=lambda x: (x["created_at"], x["id"]), reverse=True)
+        return entries
     
-    def export(self, format: str = "markdown") -> str:
+    def export(self, format: str = "markdown", output_path: Optional[str] = None,
+               compress: bool = False) -> str:
         """
         匯出知識庫
         
+        條目逐筆寫入檔案，記憶體用量不隨知識庫大小成長。
+        
         Args:
-            format: 匯出格式 (markdown/json/html)
+            format: 匯出格式 (markdown/json/jsonl/html)
+            output_path: 輸出檔案路徑（預設為 knowledge_base_<時間>.<副檔名>）
+            compress: 是否以 gzip 壓縮（預設檔名會加上 .gz）
             
         Returns:
             匯出的檔案路徑
-            
-        TODO: 實作匯出功能
-        - [ ] Markdown 格式
-        - [ ] JSON 格式
-        - [ ] HTML 格式
-        """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format == "markdown":
-            return self._export_markdown(f"knowledge_base_{timestamp}.md")
-        elif format == "json":
-            return self._export_json(f"knowledge_base_{timestamp}.json")
-        elif format == "html":
-            return self._export_html(f"knowledge_base_{timestamp}.html")
-        else:
+        """
+        if format not in EXTENSIONS:
             raise ValueError(f"不支援的格式: {format}")
+        self.refresh()
+        
+        if output_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = f"knowledge_base_{timestamp}{EXTENSIONS[format]}"
+            if compress:
+                output_path += ".gz"
+        
+        return export_entries(self.entries.values(), len(self.entries), format,
+                              output_path, compress)
     
     def _export_markdown(self, filename: str) -> str:
         """匯出為 Markdown"""
-        content = f"# 知識庫匯出\n\n"
-        content += f"**匯出時間：** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        content += f"**總條目數：** {len(self.entries)}\n\n"
-        content += "---\n\n"
-        
-        for entry in self.entries.values():
-            content += f"## {entry['title']}\n\n"
-            content += f"**標籤：** {', '.join(entry['tags'])}\n"
-            content += f"**建立時間：** {entry['created_at']}\n"
-            content += f"**字數：** {entry['metadata']['word_count']}\n\n"
-            content += f"{entry['content']}\n\n"
-            content += "---\n\n"
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return filename
+        return self.export("markdown", filename)
     
     def _export_json(self, filename: str) -> str:
         """匯出為 JSON"""
-        data = {
-            "export_date": datetime.now().isoformat(),
-            "total_entries": len(self.entries),
-            "entries": list(self.entries.values())
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
-        return filename
+        return self.export("json", filename)
     
     def _export_html(self, filename: str) -> str:
         """匯出為 HTML"""
-        # TODO: 實作 HTML 匯出
-        raise NotImplementedError("HTML 匯出功能待實作")
+        return self.export("html", filename)
 
 
 def main():
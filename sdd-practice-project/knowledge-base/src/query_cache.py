@@ -0,0 +1,91 @@
+"""
+查詢結果快取
+
+以 OrderedDict 實作的 LRU 快取。每筆結果記錄它依賴的世代簽章（generation），
+取用時簽章不同就視為過期；知識庫異動時只需要遞增相關的世代計數，
+不必逐一找出並清除受影響的快取項目。
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """LRU 查詢結果快取"""
+
+    def __init__(self, capacity: int = 256):
+        """
+        初始化快取
+
+        Args:
+            capacity: 最多保留幾筆查詢結果（0 代表停用快取）
+
+        Raises:
+            ValueError: capacity 為負數
+        """
+        if capacity < 0:
+            raise ValueError(f"快取容量不可為負數: {capacity}")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Tuple[Hashable, Tuple]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, signature: Hashable) -> Optional[Tuple]:
+        """
+        取出快取的結果
+
+        Args:
+            key: 標準化後的查詢
+            signature: 查詢目前依賴的世代簽章
+
+        Returns:
+            快取的結果；沒有快取或已過期時為 None
+        """
+        item = self._items.get(key)
+        if item is not None and item[0] == signature:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+        if item is not None:
+            del self._items[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, signature: Hashable, value: Tuple):
+        """
+        存入查詢結果，超過容量時淘汰最久沒用到的項目
+
+        Args:
+            key: 標準化後的查詢
+            signature: 計算結果時的世代簽章
+            value: 查詢結果（不可變的 tuple）
+        """
+        if not self.capacity:
+            return
+        self._items[key] = (signature, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        """清空快取（統計數字保留）"""
+        self._items.clear()
+
+    def stats(self) -> Dict:
+        """
+        快取統計
+
+        Returns:
+            {"hits", "misses", "hit_rate", "size", "capacity"}
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._items),
+            "capacity": self.capacity,
+        }
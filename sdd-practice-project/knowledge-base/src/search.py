@@ -0,0 +1,763 @@
+"""
+知識庫搜尋功能
+
+這個模組提供知識庫的索引結構：
+- tokenize: 中英文混合斷詞（英文以單字、中日韓文字以單字 + 雙字 n-gram）
+- InvertedIndex: 倒排索引，支援增量更新、BM25 排序與模糊搜尋
+- TagIndex: 標籤 posting 索引，支援 AND/OR/NOT 查詢、標籤計數與前綴自動完成
+- SortedIndex: 以 bisect 維護的排序索引，支援分頁、游標與前綴查詢
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 中日韓文字（平假名/片假名、漢字、擴充區、相容漢字、韓文）
+_CJK_RANGES = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+_TOKEN_RE = re.compile(f"([{_CJK_RANGES}]+)|([0-9a-zÀ-ɏ]+)")
+_CJK_RE = re.compile(f"[{_CJK_RANGES}]")
+_WORD_RE = re.compile("[0-9a-zÀ-ɏ]+")
+
+
+def _cjk_ngrams(run: str) -> List[str]:
+    """中日韓文字段落的單字與雙字 n-gram"""
+    return list(run) + list(map(str.__add__, run, run[1:]))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    文件斷詞
+
+    英文（含數字）以連續字母為一個詞；中日韓文字沒有空白分隔，
+    所以同時產生單字與相鄰雙字，讓任意長度的中文片段都能被查到。
+
+    Args:
+        text: 原始文字
+
+    Returns:
+        小寫化後的詞彙列表（可重複）
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text.lower()):
+        if cjk:
+            tokens.extend(_cjk_ngrams(cjk))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    查詢斷詞
+
+    與 tokenize 不同，長度大於 1 的中文片段只取雙字 n-gram，
+    因為包含所有雙字的文件必然包含所有單字。
+
+    Args:
+        query: 查詢字串
+
+    Returns:
+        去重後的查詢詞彙
+    """
+    terms = []
+    for cjk, word in _TOKEN_RE.findall(query.lower()):
+        if cjk:
+            terms.extend(_cjk_ngrams(cjk) if len(cjk) == 1 else
+                         [cjk[i:i + 2] for i in range(len(cjk) - 1)])
+        else:
+            terms.append(word)
+    return list(dict.fromkeys(terms))
+
+
+def _words(text: str) -> Set[str]:
+    """文字中的英文詞彙（與 tokenize 產生的英文詞彙相同，但不產生中文 n-gram）"""
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def _is_word(term: str) -> bool:
+    """是否為英文詞彙（而非中日韓 n-gram）"""
+    return not _CJK_RE.match(term)
+
+
+def _trigrams(word: str) -> Set[str]:
+    """英文詞彙的字元三元組"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _padded_bigrams(word: str) -> Set[str]:
+    """英文詞彙前後加上邊界符號後的字元二元組（"py" → {"$p", "py", "y$"}）"""
+    padded = f"${word}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def top_k(scores: Dict[str, float], limit: Optional[int]) -> List[Tuple[str, float]]:
+    """
+    取出分數最高的 limit 筆
+
+    以 heapq 只保留前 k 名，成本為 O(N log k)，不必排序全部結果；
+    同分時 ID 較大（較新）的在前。
+
+    Args:
+        scores: 文件 ID → 分數
+        limit: 最多幾筆（None 代表全部）
+
+    Returns:
+        [(文件 ID, 分數)]，依分數由高到低
+    """
+    pairs = ((score, doc_id) for doc_id, score in scores.items())
+    ranked = sorted(pairs, reverse=True) if limit is None else heapq.nlargest(limit, pairs)
+    return [(doc_id, score) for score, doc_id in ranked]
+
+
+class InvertedIndex:
+    """
+    倒排索引
+
+    每個詞彙對應一份 posting list（文件 ID → 詞頻）。
+    英文詞彙另外維護「字元三元組 → 詞彙」索引，
+    讓部分單字（例如 "pyth"）也能快速展開成符合的完整詞彙；
+    以及「字元二元組 → 詞彙」索引，供模糊搜尋找出拼法相近的詞彙。
+    """
+
+    # BM25 參數
+    K1 = 1.2
+    B = 0.75
+
+    # 模糊搜尋：詞彙相似度（二元組 Dice 係數）下限，與前綴詞彙的相似度
+    WORD_SIMILARITY = 0.5
+    PREFIX_SIMILARITY = 0.9
+
+    def __init__(self):
+        """初始化空索引"""
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self._doc_terms: Dict[str, tuple] = {}
+        self._word_trigrams: Dict[str, Set[str]] = {}
+        self._word_bigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, title: str, content: str):
+        """
+        新增（或取代）一份文件
+
+        標題詞彙計兩次，讓標題命中的文件排序較前。
+
+        Args:
+            doc_id: 文件 ID
+            title: 標題
+            content: 內容
+        """
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        title_tokens = tokenize(title)
+        counts = Counter(tokenize(content))
+        counts.update(title_tokens)
+        counts.update(title_tokens)
+
+        for term, tf in counts.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if _is_word(term):
+                    for gram in _trigrams(term):
+                        self._word_trigrams.setdefault(gram, set()).add(term)
+                    for gram in _padded_bigrams(term):
+                        self._word_bigrams.setdefault(gram, set()).add(term)
+            posting[doc_id] = tf
+
+        length = sum(counts.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        self._doc_terms[doc_id] = tuple(counts)
+
+    def remove(self, doc_id: str):
+        """
+        移除一份文件
+
+        Args:
+            doc_id: 文件 ID
+        """
+        if doc_id not in self.doc_lengths:
+            return
+
+        for term in self._doc_terms.pop(doc_id):
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+                if _is_word(term):
+                    for grams, index in ((_trigrams(term), self._word_trigrams),
+                                         (_padded_bigrams(term), self._word_bigrams)):
+                        for gram in grams:
+                            words = index[gram]
+                            words.discard(term)
+                            if not words:
+                                del index[gram]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def expand(self, term: str) -> List[str]:
+        """
+        將查詢詞彙展開為索引中實際存在的詞彙
+
+        中文 n-gram 只做精確比對；英文詞彙展開成所有包含它的詞彙，
+        保持「部分匹配」的語意（"pyth" 可以找到 "python"）。
+
+        Args:
+            term: 查詢詞彙
+
+        Returns:
+            索引中存在的詞彙列表
+        """
+        if not _is_word(term):
+            return [term] if term in self.postings else []
+
+        if len(term) < 3:
+            words: Iterable[str] = (t for t in self.postings if _is_word(t))
+        else:
+            grams = sorted((self._word_trigrams.get(g, set()) for g in _trigrams(term)), key=len)
+            words = set.intersection(*grams) if grams[0] else set()
+        return [word for word in words if term in word]
+
+    def candidates(self, query: str) -> Optional[Set[str]]:
+        """
+        找出可能符合查詢的文件
+
+        每個查詢詞彙（展開後）都必須出現在文件中。
+        結果是超集合，呼叫者仍需比對原文確認。
+
+        Args:
+            query: 查詢字串
+
+        Returns:
+            候選文件 ID 集合；查詢中沒有可索引的詞彙時回傳 None
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+
+        result: Optional[Set[str]] = None
+        for term in terms:
+            docs: Set[str] = set()
+            for word in self.expand(term):
+                docs.update(self.postings[word])
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        return result
+
+    def exact(self, query: str) -> bool:
+        """
+        candidates(query) 是否恰好就是包含 query（不分大小寫）的文件，不必再比對原文
+
+        查詢本身就是單一詞彙時成立：英文詞彙展開成所有包含它的索引詞彙，
+        中文單字與雙字本身就是索引詞彙；標題與內容分開斷詞，不會跨欄位誤判。
+
+        Args:
+            query: 查詢字串
+
+        Returns:
+            候選結果是否精確
+        """
+        return query_terms(query) == [query.lower()]
+
+    def rank(self, query: str, doc_ids: Iterable[str], limit: Optional[int] = None) -> List[str]:
+        """
+        以 BM25 為文件排序
+
+        Args:
+            query: 查詢字串
+            doc_ids: 要排序的文件 ID
+            limit: 只取分數最高的幾筆（None 代表全部）
+
+        Returns:
+            依分數由高到低排序的文件 ID（同分保留原順序）
+        """
+        doc_ids = list(doc_ids)
+        if not doc_ids or not self.doc_lengths:
+            return doc_ids[:limit]
+
+        n = len(self.doc_lengths)
+        avg_length = self.total_length / n or 1
+        scores = dict.fromkeys(doc_ids, 0.0)
+
+        for term in query_terms(query):
+            for word in self.expand(term):
+                posting = self.postings[word]
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id in doc_ids:
+                    tf = posting.get(doc_id)
+                    if tf:
+                        norm = 1 - self.B + self.B * self.doc_lengths[doc_id] / avg_length
+                        scores[doc_id] += idf * tf * (self.K1 + 1) / (tf + self.K1 * norm)
+
+        if limit is not None:
+            return heapq.nsmallest(limit, doc_ids, key=lambda doc_id: -scores[doc_id])
+        return sorted(doc_ids, key=lambda doc_id: -scores[doc_id])
+
+    def similar_words(self, term: str) -> Dict[str, float]:
+        """
+        找出索引中與英文詞彙拼法相近的詞彙
+
+        相同詞彙相似度為 1；以 term 開頭的詞彙（輸入到一半）為 PREFIX_SIMILARITY；
+        其他詞彙以邊界二元組的 Dice 係數計算，至少 WORD_SIMILARITY 才算相近
+        （容許漏字、多字、相鄰字母對調等拼字錯誤）。
+
+        Args:
+            term: 小寫英文詞彙
+
+        Returns:
+            詞彙 → 相似度
+        """
+        grams = _padded_bigrams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._word_bigrams.get(gram, ()))
+        return self.score_similar(term, shared)
+
+    @classmethod
+    def score_similar(cls, term: str, shared: Dict[str, int]) -> Dict[str, float]:
+        """
+        依共同二元組數量計算相似度（similar_words 與 SQLite 後端共用）
+
+        Args:
+            term: 小寫英文詞彙
+            shared: 候選詞彙 → 與 term 共同的邊界二元組數量
+
+        Returns:
+            相似度達到 WORD_SIMILARITY 的詞彙 → 相似度
+        """
+        size = len(_padded_bigrams(term))
+        # Dice ≥ s 代表 2 × 共同數 ≥ s × |查詢二元組|，先以此排除大部分詞彙
+        minimum = cls.WORD_SIMILARITY * size / 2
+        similar = {}
+        for word, count in shared.items():
+            if count < minimum:
+                continue
+            if word == term:
+                similar[word] = 1.0
+            elif word.startswith(term):
+                similar[word] = cls.PREFIX_SIMILARITY
+            else:
+                dice = 2 * count / (size + len(_padded_bigrams(word)))
+                if dice >= cls.WORD_SIMILARITY:
+                    similar[word] = dice
+        return similar
+
+    def fuzzy(self, query: str, limit: Optional[int] = 10,
+              min_score: float = 0.3) -> List[Tuple[str, float]]:
+        """
+        模糊搜尋
+
+        查詢以 tokenize 拆成比對單位：每個英文詞彙、每個中文單字與雙字各為一個單位。
+        英文單位可以比對到拼法相近的詞彙（見 similar_words），中文單位需完全相同，
+        文件命中的單字與雙字越多分數越高，因此片語不完整、順序不同或有錯字也找得到。
+
+        文件分數 = Σ(單位 idf × 最佳相似度) / Σ(單位 idf)，介於 0～1。
+        找不到任何文件的單位（例如錯字）同樣計入分母，權重取有命中單位的最大 idf，
+        避免錯字因為 idf 極高而把所有文件的分數壓到門檻以下。
+
+        Args:
+            query: 查詢字串
+            limit: 最多回傳幾筆（None 代表全部）
+            min_score: 分數下限
+
+        Returns:
+            [(文件 ID, 分數)]，依分數由高到低
+        """
+        n = len(self.doc_lengths)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not n:
+            return []
+
+        scores: Dict[str, float] = defaultdict(float)
+        weights = []
+        unmatched = 0
+        for term in terms:
+            if _is_word(term):
+                matches = self.similar_words(term)
+            else:
+                matches = {term: 1.0} if term in self.postings else {}
+
+            best: Dict[str, float] = {}
+            for word, similarity in matches.items():
+                for doc_id in self.postings[word]:
+                    if similarity > best.get(doc_id, 0.0):
+                        best[doc_id] = similarity
+
+            if not best:
+                unmatched += 1
+                continue
+            weight = math.log(1 + (n - len(best) + 0.5) / (len(best) + 0.5))
+            weights.append(weight)
+            for doc_id, similarity in best.items():
+                scores[doc_id] += weight * similarity
+
+        if not weights:
+            return []
+        total_weight = sum(weights) + unmatched * max(weights)
+        normalized = {doc_id: score / total_weight for doc_id, score in scores.items()
+                      if score / total_weight >= min_score}
+        return top_k(normalized, limit)
+
+
+class SortedIndex:
+    """
+    排序索引
+
+    以 bisect 維護一份依 (鍵值, ID) 排序的列表，
+    新增／刪除為一次二分搜尋加一次列表插入，
+    取一頁資料只需 O(log N + 頁面大小)，不必每次重新排序。
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        self._keys: List[Tuple[str, str]] = []
+        self._key_of: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, doc_id: str, key: str):
+        """
+        新增（或更新）一筆文件的排序鍵
+
+        Args:
+            doc_id: 文件 ID
+            key: 排序鍵
+        """
+        old_key = self._key_of.get(doc_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.remove(doc_id)
+        bisect.insort(self._keys, (key, doc_id))
+        self._key_of[doc_id] = key
+
+    def remove(self, doc_id: str):
+        """
+        移除一筆文件
+
+        Args:
+            doc_id: 文件 ID
+        """
+        key = self._key_of.pop(doc_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, (key, doc_id))]
+
+    def page(self, reverse: bool = False, offset: int = 0, limit: Optional[int] = None,
+             after: Optional[Tuple[str, str]] = None) -> List[str]:
+        """
+        取出一頁文件 ID
+
+        Args:
+            reverse: 是否由大到小
+            offset: 略過前幾筆
+            limit: 最多幾筆（None 代表全部）
+            after: 游標，從這個 (鍵值, ID) 之後開始（不含）
+
+        Returns:
+            文件 ID 列表
+        """
+        keys = self._keys
+        if reverse:
+            end = len(keys) if after is None else bisect.bisect_left(keys, tuple(after))
+            stop = end - offset
+            start = 0 if limit is None else max(0, stop - limit)
+            return [doc_id for _, doc_id in reversed(keys[start:max(stop, 0)])]
+
+        begin = 0 if after is None else bisect.bisect_right(keys, tuple(after))
+        start = begin + offset
+        stop = None if limit is None else start + limit
+        return [doc_id for _, doc_id in keys[start:stop]]
+
+    def key(self, doc_id: str) -> Optional[str]:
+        """取得文件目前的排序鍵"""
+        return self._key_of.get(doc_id)
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """
+        取出排序鍵以 prefix 開頭的文件 ID（依排序鍵順序）
+
+        Args:
+            prefix: 鍵值前綴
+            limit: 最多幾筆（None 代表全部）
+
+        Returns:
+            文件 ID 列表
+        """
+        keys = self._keys
+        result = []
+        for i in range(bisect.bisect_left(keys, (prefix,)), len(keys)):
+            key, doc_id = keys[i]
+            if not key.startswith(prefix) or len(result) == limit:
+                break
+            result.append(doc_id)
+        return result
+
+
+_TAG_QUERY_RE = re.compile(r'\s*(?:"([^"]*)"|(\()|(\))|([^\s()"]+))')
+
+
+class TagIndex:
+    """
+    標籤索引
+
+    每個標籤對應一個條目 ID 集合，查詢時直接做集合運算：
+    AND 取交集、OR 取聯集、NOT 取差集。
+    集合大小即為該標籤的條目數量，不需另外計算。
+
+    每個標籤另外以 bisect 維護依 (排序鍵, ID) 排序的列表，
+    分頁時合併各標籤的列表，取一頁不必把所有符合的條目排序。
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        self.postings: Dict[str, Set[str]] = {}
+        self._ordered: Dict[str, List[Tuple[str, str]]] = {}
+        self._sorted_tags: List[str] = []
+
+    def add(self, doc_id: str, tags: Iterable[str], key: str = ""):
+        """
+        登錄條目的標籤
+
+        Args:
+            doc_id: 條目 ID
+            tags: 已標準化的標籤
+            key: 分頁用的排序鍵（知識庫傳入建立時間）
+        """
+        for tag in tags:
+            docs = self.postings.get(tag)
+            if docs is None:
+                docs = self.postings[tag] = set()
+                self._ordered[tag] = []
+                bisect.insort(self._sorted_tags, tag)
+            if doc_id not in docs:
+                docs.add(doc_id)
+                bisect.insort(self._ordered[tag], (key, doc_id))
+
+    def remove(self, doc_id: str, tags: Iterable[str], key: str = ""):
+        """
+        移除條目的標籤
+
+        Args:
+            doc_id: 條目 ID
+            tags: 條目原本的標籤
+            key: 登錄時的排序鍵
+        """
+        for tag in tags:
+            docs = self.postings.get(tag)
+            if docs is not None and doc_id in docs:
+                docs.discard(doc_id)
+                ordered = self._ordered[tag]
+                del ordered[bisect.bisect_left(ordered, (key, doc_id))]
+                if not docs:
+                    del self.postings[tag]
+                    del self._ordered[tag]
+                    del self._sorted_tags[bisect.bisect_left(self._sorted_tags, tag)]
+
+    def get(self, tag: str) -> Set[str]:
+        """取得擁有某標籤的條目 ID（唯讀，請勿修改）"""
+        return self.postings.get(tag, set())
+
+    def page(self, tags: List[str], match: str = "any", exclude: Iterable[str] = (),
+             reverse: bool = False, offset: int = 0, limit: Optional[int] = None,
+             after: Optional[Tuple[str, str]] = None) -> List[str]:
+        """
+        依 (排序鍵, ID) 順序取出一頁符合標籤條件的條目 ID
+
+        "all" 沿著最短的標籤列表逐筆檢查其他標籤；"any" 以 heapq.merge 合併各標籤的列表。
+        兩者都在取滿一頁時停止，不必產生或排序全部結果。
+
+        Args:
+            tags: 已標準化的標籤
+            match: "any"（OR）或 "all"（AND）
+            exclude: 要排除的標籤
+            reverse: 是否由大到小
+            offset: 略過前幾筆
+            limit: 最多幾筆（None 代表全部）
+            after: 游標，從這個 (排序鍵, ID) 之後開始（不含）
+
+        Returns:
+            條目 ID 列表
+        """
+        lists = [self._ordered.get(tag, []) for tag in tags]
+        excluded = [self.get(tag) for tag in exclude]
+        if not lists:
+            return []
+        if match == "all":
+            lists.sort(key=len)
+            required = [self.get(tag) for tag in tags]
+            items = (item for item in self._walk(lists[0], reverse, after)
+                     if all(item[1] in docs for docs in required))
+        else:
+            merged = heapq.merge(*(self._walk(ordered, reverse, after) for ordered in lists),
+                                 reverse=reverse)
+            # 同一條目出現在多個標籤時會相鄰，只保留第一次
+            items = (item for item, _ in itertools.groupby(merged))
+        if excluded:
+            items = (item for item in items if not any(item[1] in docs for docs in excluded))
+        stop = None if limit is None else offset + limit
+        return [doc_id for _, doc_id in itertools.islice(items, offset, stop)]
+
+    @staticmethod
+    def _walk(ordered: List[Tuple[str, str]], reverse: bool,
+              after: Optional[Tuple[str, str]]) -> Iterable[Tuple[str, str]]:
+        """從游標之後依序走訪一個標籤的排序列表"""
+        if reverse:
+            end = len(ordered) if after is None else bisect.bisect_left(ordered, tuple(after))
+            return (ordered[i] for i in range(end - 1, -1, -1))
+        begin = 0 if after is None else bisect.bisect_right(ordered, tuple(after))
+        return itertools.islice(ordered, begin, None)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        各標籤的條目數量
+
+        Returns:
+            標籤 → 條目數量，依數量由多到少排序
+        """
+        return dict(sorted(((tag, len(docs)) for tag, docs in self.postings.items()),
+                           key=lambda item: (-item[1], item[0])))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        標籤前綴自動完成
+
+        以 bisect 找出以 prefix 開頭的標籤，再以 heapq 取出最常用的 limit 個。
+
+        Args:
+            prefix: 已標準化（小寫）的前綴
+            limit: 最多幾個
+
+        Returns:
+            [(標籤, 條目數量)]，依數量由多到少
+        """
+        tags = self._sorted_tags
+        matches = []
+        for i in range(bisect.bisect_left(tags, prefix), len(tags)):
+            if not tags[i].startswith(prefix):
+                break
+            matches.append((tags[i], len(self.postings[tags[i]])))
+        return heapq.nsmallest(limit, matches, key=lambda item: (-item[1], item[0]))
+
+    def query(self, expression: str, universe: Iterable[str]) -> Set[str]:
+        """
+        執行標籤查詢運算式
+
+        語法：
+        - 標籤名稱；含空白的標籤用雙引號括住，例如 "user story"
+        - AND、OR、NOT（大寫）與括號；相鄰的標籤視為 AND
+        - 優先順序：NOT > AND > OR
+
+        範例：python AND (教學 OR 進階) NOT javascript
+
+        Args:
+            expression: 查詢運算式（標籤不區分大小寫）
+            universe: 所有條目 ID（只有單獨使用 NOT 時才需要）
+
+        Returns:
+            符合的條目 ID 集合
+
+        Raises:
+            ValueError: 運算式語法錯誤
+        """
+        return _TagQueryParser(self._lex(expression), self, universe).parse()
+
+    @staticmethod
+    def _lex(expression: str) -> List[tuple]:
+        """將運算式切成 (種類, 值) 的 token"""
+        tokens = []
+        pos = 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            match = _TAG_QUERY_RE.match(expression, pos)
+            if match is None:
+                raise ValueError(f"無效的標籤查詢: {expression}")
+            quoted, lparen, rparen, word = match.groups()
+            if quoted is not None:
+                tokens.append(("tag", quoted.lower()))
+            elif lparen:
+                tokens.append(("(", lparen))
+            elif rparen:
+                tokens.append((")", rparen))
+            elif word in ("AND", "OR", "NOT"):
+                tokens.append((word, word))
+            else:
+                tokens.append(("tag", word.lower()))
+            pos = match.end()
+        return tokens
+
+
+class _TagQueryParser:
+    """標籤查詢運算式的遞迴下降剖析器（剖析同時求值）"""
+
+    def __init__(self, tokens: List[tuple], index: TagIndex, universe: Iterable[str]):
+        self.tokens = tokens
+        self.pos = 0
+        self.index = index
+        self.universe = universe
+
+    def parse(self) -> Set[str]:
+        if not self.tokens:
+            raise ValueError("標籤查詢不可為空")
+        result = self._or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"標籤查詢語法錯誤：多餘的 '{self.tokens[self.pos][1]}'")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _or(self) -> Set[str]:
+        result = self._and()
+        while self._peek() == "OR":
+            self.pos += 1
+            result = result | self._and()
+        return result
+
+    def _and(self) -> Set[str]:
+        # 先收集正向與 NOT 運算元，最後才做差集，避免不必要地展開全集
+        include: List[Set[str]] = []
+        exclude: List[Set[str]] = []
+        while True:
+            if self._peek() == "NOT":
+                self.pos += 1
+                exclude.append(self._atom())
+            else:
+                include.append(self._atom())
+            if self._peek() == "AND":
+                self.pos += 1
+            elif self._peek() not in ("tag", "(", "NOT"):
+                break
+
+        if include:
+            include.sort(key=len)
+            result = set(include[0]).intersection(*include[1:])
+        else:
+            result = set(self.universe)
+        return result.difference(*exclude)
+
+    def _atom(self) -> Set[str]:
+        kind = self._peek()
+        if kind == "tag":
+            tag = self.tokens[self.pos][1]
+            self.pos += 1
+            return self.index.get(tag)
+        if kind == "(":
+            self.pos += 1
+            result = self._or()
+            if self._peek() != ")":
+                raise ValueError("標籤查詢語法錯誤：缺少右括號")
+            self.pos += 1
+            return result
+        found = self.tokens[self.pos][1] if kind else "結尾"
+        raise ValueError(f"標籤查詢語法錯誤：非預期的 '{found}'")
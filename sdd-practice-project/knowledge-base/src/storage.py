@@ -0,0 +1,1273 @@
+"""
+知識庫儲存層
+
+這個模組提供知識庫的持久化後端：
+- StorageBackend: 儲存後端介面
+- JsonStorage: 單一 JSON 快照檔，可選擇搭配異動日誌（write-ahead log）
+- SQLiteStorage: SQLite 資料庫（WAL 模式、FTS5 全文索引、標籤關聯表）
+- migrate_json_to_sqlite: 將 JSON 知識庫一次轉換為 SQLite
+
+日誌模式下，每次新增／更新／刪除只需在日誌檔尾端追加一行，
+不必重寫整份快照；日誌累積到一定筆數後再壓縮回快照檔。
+
+共用模式（shared=True）讓多個程序同時開啟同一份 JSON 知識庫：
+寫入時持有 <快照檔>.lock 的獨占鎖，並先載入其他程序的異動再寫入。
+
+區段檔模式（split_content=True）把快照拆成兩個檔案：只含中繼資料的快照檔，
+以及存放所有條目內容的區段檔（以 mmap 開啟、依位移讀取），
+開啟知識庫的時間與記憶體用量只和中繼資料大小有關。
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from entry_store import ContentSegment, EntryStore
+from search import InvertedIndex, TagIndex, _is_word, _padded_bigrams, _words, query_terms
+
+try:
+    import fcntl
+except ImportError:  # Windows 沒有 fcntl，無法使用共用模式
+    fcntl = None
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# 區段檔模式快照檔的 layout 欄位
+SPLIT_LAYOUT = "split"
+
+
+@contextmanager
+def _atomic_write(path: Path):
+    """
+    原子性地寫出檔案
+
+    先寫到同目錄的暫存檔並 fsync，再用 os.replace 覆蓋正式檔案，
+    避免程序中斷時留下寫到一半的檔案。
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(path: Path, entries: Mapping):
+    """
+    原子性地寫出快照檔
+
+    條目逐筆寫出（格式與 json.dump(..., indent=2) 相同），不需要先組成一個大 dict。
+
+    Args:
+        path: 快照檔路徑
+        entries: 要寫出的所有條目（ID → 條目）
+    """
+    with _atomic_write(path) as f:
+        separator = "{\n"
+        for entry_id, entry in entries.items():
+            f.write(separator)
+            text = json.dumps(entry, ensure_ascii=False, indent=2)
+            f.write(f"  {json.dumps(entry_id, ensure_ascii=False)}: {text.replace(chr(10), chr(10) + '  ')}")
+            separator = ",\n"
+        f.write("\n}" if separator != "{\n" else "{}")
+
+
+def write_split_metadata(path: Path, entries: EntryStore, segment_name: str, generation: int):
+    """
+    原子性地寫出區段檔模式的快照檔（只含中繼資料）
+
+    格式：
+        {"layout": "split", "generation": 1, "segment": "<區段檔名>", "entries": {
+        "kb_...": {"id": ..., "title": ..., "content_span": [位移, 長度], ...},
+        ...
+        }}
+
+    Args:
+        path: 快照檔路徑
+        entries: 所有條目（內容已寫入區段檔）
+        segment_name: 區段檔名（與快照檔在同一目錄）
+        generation: 區段檔世代，每次整份重寫區段檔時遞增
+    """
+    with _atomic_write(path) as f:
+        head = json.dumps({"layout": SPLIT_LAYOUT, "generation": generation,
+                           "segment": segment_name}, ensure_ascii=False)
+        f.write(head[:-1] + ', "entries": {')
+        separator = "\n"
+        for entry_id in entries:
+            f.write(separator)
+            f.write(json.dumps(entry_id, ensure_ascii=False) + ": " +
+                    json.dumps(entries.header(entry_id), ensure_ascii=False))
+            separator = ",\n"
+        f.write("\n}}\n")
+
+
+def apply_record(entries: Dict, record: Dict):
+    """
+    將一筆日誌紀錄套用到條目字典
+
+    Args:
+        entries: 條目字典（會被直接修改）
+        record: 日誌紀錄 {"op": "put"/"delete", "id": ..., "entry": ...}
+    """
+    if record["op"] == "put":
+        entries[record["id"]] = record["entry"]
+    elif record["op"] == "delete":
+        entries.pop(record["id"], None)
+
+
+class EntryJournal:
+    """
+    條目異動日誌
+
+    每筆異動以一行 JSON 追加到日誌檔：
+
+        {"op": "put", "id": "kb_...", "entry": {...}}
+        {"op": "delete", "id": "kb_..."}
+
+    每次追加都會寫入作業系統緩衝區，但只有累積 fsync_every 筆
+    （或呼叫 sync）時才執行 fsync，讓寫入成本分攤為 O(1)。
+    """
+
+    def __init__(self, path: Path, fsync_every: int = 64):
+        """
+        初始化日誌
+
+        Args:
+            path: 日誌檔路徑
+            fsync_every: 每累積多少筆異動執行一次 fsync
+        """
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.size = 0      # 自上次壓縮以來的紀錄筆數
+        self.pending = 0   # 尚未 fsync 的紀錄筆數
+        self.offset = 0    # 已重播或寫入到的位元組位置
+        self.inode = None  # 目前日誌檔的 inode，用來偵測日誌被其他程序重建
+        self._file = None
+
+    def append(self, op: str, entry_id: str, entry: Optional[Dict] = None):
+        """
+        追加一筆異動紀錄
+
+        Args:
+            op: 異動類型（put/delete）
+            entry_id: 條目 ID
+            entry: 條目完整內容（put 時需要）
+        """
+        record = {"op": op, "id": entry_id}
+        if entry is not None:
+            record["entry"] = entry
+
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self.inode = os.fstat(self._file.fileno()).st_ino
+        self._file.write(line)
+        self._file.flush()
+
+        self.offset += len(line)
+        self.size += 1
+        self.pending += 1
+        if self.pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """將尚未 fsync 的紀錄寫入磁碟"""
+        if self._file is not None and self.pending:
+            os.fsync(self._file.fileno())
+        self.pending = 0
+
+    def rewind(self):
+        """讓下一次 replay 從檔頭開始重播"""
+        self.close()
+        self.offset = 0
+        self.size = 0
+        self.inode = None
+
+    def replay(self, entries: Dict, changes: Optional[List] = None) -> int:
+        """
+        從上次讀到的位置重播日誌到條目字典
+
+        第一次呼叫會重播整份日誌；之後只讀取其他程序新追加的紀錄。
+        最後一行若不完整（寫入途中程序中斷），會被截掉，
+        避免之後追加的紀錄接在殘缺的行尾。
+
+        Args:
+            entries: 條目字典（會被直接修改）
+            changes: 若提供，每套用一筆紀錄就追加 (條目 ID, 套用前的條目)
+
+        Returns:
+            這次套用的紀錄筆數
+        """
+        count = 0
+        if not self.path.exists():
+            return 0
+
+        with open(self.path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            file_size = os.fstat(f.fileno()).st_size
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                if changes is not None:
+                    changes.append((record["id"], entries.get(record["id"])))
+                apply_record(entries, record)
+                count += 1
+                self.offset += len(line)
+
+        if self.offset < file_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self.offset)
+
+        self.size += count
+        return count
+
+    def reset(self):
+        """快照壓縮完成後清空日誌"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+        self.size = 0
+        self.offset = 0
+        self.inode = None
+
+    def close(self):
+        """fsync 並關閉日誌檔"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class StorageBackend:
+    """
+    儲存後端介面
+
+    load() 回傳的條目映射由後端持有，知識庫只讀取它；
+    所有寫入都透過 put() / remove()，由後端決定如何持久化。
+
+    後端若能自行回答查詢（例如 SQLite 的全文索引），
+    可覆寫 search_index() / tag_index() / sorted_index()；
+    回傳 None 代表由知識庫在記憶體中建立索引。
+
+    多個程序共用同一份資料時，知識庫在 locked() 區塊內寫入，
+    並透過 refresh() 取得其他程序的異動來更新記憶體索引。
+    """
+
+    path: Path
+    _batch_depth = 0
+
+    def load(self) -> Mapping:
+        """
+        載入並回傳條目映射（ID → 條目）
+
+        映射另需提供 texts(ID 列表) → (ID, 標題, 內容) 的迭代器，
+        供搜尋比對原文時不必還原整個條目。
+        """
+        raise NotImplementedError
+
+    def put(self, entry_id: str, entry: Dict):
+        """新增或取代一筆條目"""
+        raise NotImplementedError
+
+    def remove(self, entry_id: str):
+        """刪除一筆條目"""
+        raise NotImplementedError
+
+    @contextmanager
+    def batch(self):
+        """
+        批次寫入
+
+        區塊內的 put() / remove() 只更新記憶體或暫存，
+        離開區塊時才一次持久化（可巢狀，以最外層為準）。
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._end_batch()
+
+    def _end_batch(self):
+        """批次結束時的持久化動作"""
+        self.flush()
+
+    @contextmanager
+    def locked(self):
+        """
+        跨程序的寫入鎖（可巢狀，以最外層為準）
+
+        產出 True 代表這一層剛取得鎖，呼叫者應先 refresh() 再寫入；
+        不需要額外同步的後端產出 False。
+        """
+        yield False
+
+    def refresh(self) -> List[Tuple[str, Optional[Dict]]]:
+        """
+        載入其他程序寫入的異動
+
+        Returns:
+            [(條目 ID, 異動前的條目)]，異動前不存在時為 None
+        """
+        return []
+
+    def data_version(self):
+        """
+        其他連線寫入時會改變的值，供查詢快取判斷結果是否過期
+
+        異動都經由 refresh() 載入的後端回傳 None。
+        """
+        return None
+
+    def compact(self):
+        """整理儲存空間（預設不需要）"""
+
+    def flush(self):
+        """確保已寫入的異動都落到磁碟"""
+
+    def close(self):
+        """釋放資源"""
+
+    def search_index(self):
+        """後端提供的全文索引，None 代表由知識庫自行建立"""
+        return None
+
+    def tag_index(self):
+        """後端提供的標籤索引，None 代表由知識庫自行建立"""
+        return None
+
+    def sorted_index(self, field: str):
+        """後端提供的排序索引，None 代表由知識庫自行建立"""
+        return None
+
+
+class JsonStorage(StorageBackend):
+    """
+    JSON 快照儲存
+
+    預設每次異動都重寫整份快照；啟用日誌模式後，
+    異動改為追加到 <快照檔>.journal，累積 compact_every 筆再壓縮回快照。
+
+    共用模式下，寫入期間持有 <快照檔>.lock 的獨占鎖（fcntl.flock），
+    讀取前以 stat 檢查快照與日誌：快照沒變時只重播日誌新增的部分，
+    快照被改寫時才整份重新載入。搭配日誌模式時重新載入的成本最低。
+
+    條目以 EntryStore 保存在記憶體中（__slots__ 物件、整數時間、共用標籤），
+    讀取時才還原成 dict。
+
+    區段檔模式下，壓縮時把新寫入的內容追加到 <快照檔>.content.<世代> 尾端，
+    再寫出只含中繼資料的快照檔；區段檔中失效的位元組超過一半時才整份重寫。
+    """
+
+    def __init__(self, path, journal: bool = False, fsync_every: int = 64,
+                 compact_every: int = 1000, shared: bool = False,
+                 split_content: Optional[bool] = None):
+        """
+        初始化 JSON 儲存
+
+        Args:
+            path: 快照檔路徑
+            journal: 是否啟用日誌模式
+            fsync_every: 日誌模式下每累積多少筆異動執行一次 fsync
+            compact_every: 日誌模式下累積多少筆異動後壓縮回快照
+            shared: 是否與其他程序共用同一份知識庫
+            split_content: 是否把條目內容存到獨立的區段檔
+                           （None 代表沿用現有快照的格式，新知識庫預設不拆分）
+
+        Raises:
+            RuntimeError: 平台不支援 fcntl 卻要求共用模式
+        """
+        if shared and fcntl is None:
+            raise RuntimeError("此平台不支援 fcntl 檔案鎖，無法使用共用模式")
+        self.path = Path(path)
+        self.journal_enabled = journal
+        self.compact_every = compact_every
+        self.shared = shared
+        self.split_content = split_content
+        self.journal = EntryJournal(self.path.with_name(self.path.name + ".journal"), fsync_every)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.entries = EntryStore()
+        self._dirty = False
+        self._lock_file = None
+        self._lock_depth = 0
+        self._snapshot_signature = None
+        self._segment_generation = 0
+
+    def load(self) -> EntryStore:
+        """載入快照並重播日誌"""
+        with self.locked():
+            self.entries = self._read_state()
+            is_split = self.entries.segment is not None
+            if self.split_content is None:
+                self.split_content = is_split
+            if not self.path.exists():
+                self.compact()
+            elif self.journal.size and not self.journal_enabled:
+                # 非日誌模式開啟了留有日誌的資料庫：直接併入快照
+                self.compact()
+            elif self.split_content != is_split:
+                # 指定的格式與現有快照不同：立即轉換
+                self.compact()
+        return self.entries
+
+    def _read_state(self) -> EntryStore:
+        """從頭讀入快照並重播整份日誌"""
+        entries = EntryStore()
+        self._snapshot_signature = self._snapshot_stat()
+        if self._snapshot_signature is not None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if raw.get("layout") == SPLIT_LAYOUT:
+                self._segment_generation = raw["generation"]
+                entries.segment = ContentSegment(self.path.with_name(raw["segment"]))
+                raw = raw["entries"]
+                load = entries.load_header
+            else:
+                load = entries.__setitem__
+            # 邊轉換邊釋放原始 dict，避免兩份資料同時佔用記憶體
+            for entry_id in list(raw):
+                load(entry_id, raw.pop(entry_id))
+        self.journal.rewind()
+        self.journal.replay(entries)
+        return entries
+
+    def _snapshot_stat(self) -> Optional[Tuple[int, int, int]]:
+        """快照檔的 (inode, 修改時間, 大小)；快照以 os.replace 改寫，inode 一定會變"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @contextmanager
+    def locked(self):
+        if not self.shared:
+            yield False
+            return
+        acquired = self._lock_depth == 0
+        if acquired:
+            self._acquire(fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield acquired
+        finally:
+            self._lock_depth -= 1
+            if acquired:
+                self._release()
+
+    def _acquire(self, mode: int):
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'a+b')
+        fcntl.flock(self._lock_file.fileno(), mode)
+
+    def _release(self):
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def refresh(self) -> List[Tuple[str, Optional[Dict]]]:
+        """
+        載入其他程序寫入的異動
+
+        快照與日誌都沒被重建時，只重播日誌尾端新增的紀錄；
+        其他程序壓縮過（快照改寫、日誌重建）才整份重新載入。
+        """
+        if not self.shared:
+            return []
+        held = self._lock_depth > 0
+        if not held:
+            self._acquire(fcntl.LOCK_SH)
+        try:
+            try:
+                journal_inode = os.stat(self.journal.path).st_ino
+            except FileNotFoundError:
+                journal_inode = None
+            rebuilt = self.journal.inode is not None and journal_inode != self.journal.inode
+            if rebuilt or self._snapshot_stat() != self._snapshot_signature:
+                return self._reload()
+            changes = []
+            self.journal.replay(self.entries, changes)
+            return changes
+        finally:
+            if not held:
+                self._release()
+
+    def _reload(self) -> List[Tuple[str, Optional[Dict]]]:
+        """整份重新載入，並就地更新條目字典（知識庫持有同一個字典）"""
+        old = self.entries
+        new = self._read_state()
+        changes = [(entry_id, old[entry_id]) for entry_id in old
+                   if not old.same_entry(entry_id, new)]
+        changes.extend((entry_id, None) for entry_id in new if entry_id not in old)
+        old.replace_with(new)
+        return changes
+
+    def put(self, entry_id: str, entry: Dict):
+        self.entries[entry_id] = entry
+        self._record("put", entry_id, entry)
+
+    def remove(self, entry_id: str):
+        self.entries.pop(entry_id, None)
+        self._record("delete", entry_id)
+
+    def _record(self, op: str, entry_id: str, entry: Optional[Dict] = None):
+        """日誌模式只追加一行日誌，否則整份重寫快照（批次中延後到結束時）"""
+        if not self.journal_enabled:
+            if self._batch_depth:
+                self._dirty = True
+            else:
+                self.compact()
+            return
+        self.journal.append(op, entry_id, entry)
+        if not self._batch_depth and self.journal.size >= self.compact_every:
+            self.compact()
+
+    def _end_batch(self):
+        if self.journal_enabled:
+            self.journal.sync()
+            if self.journal.size >= self.compact_every:
+                self.compact()
+        elif self._dirty:
+            self.compact()
+
+    def compact(self):
+        """將目前狀態寫成快照並清空日誌"""
+        with self.locked():
+            if self.split_content:
+                self._write_split_snapshot()
+            else:
+                write_snapshot(self.path, self.entries)
+                self._drop_segment()
+            self.journal.reset()
+            self._snapshot_signature = self._snapshot_stat()
+        self._dirty = False
+
+    def _write_split_snapshot(self):
+        """
+        寫出區段檔模式的快照
+
+        先把內容寫進區段檔並 fsync，再原子性地替換快照檔，
+        中途中斷時舊快照與它參照的區段內容仍然完整。
+        """
+        entries = self.entries
+        segment = entries.segment
+        rewrite = segment is None or segment.size > 2 * entries.live_bytes()
+        if rewrite:
+            self._segment_generation += 1
+            segment_path = self.path.with_name(
+                f"{self.path.name}.content.{self._segment_generation}")
+            entry_ids = entries.segment_ids()
+        else:
+            segment_path = segment.path
+            entry_ids = entries.inline_ids()
+
+        spans = {}
+        with open(segment_path, 'wb' if rewrite else 'ab') as f:
+            offset = os.fstat(f.fileno()).st_size
+            for entry_id in entry_ids:
+                data = entries.content_bytes(entry_id)
+                f.write(data)
+                spans[entry_id] = (offset, len(data))
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        entries.attach_segment(ContentSegment(segment_path), spans)
+        write_split_metadata(self.path, entries, segment_path.name, self._segment_generation)
+        if rewrite and segment is not None:
+            self._unlink_segment(segment.path)
+
+    def _drop_segment(self):
+        """改回單一快照檔後，將內容讀回記憶體並刪除區段檔"""
+        segment = self.entries.segment
+        if segment is None:
+            return
+        for entry_id in self.entries.segment_ids():
+            self.entries[entry_id] = self.entries[entry_id]
+        self.entries.close()
+        self._unlink_segment(segment.path)
+
+    @staticmethod
+    def _unlink_segment(path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            # 其他程序仍映射著舊區段檔時（Windows）無法刪除，留待下次重寫
+            pass
+
+    def flush(self):
+        self.journal.sync()
+
+    def close(self):
+        self.journal.close()
+        self.entries.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+# title_prefix 是前綴自動完成用的小寫標題索引
+_SORT_COLUMNS = {"created_at": "created_at", "updated_at": "updated_at", "title": "title",
+                 "title_prefix": "lower(title)"}
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge_base (
+    doc_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    word_count INTEGER,
+    read_time INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_created_at ON knowledge_base(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_updated_at ON knowledge_base(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_title ON knowledge_base(title, id);
+CREATE INDEX IF NOT EXISTS idx_title_lower ON knowledge_base(lower(title), id);
+
+CREATE TABLE IF NOT EXISTS entry_tags (
+    tag TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (tag, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entry_tags_entry ON entry_tags(entry_id);
+"""
+
+# 每個標籤的條目依建立時間排序，標籤過濾分頁只需讀取索引的一段
+# （舊資料庫要先補上 created_at 欄位才能建立，因此與主結構分開）
+_SQLITE_TAG_ORDER_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_entry_tags_created ON entry_tags(tag, created_at, entry_id);
+"""
+
+# 英文詞彙表與邊界二元組，模糊搜尋以此找出拼法相近的詞彙（同 InvertedIndex.similar_words）
+_SQLITE_VOCABULARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entry_words (
+    word TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    PRIMARY KEY (word, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entry_words_entry ON entry_words(entry_id);
+
+CREATE TABLE IF NOT EXISTS word_bigrams (
+    gram TEXT NOT NULL,
+    word TEXT NOT NULL,
+    PRIMARY KEY (gram, word)
+) WITHOUT ROWID;
+"""
+
+# 外部內容 FTS5 表，以觸發器與主表同步；trigram 斷詞支援任意子字串比對
+_SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_base_fts USING fts5(
+    title, content, content='knowledge_base', content_rowid='doc_id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS knowledge_base_ai AFTER INSERT ON knowledge_base BEGIN
+    INSERT INTO knowledge_base_fts(rowid, title, content)
+    VALUES (new.doc_id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS knowledge_base_ad AFTER DELETE ON knowledge_base BEGIN
+    INSERT INTO knowledge_base_fts(knowledge_base_fts, rowid, title, content)
+    VALUES ('delete', old.doc_id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS knowledge_base_au AFTER UPDATE ON knowledge_base BEGIN
+    INSERT INTO knowledge_base_fts(knowledge_base_fts, rowid, title, content)
+    VALUES ('delete', old.doc_id, old.title, old.content);
+    INSERT INTO knowledge_base_fts(rowid, title, content)
+    VALUES (new.doc_id, new.title, new.content);
+END;
+"""
+
+_ENTRY_COLUMNS = "id, title, content, tags, created_at, updated_at, version, word_count, read_time"
+
+
+def _row_to_entry(row) -> Dict:
+    """將資料列轉回知識條目的字典格式"""
+    entry_id, title, content, tags, created_at, updated_at, version, word_count, read_time = row
+    return {
+        "id": entry_id,
+        "title": title,
+        "content": content,
+        "tags": json.loads(tags),
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "version": version,
+        "metadata": {
+            "word_count": word_count,
+            "read_time": read_time
+        }
+    }
+
+
+class SQLiteEntries(Mapping):
+    """
+    SQLite 條目映射
+
+    行為與 dict 相同，但每次存取才向資料庫查詢，
+    開啟大型知識庫時不需要把所有條目載入記憶體。
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getitem__(self, entry_id: str) -> Dict:
+        row = self._conn.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM knowledge_base WHERE id = ?", (entry_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(entry_id)
+        return _row_to_entry(row)
+
+    def __contains__(self, entry_id) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM knowledge_base WHERE id = ?", (entry_id,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (entry_id,) in self._conn.execute("SELECT id FROM knowledge_base ORDER BY doc_id"):
+            yield entry_id
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM knowledge_base").fetchone()[0]
+
+    def texts(self, entry_ids: List[str]) -> Iterator[Tuple[str, str, str]]:
+        """
+        只取出多筆條目的標題與內容（每 500 筆一次查詢，不解析其他欄位）
+
+        Args:
+            entry_ids: 條目 ID 列表
+
+        Returns:
+            (ID, 標題, 內容) 的迭代器，順序不固定（不存在的 ID 會略過）
+        """
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            yield from self._conn.execute(
+                f"SELECT id, title, content FROM knowledge_base WHERE id IN ({placeholders})", chunk
+            )
+
+    def get_many(self, entry_ids: List[str]) -> List[Dict]:
+        """
+        依序取出多筆條目（每 500 筆一次查詢）
+
+        Args:
+            entry_ids: 條目 ID 列表
+
+        Returns:
+            條目列表，順序與 entry_ids 相同（不存在的 ID 會略過）
+        """
+        found = {}
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM knowledge_base WHERE id IN ({placeholders})", chunk
+            )
+            for row in rows:
+                found[row[0]] = _row_to_entry(row)
+        return [found[entry_id] for entry_id in entry_ids if entry_id in found]
+
+    def values(self) -> Iterator[Dict]:
+        """逐筆讀出所有條目（單一查詢，不逐筆查 ID）"""
+        cursor = self._conn.execute(f"SELECT {_ENTRY_COLUMNS} FROM knowledge_base ORDER BY doc_id")
+        for row in cursor:
+            yield _row_to_entry(row)
+
+
+def _like_pattern(text: str) -> str:
+    """子字串比對用的 LIKE 樣式（以 \\ 跳脫萬用字元）"""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SQLiteSearchIndex:
+    """
+    以 FTS5 實作的全文索引（介面同 search.InvertedIndex）
+
+    查詢長度至少 3 個字元時走 trigram 全文索引並以 bm25() 排序；
+    較短的查詢改用 LIKE。LIKE 只對 ASCII 不區分大小寫，
+    含非 ASCII 字元的短查詢改以 Python 的 str.lower() 比對（與 JSON 後端相同）。
+    """
+
+    # 模糊搜尋時每種候選查詢最多取出的條目數
+    FUZZY_CANDIDATES = 200
+
+    def __init__(self, conn: sqlite3.Connection, has_fts: bool):
+        self._conn = conn
+        self._has_fts = has_fts
+
+    def add(self, doc_id: str, title: str, content: str):
+        """由觸發器同步，不需額外處理"""
+
+    def remove(self, doc_id: str):
+        """由觸發器同步，不需額外處理"""
+
+    def _uses_fts(self, query: str) -> bool:
+        return self._has_fts and len(query) >= 3
+
+    def candidates(self, query: str) -> Optional[Set[str]]:
+        """找出可能符合查詢的條目 ID"""
+        if not query:
+            return None
+        if self._uses_fts(query):
+            return set(self._fts_ids(query))
+
+        if query.isascii():
+            pattern = _like_pattern(query)
+            rows = self._conn.execute(
+                "SELECT id FROM knowledge_base "
+                "WHERE title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\'",
+                (pattern, pattern)
+            )
+        else:
+            query = query.lower()
+            rows = self._conn.execute(
+                "SELECT id FROM knowledge_base "
+                "WHERE instr(py_lower(title), ?) OR instr(py_lower(content), ?)",
+                (query, query)
+            )
+        return {entry_id for (entry_id,) in rows}
+
+    def exact(self, query: str) -> bool:
+        """FTS5 與 LIKE 的大小寫規則和 str.lower() 不完全相同，候選結果一律需要比對原文"""
+        return False
+
+    def rank(self, query: str, doc_ids, limit: Optional[int] = None) -> List[str]:
+        """依 bm25() 排序（短查詢維持原順序）"""
+        doc_ids = list(doc_ids)
+        if not self._uses_fts(query):
+            return doc_ids[:limit]
+        wanted = set(doc_ids)
+        return [entry_id for entry_id in self._fts_ids(query) if entry_id in wanted][:limit]
+
+    def fuzzy(self, query: str, limit: Optional[int] = 10,
+              min_score: float = 0.3) -> List[Tuple[str, float]]:
+        """
+        模糊搜尋（結果格式同 InvertedIndex.fuzzy）
+
+        英文詞彙與記憶體索引相同，以 word_bigrams 表的邊界二元組找出拼法相近的詞彙
+        （相鄰字母對調等與原詞沒有共同三元組的錯字也找得到），
+        再由 entry_words 表取出含有這些詞彙的條目，相似度高的詞彙優先；
+        中文雙字與單字用 LIKE。兩種候選各取前 FUZZY_CANDIDATES 筆，
+        再對候選條目建立小型 InvertedIndex 計算相似度分數。
+        """
+        words, grams = [], set()
+        for term in query_terms(query):
+            if _is_word(term):
+                words.append(term)
+            else:
+                grams.add(term)
+        if not words and not grams:
+            return []
+
+        candidates = set()
+        if words:
+            candidates.update(self._similar_word_ids(words))
+        if grams:
+            patterns = [_like_pattern(gram) for gram in sorted(grams)]
+            condition = " OR ".join(["title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\'"]
+                                    * len(patterns))
+            rows = self._conn.execute(
+                f"SELECT id FROM knowledge_base WHERE {condition} LIMIT ?",
+                [pattern for pattern in patterns for _ in range(2)] + [self.FUZZY_CANDIDATES]
+            )
+            candidates.update(entry_id for (entry_id,) in rows)
+
+        index = InvertedIndex()
+        for entry_id in candidates:
+            title, content = self._conn.execute(
+                "SELECT title, content FROM knowledge_base WHERE id = ?", (entry_id,)
+            ).fetchone()
+            index.add(entry_id, title, content)
+        return index.fuzzy(query, limit, min_score)
+
+    def _similar_word_ids(self, words: List[str]) -> List[str]:
+        """含有與 words 拼法相近詞彙的條目 ID（最多 FUZZY_CANDIDATES 筆）"""
+        similar: Dict[str, float] = {}
+        for term in words:
+            grams = sorted(_padded_bigrams(term))
+            placeholders = ", ".join("?" * len(grams))
+            shared = dict(self._conn.execute(
+                f"SELECT word, COUNT(*) FROM word_bigrams WHERE gram IN ({placeholders}) "
+                "GROUP BY word", grams
+            ))
+            for word, similarity in InvertedIndex.score_similar(term, shared).items():
+                similar[word] = max(similar.get(word, 0.0), similarity)
+
+        entry_ids = {}
+        for word in sorted(similar, key=lambda word: (-similar[word], word)):
+            rows = self._conn.execute(
+                "SELECT entry_id FROM entry_words WHERE word = ? LIMIT ?",
+                (word, self.FUZZY_CANDIDATES)
+            )
+            entry_ids.update(dict.fromkeys(entry_id for (entry_id,) in rows))
+            if len(entry_ids) >= self.FUZZY_CANDIDATES:
+                break
+        return list(entry_ids)[:self.FUZZY_CANDIDATES]
+
+    def _fts_ids(self, query: str) -> List[str]:
+        phrase = '"' + query.replace('"', '""') + '"'
+        rows = self._conn.execute(
+            "SELECT k.id FROM knowledge_base_fts f "
+            "JOIN knowledge_base k ON k.doc_id = f.rowid "
+            "WHERE knowledge_base_fts MATCH ? ORDER BY bm25(knowledge_base_fts)",
+            (phrase,)
+        )
+        return [entry_id for (entry_id,) in rows]
+
+
+class SQLiteTagIndex(TagIndex):
+    """以 entry_tags 關聯表實作的標籤索引（介面同 search.TagIndex）"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        super().__init__()
+        self._conn = conn
+
+    def add(self, doc_id: str, tags, key: str = ""):
+        """由 SQLiteStorage.put 同步，不需額外處理"""
+
+    def remove(self, doc_id: str, tags, key: str = ""):
+        """由 SQLiteStorage.put / remove 同步，不需額外處理"""
+
+    def get(self, tag: str) -> Set[str]:
+        rows = self._conn.execute("SELECT entry_id FROM entry_tags WHERE tag = ?", (tag,))
+        return {entry_id for (entry_id,) in rows}
+
+    def page(self, tags: List[str], match: str = "any", exclude=(), reverse: bool = False,
+             offset: int = 0, limit: Optional[int] = None, after=None) -> List[str]:
+        """
+        以 keyset 分頁取出符合標籤條件的一頁 ID（依 (created_at, id) 排序）
+
+        每個標籤沿 (tag, created_at, entry_id) 索引依序讀取：
+        "all" 只讀條目最少的標籤，其他標籤以主鍵確認；
+        "any" 以 UNION 合併各標籤已排序的結果，取滿一頁就停止。
+        """
+        tags, exclude = list(tags), list(exclude)
+        if not tags:
+            return []
+        direction, compare = ("DESC", "<") if reverse else ("ASC", ">")
+        checks, check_params = [], []
+        if match == "all":
+            counts = dict(self._conn.execute(
+                f"SELECT tag, COUNT(*) FROM entry_tags WHERE tag IN ({', '.join('?' * len(tags))}) "
+                f"GROUP BY tag", tags).fetchall())
+            tags.sort(key=lambda tag: counts.get(tag, 0))
+            for tag in tags[1:]:
+                checks.append("EXISTS (SELECT 1 FROM entry_tags WHERE tag = ? AND entry_id = t.entry_id)")
+                check_params.append(tag)
+            tags = tags[:1]
+        for tag in exclude:
+            checks.append("NOT EXISTS (SELECT 1 FROM entry_tags WHERE tag = ? AND entry_id = t.entry_id)")
+            check_params.append(tag)
+        if after is not None:
+            checks.append(f"(created_at, entry_id) {compare} (?, ?)")
+            check_params.extend(after)
+
+        arm = " AND ".join(["SELECT created_at, entry_id FROM entry_tags t WHERE tag = ?"] + checks)
+        params = []
+        for tag in tags:
+            params.append(tag)
+            params.extend(check_params)
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._conn.execute(
+            f"{' UNION '.join([arm] * len(tags))} "
+            f"ORDER BY 1 {direction}, 2 {direction} LIMIT ? OFFSET ?",
+            params
+        )
+        return [entry_id for _, entry_id in rows]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT tag, COUNT(*) AS n FROM entry_tags GROUP BY tag ORDER BY n DESC, tag"
+        )
+        return dict(rows.fetchall())
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """以 (tag, entry_id) 主鍵做範圍查詢找出前綴相符的標籤"""
+        rows = self._conn.execute(
+            "SELECT tag, COUNT(*) AS n FROM entry_tags WHERE tag >= ? AND tag < ? "
+            "GROUP BY tag ORDER BY n DESC, tag LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit)
+        )
+        return rows.fetchall()
+
+
+class SQLiteSortedIndex:
+    """以資料表索引實作的排序索引（介面同 search.SortedIndex）"""
+
+    def __init__(self, conn: sqlite3.Connection, column: str):
+        self._conn = conn
+        self._column = column
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM knowledge_base").fetchone()[0]
+
+    def add(self, doc_id: str, key: str):
+        """由 SQLiteStorage.put 同步，不需額外處理"""
+
+    def remove(self, doc_id: str):
+        """由 SQLiteStorage.remove 同步，不需額外處理"""
+
+    def page(self, reverse: bool = False, offset: int = 0, limit: Optional[int] = None,
+             after=None) -> List[str]:
+        """以 keyset 分頁取出一頁 ID（走 (欄位, id) 索引）"""
+        column = self._column
+        direction, compare = ("DESC", "<") if reverse else ("ASC", ">")
+        where, params = "", []
+        if after is not None:
+            where = f"WHERE ({column}, id) {compare} (?, ?)"
+            params.extend(after)
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._conn.execute(
+            f"SELECT id FROM knowledge_base {where} "
+            f"ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?",
+            params
+        )
+        return [entry_id for (entry_id,) in rows]
+
+    def key(self, doc_id: str) -> Optional[str]:
+        row = self._conn.execute(
+            f"SELECT {self._column} FROM knowledge_base WHERE id = ?", (doc_id,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """以範圍查詢取出鍵值以 prefix 開頭的 ID（走 (欄位, id) 索引）"""
+        column = self._column
+        rows = self._conn.execute(
+            f"SELECT id FROM knowledge_base WHERE {column} >= ? AND {column} < ? "
+            f"ORDER BY {column}, id LIMIT ?",
+            (prefix, prefix + "\U0010ffff", -1 if limit is None else limit)
+        )
+        return [entry_id for (entry_id,) in rows]
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite 儲存
+
+    - WAL 模式：讀寫互不阻塞，每次提交只需追加寫入
+    - FTS5（trigram）全文索引負責 search
+    - created_at / updated_at / title 索引負責 list_all 排序，lower(title) 索引負責標題自動完成
+    - entry_tags 關聯表負責標籤過濾與計數
+    - entry_words / word_bigrams 詞彙表負責模糊搜尋的拼字容錯
+    """
+
+    def __init__(self, path):
+        """
+        初始化 SQLite 儲存
+
+        Args:
+            path: 資料庫檔案路徑
+        """
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # SQLite 的 lower() 只處理 ASCII，非 ASCII 的短查詢用 Python 的版本
+        self.conn.create_function("py_lower", 1, str.lower, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SQLITE_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(knowledge_base)")}
+        if "version" not in columns:
+            # 加入版本欄位之前建立的資料庫
+            self.conn.execute(
+                "ALTER TABLE knowledge_base ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+            )
+        tag_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entry_tags)")}
+        if "created_at" not in tag_columns:
+            # 標籤表記錄建立時間之前建立的資料庫：從條目補上
+            self.conn.execute(
+                "ALTER TABLE entry_tags ADD COLUMN created_at TEXT NOT NULL DEFAULT ''"
+            )
+            self.conn.execute(
+                "UPDATE entry_tags SET created_at = "
+                "(SELECT created_at FROM knowledge_base WHERE id = entry_tags.entry_id)"
+            )
+        self.conn.executescript(_SQLITE_TAG_ORDER_SCHEMA)
+        try:
+            self.conn.executescript(_SQLITE_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # 編譯時未包含 FTS5 或 trigram 斷詞器（SQLite < 3.34）
+            self.has_fts = False
+        has_vocabulary = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entry_words'"
+        ).fetchone() is not None
+        self.conn.executescript(_SQLITE_VOCABULARY_SCHEMA)
+        if not has_vocabulary:
+            # 加入詞彙表之前建立的資料庫：從現有條目補建
+            for entry_id, title, content in self.conn.execute(
+                    "SELECT id, title, content FROM knowledge_base").fetchall():
+                self._index_words(entry_id, title, content)
+        self.conn.commit()
+
+    def load(self) -> SQLiteEntries:
+        return SQLiteEntries(self.conn)
+
+    def put(self, entry_id: str, entry: Dict):
+        self._upsert(entry_id, entry)
+        if not self._batch_depth:
+            self.conn.commit()
+
+    def remove(self, entry_id: str):
+        self.conn.execute("DELETE FROM knowledge_base WHERE id = ?", (entry_id,))
+        self.conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
+        self.conn.execute("DELETE FROM entry_words WHERE entry_id = ?", (entry_id,))
+        if not self._batch_depth:
+            self.conn.commit()
+
+    def _upsert(self, entry_id: str, entry: Dict):
+        """寫入一筆條目與其標籤、詞彙（不提交交易）"""
+        metadata = entry.get("metadata", {})
+        self.conn.execute(
+            f"INSERT INTO knowledge_base ({_ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, content = excluded.content, "
+            "tags = excluded.tags, created_at = excluded.created_at, "
+            "updated_at = excluded.updated_at, version = excluded.version, "
+            "word_count = excluded.word_count, read_time = excluded.read_time",
+            (entry_id, entry["title"], entry["content"],
+             json.dumps(entry["tags"], ensure_ascii=False),
+             entry["created_at"], entry["updated_at"], entry.get("version", 1),
+             metadata.get("word_count"), metadata.get("read_time"))
+        )
+        self.conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO entry_tags (tag, entry_id, created_at) VALUES (?, ?, ?)",
+            [(tag, entry_id, entry["created_at"]) for tag in entry["tags"]]
+        )
+        self.conn.execute("DELETE FROM entry_words WHERE entry_id = ?", (entry_id,))
+        self._index_words(entry_id, entry["title"], entry["content"])
+
+    def _index_words(self, entry_id: str, title: str, content: str):
+        """
+        記錄條目中的英文詞彙與詞彙的邊界二元組（不提交交易）
+
+        word_bigrams 只增不減：已沒有條目使用的詞彙留在表中，
+        在 entry_words 找不到條目，不影響搜尋結果。
+        """
+        words = _words(title + "\n" + content)
+        if not words:
+            return
+        # 詞彙以一個 JSON 陣列傳入，每個語句只需執行一次
+        data = json.dumps(sorted(words), ensure_ascii=False)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO entry_words (word, entry_id) "
+            "SELECT value, ? FROM json_each(?)", (entry_id, data)
+        )
+        # 只為新詞彙寫入二元組；每個詞彙都有「$首字」二元組，以它判斷是否已記錄
+        new_words = self.conn.execute(
+            "SELECT value FROM json_each(?) WHERE NOT EXISTS ("
+            "SELECT 1 FROM word_bigrams WHERE gram = '$' || substr(value, 1, 1) AND word = value)",
+            (data,)
+        ).fetchall()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO word_bigrams (gram, word) VALUES (?, ?)",
+            [(gram, word) for (word,) in new_words for gram in _padded_bigrams(word)]
+        )
+
+    @contextmanager
+    def locked(self):
+        """
+        以 BEGIN IMMEDIATE 取得資料庫寫入鎖，讀取版本到寫入之間不會被其他程序插入
+
+        區塊正常結束才提交；發生例外時復原尚未提交的寫入。
+        """
+        acquired = not self.conn.in_transaction
+        if acquired:
+            self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 條目都在資料庫中，不需要 refresh
+            yield False
+        except BaseException:
+            if acquired and not self._batch_depth:
+                self.conn.rollback()
+            raise
+        if acquired and not self._batch_depth:
+            self.conn.commit()
+
+    def data_version(self) -> int:
+        """其他連線提交後 PRAGMA data_version 就會改變（本連線的寫入不會）"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def search_index(self) -> SQLiteSearchIndex:
+        return SQLiteSearchIndex(self.conn, self.has_fts)
+
+    def tag_index(self) -> SQLiteTagIndex:
+        return SQLiteTagIndex(self.conn)
+
+    def sorted_index(self, field: str) -> Optional[SQLiteSortedIndex]:
+        column = _SORT_COLUMNS.get(field)
+        return None if column is None else SQLiteSortedIndex(self.conn, column)
+
+
+def open_storage(path, **options) -> StorageBackend:
+    """
+    依副檔名選擇儲存後端
+
+    .db / .sqlite / .sqlite3 使用 SQLiteStorage，其他使用 JsonStorage。
+
+    Args:
+        path: 資料庫檔案路徑
+        **options: JsonStorage 的選項（journal, fsync_every, compact_every, shared,
+                   split_content）；
+                   SQLite 本身即支援多程序存取，會忽略這些選項
+
+    Returns:
+        儲存後端
+    """
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        return SQLiteStorage(path)
+    return JsonStorage(path, **options)
+
+
+def migrate_json_to_sqlite(json_path, sqlite_path) -> int:
+    """
+    將 JSON 知識庫（含尚未壓縮的日誌）轉換為 SQLite
+
+    所有條目在同一個交易中寫入。
+
+    Args:
+        json_path: 來源 JSON 快照檔
+        sqlite_path: 目標 SQLite 資料庫
+
+    Returns:
+        轉換的條目數量
+
+    Raises:
+        FileNotFoundError: 來源快照不存在
+    """
+    if not Path(json_path).exists():
+        # JsonStorage.load 遇到不存在的快照會建立空檔，轉換只應讀取來源
+        raise FileNotFoundError(f"找不到來源知識庫: {json_path}")
+
+    # 以日誌模式開啟來源，只讀取、不改寫原本的快照
+    source = JsonStorage(json_path, journal=True)
+    target = SQLiteStorage(sqlite_path)
+    try:
+        entries = source.load()
+        # 區段檔模式的內容在關閉來源前才能讀取
+        with target.conn:
+            for entry_id, entry in entries.items():
+                target._upsert(entry_id, entry)
+        return len(entries)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,121 @@
+"""
+知識庫 asyncio 介面測試
+
+這個檔案包含 AsyncKnowledgeBase（批次合併寫入、寫入完成才回應）的測試案例。
+"""
+
+import pytest
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import storage
+from async_knowledge_base import AsyncKnowledgeBase
+from knowledge_base import KnowledgeBase, VersionConflictError
+
+
+class TestAsyncKnowledgeBase:
+    """AsyncKnowledgeBase 測試"""
+
+    @pytest.fixture(params=["json", "journal", "db"])
+    def open_kb(self, request, tmp_path):
+        suffix = "db" if request.param == "db" else "json"
+        path = str(tmp_path / f"async_kb.{suffix}")
+        journal = request.param == "journal"
+        return lambda: KnowledgeBase(path, journal=journal)
+
+    @pytest.fixture
+    def snapshot_writes(self, monkeypatch):
+        """記錄寫出快照的執行緒"""
+        threads = []
+        original = storage.write_snapshot
+        monkeypatch.setattr(storage, "write_snapshot", lambda path, entries: (
+            threads.append(threading.current_thread()), original(path, entries)))
+        return threads
+
+    def test_writes_are_durable(self, open_kb):
+        """測試：寫入完成後重新開啟可讀到資料"""
+        async def scenario():
+            async with AsyncKnowledgeBase(open_kb()) as akb:
+                entry_id = await akb.create(title="非同步", content="內容", tags=["asyncio"])
+                assert await akb.update(entry_id, content="新內容")
+                assert akb.read(entry_id)["content"] == "新內容"
+                gone = await akb.create(title="刪除", content="內容", tags=[])
+                assert await akb.delete(gone)
+                return entry_id
+
+        entry_id = asyncio.run(scenario())
+        kb = open_kb()
+        assert list(kb.entries) == [entry_id]
+        assert kb.read(entry_id)["content"] == "新內容"
+        kb.close()
+
+    def test_concurrent_writes_coalesce(self, open_kb):
+        """測試：同時到達的寫入合併成一次批次"""
+        async def scenario():
+            async with AsyncKnowledgeBase(open_kb(), flush_interval=0.05) as akb:
+                ids = await asyncio.gather(*(
+                    akb.create(title=f"條目{i}", content="內容", tags=[]) for i in range(50)))
+                assert akb.flush_count == 1
+                return ids
+
+        ids = asyncio.run(scenario())
+        kb = open_kb()
+        assert sorted(kb.entries) == sorted(ids)
+        kb.close()
+
+    def test_flush_runs_off_event_loop(self, tmp_path, snapshot_writes):
+        """測試：快照在背景執行緒寫出，不卡住事件迴圈"""
+        async def scenario():
+            async with AsyncKnowledgeBase(KnowledgeBase(str(tmp_path / "kb.json"))) as akb:
+                await akb.create(title="條目", content="內容", tags=[])
+
+        asyncio.run(scenario())
+        # 第一次是開啟新知識庫時建立的空快照
+        assert snapshot_writes[1] is not threading.main_thread()
+
+    def test_reads_see_pending_writes(self, open_kb):
+        """測試：尚未寫入磁碟的異動也能立即讀到"""
+        async def scenario():
+            async with AsyncKnowledgeBase(open_kb(), flush_interval=10) as akb:
+                task = asyncio.ensure_future(akb.create(title="搜尋我", content="內容", tags=["a"]))
+                await asyncio.sleep(0)
+                assert not task.done()
+                assert [e["title"] for e in akb.search("搜尋")] == ["搜尋我"]
+                assert akb.tag_counts() == {"a": 1}
+                await akb.flush()
+                assert task.done()
+
+        asyncio.run(scenario())
+
+    def test_version_conflict(self, open_kb):
+        """測試：版本衝突直接回報給呼叫者"""
+        async def scenario():
+            async with AsyncKnowledgeBase(open_kb()) as akb:
+                entry_id = await akb.create(title="版本", content="內容", tags=[])
+                await akb.update(entry_id, title="第二版", expected_version=1)
+                with pytest.raises(VersionConflictError):
+                    await akb.update(entry_id, title="衝突", expected_version=1)
+                assert akb.read(entry_id)["title"] == "第二版"
+
+        asyncio.run(scenario())
+
+    def test_flush_error_reaches_writers(self, tmp_path, monkeypatch):
+        """測試：寫入磁碟失敗時，該批次的所有寫入都收到例外"""
+        def broken(path, entries):
+            raise OSError("磁碟已滿")
+
+        async def scenario():
+            akb = AsyncKnowledgeBase(KnowledgeBase(str(tmp_path / "kb.json")))
+            monkeypatch.setattr(storage, "write_snapshot", broken)
+            results = await asyncio.gather(
+                akb.create(title="一", content="內容", tags=[]),
+                akb.create(title="二", content="內容", tags=[]),
+                return_exceptions=True)
+            assert all(isinstance(result, OSError) for result in results)
+
+        asyncio.run(scenario())
@@ -0,0 +1,68 @@
+"""
+效能測試工具的測試
+
+這個檔案以小規模執行 benchmarks/run_benchmarks.py，
+確認量測流程可以運作，且規格的效能需求（搜尋、匯出、新增）在此規模下達成。
+完整的 1k/10k/100k 量測請直接執行該腳本。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 benchmarks 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from corpus import generate_corpus, sample_queries
+from run_benchmarks import check_spec, compare, percentile, run_suite
+
+
+class TestBenchmarks:
+    """效能測試工具測試"""
+
+    def test_corpus_is_deterministic(self):
+        """測試：相同參數產生相同語料"""
+        first = list(generate_corpus(20, "cjk"))
+        assert first == list(generate_corpus(20, "cjk"))
+        assert all(record["tags"] for record in first)
+        assert sample_queries(4, "latin") == sample_queries(4, "latin")
+
+    def test_invalid_language(self):
+        """測試：不支援的語言"""
+        with pytest.raises(ValueError):
+            list(generate_corpus(1, "klingon"))
+
+    def test_percentile(self):
+        """測試：最近秩次法百分位數"""
+        samples = list(range(1, 101))
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 99) == 99
+        assert percentile([7], 99) == 7
+
+    def test_compare_detects_regression(self):
+        """測試：超過容許倍數且大於量測誤差才算退步"""
+        baseline = {"search": {"p50": 10.0}, "create": {"p50": 0.1},
+                    "memory": {"resident_mb": 10.0}}
+        current = {"search": {"p50": 16.0}, "create": {"p50": 0.5},
+                   "memory": {"resident_mb": 12.0}}
+        regressions = compare(current, baseline, tolerance=1.5)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("search")
+
+    def test_scale_target(self):
+        """測試：五萬條目的搜尋以 p50 檢查目標"""
+        stats = {"create": {"p50": 1.0, "p99": 2.0}, "search": {"p50": 100.0, "p99": 900.0},
+                 "export": {"p50": 1.0, "p99": 2.0}, "ingest": {"per_second": 1.0}}
+        assert check_spec({50000: stats}) == []
+        stats["search"]["p50"] = 400.0
+        failures = check_spec({50000: stats})
+        assert len(failures) == 1
+        assert failures[0].startswith("search（50000 條目）p50")
+
+    @pytest.mark.parametrize("backend", ["journal", "sqlite"])
+    def test_spec_targets_at_small_scale(self, backend, tmp_path):
+        """測試：規格的效能需求（100 與 1000 條目）"""
+        results = {size: run_suite(size, backend=backend, operations=20, workdir=str(tmp_path))
+                   for size in (100, 1000)}
+        assert check_spec(results) == []
+        assert results[1000]["search"]["n"] == 20
@@ -0,0 +1,162 @@
+"""
+精簡條目儲存測試
+
+這個檔案包含 EntryStore（__slots__ 條目、整數時間、共用標籤）的測試案例。
+"""
+
+import pytest
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from entry_store import Entry, EntryStore, decode_timestamp, encode_timestamp
+from knowledge_base import KnowledgeBase
+
+
+def _entry(i, created_at="2024-01-15T10:30:00.123456"):
+    return {
+        "id": f"kb_{i}",
+        "title": f"標題{i}",
+        "content": "內容" * 50,
+        "tags": ["python", f"t{i % 10}"],
+        "created_at": created_at,
+        "updated_at": created_at,
+        "version": 1,
+        "metadata": {"word_count": 100, "read_time": 1}
+    }
+
+
+class TestTimestamp:
+    """時間編碼測試"""
+
+    @pytest.mark.parametrize("value", [
+        "2024-01-15T10:30:00",
+        "2024-01-15T10:30:00.123456",
+        "1969-12-31T23:59:59.999999",
+        "2024-01-15T10:30:00.123456+00:00",
+        "0001-01-01T00:00:00+00:00",
+        "9999-12-31T23:59:59.999999",
+    ])
+    def test_roundtrip_as_integer(self, value):
+        """測試：標準格式轉成整數後可原樣還原"""
+        encoded = encode_timestamp(value)
+        assert isinstance(encoded, int)
+        assert decode_timestamp(encoded) == value
+
+    @pytest.mark.parametrize("value", [
+        "2024-01-15T10:30:00.000000",
+        "2024-01-15T10:30:00+08:00",
+        "2024-01-15",
+        "昨天",
+    ])
+    def test_non_canonical_kept_as_string(self, value):
+        """測試：無法無損轉換的字串保持原樣"""
+        assert encode_timestamp(value) == value
+        assert decode_timestamp(encode_timestamp(value)) == value
+
+
+class TestEntryStore:
+    """EntryStore 測試"""
+
+    def test_same_shape_as_dict(self):
+        """測試：取出的條目與存入的 dict 完全相同（含鍵的順序）"""
+        store = EntryStore()
+        entry = _entry(1)
+        store["kb_1"] = entry
+
+        assert isinstance(store._items["kb_1"], Entry)
+        assert store["kb_1"] == entry
+        assert list(store["kb_1"]) == list(entry)
+        assert json.dumps(store["kb_1"]) == json.dumps(entry)
+
+    def test_returns_copies(self):
+        """測試：修改取出的條目不影響儲存內容"""
+        store = EntryStore({"kb_1": _entry(1)})
+        entry = store["kb_1"]
+        entry["tags"].append("新標籤")
+        entry["metadata"]["word_count"] = 0
+        assert store["kb_1"] == _entry(1)
+
+    def test_text_without_unpacking(self):
+        """測試：只取出標題與內容"""
+        legacy = _entry(2)
+        del legacy["version"]
+        store = EntryStore({"kb_1": _entry(1), "kb_2": legacy})
+        assert list(store.texts(["kb_2", "kb_9", "kb_1"])) == [
+            ("kb_2", legacy["title"], legacy["content"]),
+            ("kb_1", _entry(1)["title"], _entry(1)["content"])]
+
+    def test_tags_are_interned(self):
+        """測試：相同標籤在所有條目間只存一份"""
+        store = EntryStore({f"kb_{i}": _entry(i) for i in range(100)})
+        assert len(store.tags) == 11
+        assert store["kb_3"]["tags"] == ["python", "t3"]
+
+    def test_non_standard_entries_kept_verbatim(self):
+        """測試：多出欄位或缺少欄位的條目原樣保存"""
+        extra = dict(_entry(1), source="web")
+        legacy = _entry(2)
+        del legacy["version"]
+        store = EntryStore({"kb_1": extra, "kb_2": legacy})
+
+        assert store["kb_1"] == extra
+        assert store["kb_2"] == legacy
+        assert "version" not in store["kb_2"]
+
+    def test_mapping_operations(self):
+        """測試：dict 的常用操作"""
+        store = EntryStore({f"kb_{i}": _entry(i) for i in range(3)})
+        assert list(store) == ["kb_0", "kb_1", "kb_2"]
+        assert "kb_1" in store and "kb_9" not in store
+        assert store.get("kb_9") is None
+        assert store.pop("kb_1")["title"] == "標題1"
+        assert len(store) == 2
+
+    def test_uses_less_memory_than_dicts(self):
+        """測試：記憶體用量明顯少於巢狀 dict"""
+        text = json.dumps({f"kb_{i}": _entry(i) for i in range(2000)})
+
+        def measure(build):
+            tracemalloc.start()
+            data = build(json.loads(text))
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del data
+            return size
+
+        plain = measure(lambda raw: raw)
+        compact = measure(EntryStore)
+        assert compact < plain * 0.7
+
+
+class TestKnowledgeBaseEntries:
+    """知識庫使用精簡儲存的整合測試"""
+
+    def test_read_and_snapshot_unchanged(self, tmp_path):
+        """測試：read() 與快照檔格式不變"""
+        db_path = tmp_path / "compact_kb.json"
+        kb = KnowledgeBase(str(db_path))
+        entry_id = kb.create(title="Python", content="教學", tags=["Python", "入門"])
+        kb.update(entry_id, content="進階教學")
+
+        assert isinstance(kb.entries, EntryStore)
+        entry = kb.read(entry_id)
+        with open(db_path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == {entry_id: entry}
+        assert db_path.read_text(encoding='utf-8') == json.dumps(
+            {entry_id: entry}, ensure_ascii=False, indent=2)
+
+    def test_sample_data_roundtrip(self, tmp_path):
+        """測試：範例資料載入後原樣寫回"""
+        sample = Path(__file__).parent.parent / "examples" / "sample_data.json"
+        db_path = tmp_path / "sample.json"
+        db_path.write_text(sample.read_text(encoding='utf-8'), encoding='utf-8')
+        original = json.loads(db_path.read_text(encoding='utf-8'))
+
+        kb = KnowledgeBase(str(db_path))
+        kb.compact()
+        assert json.loads(db_path.read_text(encoding='utf-8')) == original
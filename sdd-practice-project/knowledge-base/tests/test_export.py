@@ -0,0 +1,99 @@
+"""
+知識庫匯出功能測試
+
+這個檔案包含各種匯出格式與 gzip 壓縮的測試案例。
+"""
+
+import pytest
+import gzip
+import json
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from knowledge_base import KnowledgeBase
+
+
+class TestExport:
+    """匯出功能測試類別"""
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        kb = KnowledgeBase(str(tmp_path / "export_kb.json"))
+        kb.create(title="Python 裝飾器", content="裝飾器是一種設計模式。\n第二行", tags=["Python"])
+        kb.create(title="<script>標題</script>", content="a < b && c > d", tags=["html"])
+        return kb
+    
+    def test_markdown(self, kb, tmp_path):
+        """測試：Markdown 匯出"""
+        path = kb.export("markdown", str(tmp_path / "out.md"))
+        content = Path(path).read_text(encoding='utf-8')
+        assert content.startswith("# 知識庫匯出")
+        assert "**總條目數：** 2" in content
+        assert "## Python 裝飾器" in content
+        assert content.count("---") == 3
+    
+    def test_json_matches_json_dump(self, kb, tmp_path):
+        """測試：逐筆寫出的 JSON 與一次 dump 的結果相同"""
+        path = kb.export("json", str(tmp_path / "out.json"))
+        text = Path(path).read_text(encoding='utf-8')
+        data = json.loads(text)
+        
+        assert data["total_entries"] == 2
+        assert data["entries"] == list(kb.entries.values())
+        assert text.rstrip("\n") == json.dumps(data, ensure_ascii=False, indent=2)
+    
+    def test_json_empty(self, tmp_path):
+        """測試：空知識庫的 JSON 匯出"""
+        kb = KnowledgeBase(str(tmp_path / "empty.json"))
+        path = kb.export("json", str(tmp_path / "empty_out.json"))
+        with open(path, 'r', encoding='utf-8') as f:
+            assert json.load(f)["entries"] == []
+    
+    def test_jsonl_roundtrip(self, kb, tmp_path):
+        """測試：JSONL 匯出可以再匯入"""
+        path = kb.export("jsonl", str(tmp_path / "out.jsonl"))
+        lines = Path(path).read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 2
+        
+        other = KnowledgeBase(str(tmp_path / "other.json"))
+        report = other.import_jsonl(path)
+        assert len(report["created"]) == 2
+    
+    def test_html_escapes_content(self, kb, tmp_path):
+        """測試：HTML 匯出會跳脫特殊字元"""
+        path = kb.export("html", str(tmp_path / "out.html"))
+        content = Path(path).read_text(encoding='utf-8')
+        assert content.startswith("<!DOCTYPE html>")
+        assert "@media print" in content
+        assert "&lt;script&gt;" in content
+        assert "<script>" not in content
+        assert "a &lt; b &amp;&amp; c &gt; d" in content
+    
+    def test_gzip(self, kb, tmp_path, monkeypatch):
+        """測試：gzip 壓縮輸出"""
+        monkeypatch.chdir(tmp_path)
+        path = kb.export("json", compress=True)
+        assert path.endswith(".json.gz")
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            assert json.load(f)["total_entries"] == 2
+    
+    def test_streams_entries(self, kb, tmp_path, monkeypatch):
+        """測試：匯出時逐筆讀取條目，不先轉成列表"""
+        seen = []
+        
+        class Entries(dict):
+            def values(self):
+                for value in super().values():
+                    seen.append(value["id"])
+                    yield value
+        
+        monkeypatch.setattr(kb, "entries", Entries(kb.entries))
+        kb.export("jsonl", str(tmp_path / "stream.jsonl"))
+        assert len(seen) == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
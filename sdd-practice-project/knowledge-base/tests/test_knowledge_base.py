@@ -12,14 +12,28 @@
 
 import pytest
 import json
+import os
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 # 加入 src 目錄到路徑
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from knowledge_base import KnowledgeBase
+from knowledge_base import KnowledgeBase, VersionConflictError
+from id_generator import IdGenerator
+
+
+def _generate_ids(count):
+    """在子行程中產生 ID（供跨行程測試使用）"""
+    return [IdGenerator().next()[0] for _ in range(count)]
+
+
+def _create_shared(db_path, journal, count):
+    """在子行程中以共用模式新增條目（供跨行程測試使用）"""
+    with KnowledgeBase(db_path, journal=journal, shared=True) as kb:
+        return [kb.create(title=f"條目{i}", content="內容", tags=["共用"]) for i in range(count)]
 
 
 class TestKnowledgeBase:
@@ -317,6 +331,400 @@ class TestKnowledgeBase:
         assert entry["metadata"]["read_time"] == expected_read_time
 
 
+class TestListPagination:
+    """列表分頁測試"""
+    
+    @pytest.fixture(params=["json", "db"])
+    def kb(self, request, tmp_path):
+        kb = KnowledgeBase(str(tmp_path / f"page_kb.{request.param}"))
+        for i in range(7):
+            kb.create(title=f"條目{i}", content="內容", tags=[])
+        yield kb
+        kb.close()
+    
+    def test_limit_offset(self, kb):
+        """測試：limit / offset"""
+        titles = [e["title"] for e in kb.list_all(limit=3, offset=2)]
+        assert titles == ["條目4", "條目3", "條目2"]
+        
+        titles = [e["title"] for e in kb.list_all(sort_by="title", order="asc", limit=2)]
+        assert titles == ["條目0", "條目1"]
+    
+    def test_cursor_pages_cover_all_entries(self, kb):
+        """測試：游標分頁依序走完所有條目"""
+        titles, cursor = [], None
+        while True:
+            page = kb.list_page(limit=3, cursor=cursor)
+            titles.extend(e["title"] for e in page["entries"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert titles == [f"條目{i}" for i in reversed(range(7))]
+    
+    def test_cursor_stable_under_inserts(self, kb):
+        """測試：翻頁期間新增條目不影響下一頁"""
+        page = kb.list_page(limit=3)
+        kb.create(title="新條目", content="內容", tags=[])
+        next_page = kb.list_page(limit=3, cursor=page["next_cursor"])
+        assert [e["title"] for e in next_page["entries"]] == ["條目3", "條目2", "條目1"]
+    
+    def test_updated_at_view_tracks_updates(self, kb):
+        """測試：更新後 updated_at 排序同步"""
+        oldest = kb.list_all(order="asc", limit=1)[0]
+        kb.update(oldest["id"], title="剛更新")
+        assert kb.list_all(sort_by="updated_at", limit=1)[0]["title"] == "剛更新"
+        assert kb.list_all(sort_by="title", order="desc", limit=1)[0]["title"] == "條目6"
+    
+    def test_invalid_cursor(self, kb):
+        """測試：無效的游標與排序欄位"""
+        with pytest.raises(ValueError, match="無效的分頁游標"):
+            kb.list_page(cursor="not-a-cursor")
+        with pytest.raises(ValueError, match="不支援的排序欄位"):
+            kb.list_page(sort_by="word_count")
+
+
+class TestIdGenerator:
+    """ID 產生器測試"""
+    
+    def test_ids_are_unique_and_sorted(self):
+        """測試：大量產生的 ID 不重複且依序遞增"""
+        generator = IdGenerator()
+        ids = [generator.next()[0] for _ in range(20000)]
+        assert len(set(ids)) == len(ids)
+        assert ids == sorted(ids)
+    
+    def test_timestamp_matches_id_order(self):
+        """測試：ID 附帶的時間與 ID 順序一致"""
+        generator = IdGenerator()
+        pairs = [generator.next() for _ in range(1000)]
+        moments = [moment for _, moment in pairs]
+        assert moments == sorted(moments)
+        entry_id, moment = pairs[-1]
+        utc = moment.astimezone(timezone.utc)
+        assert utc.strftime("%Y%m%d_%H%M%S") in entry_id
+    
+    @pytest.fixture
+    def dst_fall_back(self, monkeypatch):
+        """
+        模擬紐約夏令時間結束：2026-11-01 06:00 UTC 由 EDT 切換為 EST，
+        先在 01:30 EDT 產生時間，再在 01:10 EST（本地時間倒退）產生時間
+        """
+        if not hasattr(time, "tzset"):
+            pytest.skip("需要 time.tzset")
+        import id_generator
+        instants = [datetime(2026, 11, 1, 5, 30, tzinfo=timezone.utc),
+                    datetime(2026, 11, 1, 6, 10, tzinfo=timezone.utc)]
+        times = iter(int(instant.timestamp()) * 10 ** 9 for instant in instants)
+        monkeypatch.setattr(id_generator.time, "time_ns", lambda: next(times))
+        original = os.environ.get("TZ")
+        os.environ["TZ"] = "America/New_York"
+        time.tzset()
+        yield
+        if original is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = original
+        time.tzset()
+    
+    def test_ids_sorted_across_dst_change(self, dst_fall_back):
+        """測試：夏令時間結束（本地時間倒退一小時）時 ID 與時間仍依序遞增"""
+        generator = IdGenerator()
+        (first, first_moment), (second, second_moment) = generator.next(), generator.next()
+        
+        assert first < second
+        assert first_moment < second_moment
+        assert "_20261101_053000_" in first and "_20261101_061000_" in second
+        assert first_moment.isoformat() == "2026-11-01T05:30:00+00:00"
+    
+    @pytest.mark.parametrize("filename", ["dst_kb.json", "dst_kb.db"])
+    def test_created_at_order_across_dst_change(self, tmp_path, filename, dst_fall_back):
+        """測試：夏令時間結束時 created_at 排序與 ID 順序一致"""
+        kb = KnowledgeBase(str(tmp_path / filename))
+        first = kb.create(title="先建立", content="內容", tags=["dst"])
+        second = kb.create(title="後建立", content="內容", tags=["dst"])
+        
+        assert kb.read(first)["created_at"] < kb.read(second)["created_at"]
+        assert [e["id"] for e in kb.list_all(sort_by="created_at", order="asc")] == [first, second]
+        assert [e["id"] for e in kb.list_page(sort_by="created_at", limit=1)["entries"]] == [second]
+        kb.close()
+    
+    def test_clock_going_backwards(self, monkeypatch):
+        """測試：時鐘倒退時仍單調遞增"""
+        import id_generator
+        generator = IdGenerator()
+        first = generator.next()[0]
+        real_time_ns = id_generator.time.time_ns
+        monkeypatch.setattr(id_generator.time, "time_ns", lambda: real_time_ns() - 10 ** 10)
+        assert generator.next()[0] > first
+    
+    def test_unique_across_processes(self):
+        """測試：多個行程同時產生也不重複"""
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            batches = list(pool.map(_generate_ids, [2000, 2000]))
+        assert not set(batches[0]) & set(batches[1])
+    
+    def test_no_overwrite_after_delete(self, kb):
+        """測試：刪除後在同一秒內大量新增不會覆蓋舊條目"""
+        ids = [kb.create(title=f"條目{i}", content="內容", tags=[]) for i in range(3)]
+        kb.delete(ids[0])
+        new_ids = [kb.create(title=f"新條目{i}", content="內容", tags=[]) for i in range(3)]
+        
+        assert len(kb.entries) == 5
+        assert not set(ids) & set(new_ids)
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        return KnowledgeBase(str(tmp_path / "id_kb.json"))
+
+
+class TestJournal:
+    """日誌模式測試"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return tmp_path / "journal_kb.json"
+    
+    def test_mutations_append_to_journal(self, db_path):
+        """測試：異動只追加到日誌，不重寫快照"""
+        kb = KnowledgeBase(str(db_path), journal=True)
+        snapshot_before = db_path.read_text(encoding='utf-8')
+        
+        entry_id = kb.create(title="日誌", content="內容", tags=["測試"])
+        kb.update(entry_id, title="日誌更新")
+        kb.close()
+        
+        journal_path = kb._storage.journal.path
+        assert db_path.read_text(encoding='utf-8') == snapshot_before
+        assert len(journal_path.read_text(encoding='utf-8').splitlines()) == 2
+    
+    def test_replay_on_load(self, db_path):
+        """測試：重新開啟時重播日誌"""
+        kb1 = KnowledgeBase(str(db_path), journal=True)
+        id1 = kb1.create(title="保留", content="內容", tags=[])
+        id2 = kb1.create(title="刪除", content="內容", tags=[])
+        kb1.update(id1, title="保留（已更新）")
+        kb1.delete(id2)
+        kb1.close()
+        
+        kb2 = KnowledgeBase(str(db_path), journal=True)
+        assert kb2.read(id1)["title"] == "保留（已更新）"
+        assert kb2.read(id2) is None
+    
+    def test_compaction(self, db_path):
+        """測試：累積到門檻後壓縮回快照"""
+        kb = KnowledgeBase(str(db_path), journal=True, compact_every=3)
+        for i in range(3):
+            kb.create(title=f"條目{i}", content="內容", tags=[])
+        
+        assert not kb._storage.journal.path.exists()
+        with open(db_path, 'r', encoding='utf-8') as f:
+            assert len(json.load(f)) == 3
+    
+    def test_torn_last_record_is_ignored(self, db_path):
+        """測試：忽略寫到一半的最後一筆日誌"""
+        kb1 = KnowledgeBase(str(db_path), journal=True)
+        entry_id = kb1.create(title="完整", content="內容", tags=[])
+        kb1.close()
+        with open(kb1._storage.journal.path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "put", "id": "kb_broken", "ent')
+        
+        kb2 = KnowledgeBase(str(db_path), journal=True)
+        assert entry_id in kb2.entries
+        assert "kb_broken" not in kb2.entries
+        
+        # 殘缺的行已被截掉，後續追加的紀錄可以正常重播
+        new_id = kb2.create(title="之後", content="內容", tags=[])
+        kb2.close()
+        kb3 = KnowledgeBase(str(db_path), journal=True)
+        assert new_id in kb3.entries
+    
+    def test_plain_mode_merges_leftover_journal(self, db_path):
+        """測試：非日誌模式開啟時併入殘留日誌"""
+        kb1 = KnowledgeBase(str(db_path), journal=True)
+        entry_id = kb1.create(title="殘留", content="內容", tags=[])
+        kb1.close()
+        
+        kb2 = KnowledgeBase(str(db_path))
+        assert entry_id in kb2.entries
+        assert not kb2._storage.journal.path.exists()
+        with open(db_path, 'r', encoding='utf-8') as f:
+            assert entry_id in json.load(f)
+
+
+class TestBulkIngest:
+    """批次匯入測試"""
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        return KnowledgeBase(str(tmp_path / "bulk_kb.json"))
+    
+    @pytest.fixture
+    def snapshot_writes(self, kb, monkeypatch):
+        """計算快照寫入次數"""
+        calls = []
+        original = kb._storage.compact
+        monkeypatch.setattr(kb._storage, "compact", lambda: (calls.append(1), original()))
+        return calls
+    
+    def test_create_many_persists_once(self, kb, snapshot_writes):
+        """測試：整批只寫入一次"""
+        records = ({"title": f"條目{i}", "content": "內容", "tags": ["批次"]} for i in range(50))
+        report = kb.create_many(records)
+        
+        assert len(report["created"]) == 50
+        assert len(set(report["created"])) == 50
+        assert report["errors"] == []
+        assert report["total"] == 50
+        assert report["throughput"] > 0
+        assert len(snapshot_writes) == 1
+        assert len(kb.filter_by_tags(["批次"])) == 50
+    
+    def test_create_many_in_chunks(self, kb, snapshot_writes):
+        """測試：依 chunk_size 分段寫入"""
+        records = [{"title": f"條目{i}", "content": "內容"} for i in range(25)]
+        kb.create_many(records, chunk_size=10)
+        assert len(snapshot_writes) == 3
+    
+    def test_create_many_reports_errors(self, kb):
+        """測試：錯誤資料不中斷匯入"""
+        records = [
+            {"title": "正確", "content": "內容"},
+            {"title": "缺內容"},
+            {"title": "標籤錯誤", "content": "內容", "tags": "python"},
+            "不是物件",
+            {"title": "也正確", "content": "內容", "tags": ["Python"]},
+        ]
+        report = kb.create_many(records)
+        
+        assert len(report["created"]) == 2
+        assert [e["index"] for e in report["errors"]] == [1, 2, 3]
+        assert "缺少 content 欄位" in report["errors"][0]["error"]
+    
+    def test_import_jsonl(self, kb, tmp_path):
+        """測試：從 JSONL 匯入，錯誤以行號回報"""
+        path = tmp_path / "import.jsonl"
+        path.write_text(
+            '{"title": "第一筆", "content": "內容", "tags": ["匯入"]}\n'
+            '\n'
+            '{"title": "壞掉的"\n'
+            '{"title": "第三筆", "content": "內容"}\n',
+            encoding='utf-8'
+        )
+        report = kb.import_jsonl(str(path))
+        
+        assert len(report["created"]) == 2
+        assert report["total"] == 3
+        assert report["errors"][0]["index"] == 3
+        assert "JSON 格式錯誤" in report["errors"][0]["error"]
+    
+    def test_import_sample_data(self, kb):
+        """測試：匯入範例資料"""
+        sample = Path(__file__).parent.parent / "examples" / "sample_data.json"
+        with open(sample, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        report = kb.create_many(data.values())
+        assert len(report["created"]) == len(data)
+        assert len(KnowledgeBase(str(kb.db_path)).entries) == len(data)
+    
+    def test_create_many_sqlite(self, tmp_path):
+        """測試：SQLite 後端整批在同一個交易中提交"""
+        with KnowledgeBase(str(tmp_path / "bulk.db")) as kb:
+            report = kb.create_many({"title": f"條目{i}", "content": "內容"} for i in range(20))
+            assert len(report["created"]) == 20
+        with KnowledgeBase(str(tmp_path / "bulk.db")) as kb:
+            assert len(kb.entries) == 20
+
+
+class TestSharedAccess:
+    """多程序共用與樂觀並行控制測試"""
+    
+    @pytest.fixture(params=[True, False], ids=["journal", "snapshot"])
+    def db_path(self, request, tmp_path):
+        self.journal = request.param
+        return str(tmp_path / "shared_kb.json")
+    
+    def open(self, db_path):
+        return KnowledgeBase(db_path, journal=self.journal, shared=True)
+    
+    def test_sees_other_writers(self, db_path):
+        """測試：讀取時自動載入另一個實例的新增、更新與刪除"""
+        kb1, kb2 = self.open(db_path), self.open(db_path)
+        entry_id = kb1.create(title="Python", content="基礎教學", tags=["python"])
+        assert kb2.read(entry_id)["title"] == "Python"
+        
+        kb2.update(entry_id, content="進階技巧", tags=["進階"])
+        assert [e["id"] for e in kb1.search("進階")] == [entry_id]
+        assert kb1.search("基礎") == []
+        assert kb1.tag_counts() == {"進階": 1}
+        
+        kb1.delete(entry_id)
+        assert kb2.list_all() == []
+    
+    def test_no_lost_writes(self, db_path):
+        """測試：交錯寫入時不會覆蓋對方的條目"""
+        kb1, kb2 = self.open(db_path), self.open(db_path)
+        ids = []
+        for i in range(5):
+            ids.append(kb1.create(title=f"甲{i}", content="內容", tags=[]))
+            ids.append(kb2.create(title=f"乙{i}", content="內容", tags=[]))
+        kb1.close()
+        kb2.close()
+        
+        assert sorted(KnowledgeBase(db_path).entries) == sorted(ids)
+    
+    def test_reload_after_other_compacts(self, db_path):
+        """測試：另一個實例壓縮快照後仍能正確同步"""
+        kb1, kb2 = self.open(db_path), self.open(db_path)
+        first = kb1.create(title="壓縮前", content="內容", tags=[])
+        kb2.compact()
+        second = kb2.create(title="壓縮後", content="內容", tags=[])
+        
+        assert {e["id"] for e in kb1.list_all()} == {first, second}
+    
+    def test_concurrent_processes(self, db_path):
+        """測試：多個行程同時寫入，所有條目都會保留"""
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            batches = list(pool.map(_create_shared, [db_path] * 2, [self.journal] * 2, [50, 50]))
+        
+        kb = KnowledgeBase(db_path, journal=self.journal)
+        assert sorted(kb.entries) == sorted(batches[0] + batches[1])
+        assert kb.tag_counts() == {"共用": 100}
+    
+    def test_version_conflict(self, db_path):
+        """測試：以過期的版本號更新會被拒絕"""
+        kb1, kb2 = self.open(db_path), self.open(db_path)
+        entry_id = kb1.create(title="版本", content="內容", tags=[])
+        version = kb2.read(entry_id)["version"]
+        assert version == 1
+        
+        assert kb1.update(entry_id, title="甲的修改", expected_version=version)
+        with pytest.raises(VersionConflictError):
+            kb2.update(entry_id, title="乙的修改", expected_version=version)
+        with pytest.raises(VersionConflictError):
+            kb2.delete(entry_id, expected_version=version)
+        
+        entry = kb2.read(entry_id)
+        assert entry["title"] == "甲的修改"
+        assert entry["version"] == 2
+        assert kb2.update(entry_id, title="乙的修改", expected_version=2)
+    
+    def test_version_conflict_sqlite(self, tmp_path):
+        """測試：SQLite 後端同樣保存並檢查版本號"""
+        db_path = str(tmp_path / "shared_kb.db")
+        kb1, kb2 = KnowledgeBase(db_path), KnowledgeBase(db_path)
+        entry_id = kb1.create(title="版本", content="內容", tags=[])
+        kb1.update(entry_id, content="新內容", expected_version=1)
+        
+        assert kb2.read(entry_id)["version"] == 2
+        with pytest.raises(VersionConflictError):
+            kb2.update(entry_id, content="舊版本的修改", expected_version=1)
+        kb1.close()
+        kb2.close()
+
+
 # 整合測試
 class TestIntegration:
     """整合測試"""
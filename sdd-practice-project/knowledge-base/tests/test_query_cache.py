@@ -0,0 +1,137 @@
+"""
+查詢結果快取測試
+
+這個檔案包含 QueryCache（LRU 淘汰、簽章過期、統計）
+與知識庫快取失效規則的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from knowledge_base import KnowledgeBase
+from query_cache import QueryCache
+
+
+class TestQueryCache:
+    """QueryCache 測試"""
+
+    def test_hit_and_miss(self):
+        """測試：簽章相同才命中"""
+        cache = QueryCache(4)
+        assert cache.get("q", 1) is None
+        cache.put("q", 1, ("a",))
+        assert cache.get("q", 1) == ("a",)
+        assert cache.get("q", 2) is None
+        assert len(cache) == 0
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self):
+        """測試：超過容量時淘汰最久沒用到的項目"""
+        cache = QueryCache(2)
+        cache.put("a", 0, ())
+        cache.put("b", 0, ())
+        cache.get("a", 0)
+        cache.put("c", 0, ())
+        assert cache.get("b", 0) is None
+        assert cache.get("a", 0) == ()
+        assert cache.stats()["size"] == 2
+
+    def test_disabled(self):
+        """測試：容量 0 代表停用"""
+        cache = QueryCache(0)
+        cache.put("q", 0, ("a",))
+        assert cache.get("q", 0) is None
+        with pytest.raises(ValueError):
+            QueryCache(-1)
+
+
+class TestKnowledgeBaseCache:
+    """知識庫查詢快取整合測試（JSON 與 SQLite 後端）"""
+
+    @pytest.fixture(params=["json", "db"])
+    def db_path(self, request, tmp_path):
+        return str(tmp_path / f"cache_kb.{request.param}")
+
+    @pytest.fixture
+    def kb(self, db_path):
+        kb = KnowledgeBase(db_path)
+        kb.create(title="Python 教學", content="入門", tags=["python", "教學"])
+        kb.create(title="Rust 教學", content="所有權", tags=["rust", "教學"])
+        yield kb
+        kb.close()
+
+    def test_repeated_queries_hit(self, kb):
+        """測試：相同查詢（不分大小寫）第二次命中快取"""
+        first = kb.search("Python")
+        assert kb.search("python") == first
+        kb.filter_by_tags(["教學", "Python"], match="all")
+        kb.filter_by_tags(["python", "教學"], match="all")
+        stats = kb.cache_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+
+    def test_search_invalidated_by_content_changes(self, kb):
+        """測試：新增、修改內容、刪除後搜尋結果更新"""
+        assert len(kb.search("教學")) == 2
+        entry_id = kb.create(title="Go 教學", content="並行", tags=[])
+        assert len(kb.search("教學")) == 3
+        kb.update(entry_id, title="Go 筆記")
+        assert len(kb.search("教學")) == 2
+        kb.delete(kb.search("rust")[0]["id"])
+        assert [e["title"] for e in kb.search("教學")] == ["Python 教學"]
+
+    def test_tag_update_keeps_search_cache(self, kb):
+        """測試：只改標籤不會讓搜尋快取過期，但結果中的條目是最新的"""
+        entry_id = kb.search("python")[0]["id"]
+        kb.update(entry_id, tags=["程式"])
+        results = kb.search("python")
+        assert kb.cache_stats()["hits"] == 1
+        assert results[0]["tags"] == ["程式"]
+
+    def test_filter_invalidated_per_tag(self, kb):
+        """測試：只有查詢用到的標籤改變時，標籤過濾快取才過期"""
+        assert len(kb.filter_by_tags(["rust"])) == 1
+        kb.create(title="無關", content="內容", tags=["python"])
+        assert len(kb.filter_by_tags(["rust"])) == 1
+        assert kb.cache_stats()["hits"] == 1
+
+        kb.create(title="Rust 進階", content="生命週期", tags=["Rust"])
+        assert len(kb.filter_by_tags(["rust"])) == 2
+        assert len(kb.filter_by_tags(["教學"], exclude=["rust"])) == 1
+        entry_id = kb.filter_by_tags(["python"])[0]["id"]
+        kb.update(entry_id, tags=["rust", "教學"])
+        assert len(kb.filter_by_tags(["教學"], exclude=["rust"])) == 1
+
+    def test_query_tags_invalidated(self, kb):
+        """測試：標籤運算式快取在標籤異動後過期"""
+        assert len(kb.query_tags("教學 NOT rust")) == 1
+        kb.create(title="Go 教學", content="並行", tags=["教學"])
+        assert len(kb.query_tags("教學 NOT rust")) == 2
+
+    def test_other_writers_invalidate(self, db_path):
+        """測試：其他連線或程序的寫入也會讓快取過期"""
+        kb = KnowledgeBase(db_path, shared=db_path.endswith(".json"), journal=True)
+        other = KnowledgeBase(db_path, shared=db_path.endswith(".json"), journal=True)
+        assert kb.search("共用") == []
+        other.create(title="共用條目", content="內容", tags=["共用"])
+        assert len(kb.search("共用")) == 1
+        assert len(kb.filter_by_tags(["共用"])) == 1
+        other.close()
+        kb.close()
+
+    def test_cache_disabled(self, db_path):
+        """測試：cache_size=0 停用快取"""
+        kb = KnowledgeBase(db_path, cache_size=0)
+        kb.search("python")
+        kb.search("python")
+        assert kb.cache_stats()["hits"] == 0
+        kb.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
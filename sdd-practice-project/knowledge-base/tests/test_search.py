@@ -0,0 +1,434 @@
+"""
+知識庫搜尋功能測試
+
+這個檔案包含斷詞、倒排索引、模糊搜尋與自動完成的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from knowledge_base import KnowledgeBase
+from search import InvertedIndex, SortedIndex, TagIndex, tokenize
+
+
+class TestTokenize:
+    """斷詞測試"""
+    
+    def test_latin_words_are_lowercased(self):
+        """測試：英文以單字為詞並轉小寫"""
+        assert tokenize("Hello, Python 3") == ["hello", "python", "3"]
+    
+    def test_cjk_unigrams_and_bigrams(self):
+        """測試：中文產生單字與雙字 n-gram"""
+        tokens = tokenize("規格驅動")
+        assert "規" in tokens
+        assert "規格" in tokens
+        assert "驅動" in tokens
+        assert "格驅" in tokens
+    
+    def test_mixed_text(self):
+        """測試：中英文混合"""
+        tokens = tokenize("AI工具")
+        assert "ai" in tokens
+        assert "工具" in tokens
+
+
+class TestInvertedIndex:
+    """倒排索引測試"""
+    
+    @pytest.fixture
+    def index(self):
+        index = InvertedIndex()
+        index.add("a", "Python 教學", "這是關於 Python 的教學")
+        index.add("b", "JavaScript 教學", "這是關於 JavaScript 的教學")
+        index.add("c", "規格驅動開發", "SDD 是一種開發方法論")
+        return index
+    
+    def test_candidates_by_word(self, index):
+        """測試：英文單字查詢"""
+        assert index.candidates("python") == {"a"}
+    
+    def test_candidates_by_partial_word(self, index):
+        """測試：部分單字會展開成完整詞彙"""
+        assert index.candidates("pyth") == {"a"}
+        assert index.candidates("script") == {"b"}
+    
+    def test_candidates_by_cjk_phrase(self, index):
+        """測試：中文片段查詢"""
+        assert index.candidates("教學") == {"a", "b"}
+        assert index.candidates("驅動開") == {"c"}
+    
+    def test_query_without_terms(self, index):
+        """測試：沒有可索引詞彙時回傳 None"""
+        assert index.candidates("!!!") is None
+    
+    def test_remove_document(self, index):
+        """測試：移除文件後不再出現"""
+        index.remove("a")
+        assert index.candidates("python") == set()
+        assert "python" not in index.postings
+        assert len(index) == 2
+    
+    def test_add_replaces_document(self, index):
+        """測試：重複新增會取代舊內容"""
+        index.add("a", "Rust 教學", "內容")
+        assert index.candidates("python") == set()
+        assert index.candidates("rust") == {"a"}
+    
+    @pytest.mark.parametrize("query, exact", [
+        ("python", True), ("PYTH", True), ("教學", True), ("驅", True),
+        ("python 教學", False), ("驅動開", False), ("c++", False), ("!!!", False),
+    ])
+    def test_exact_single_term(self, index, query, exact):
+        """測試：只有單一詞彙的查詢不必再比對原文"""
+        assert index.exact(query) is exact
+    
+    def test_rank_prefers_higher_term_frequency(self, index):
+        """測試：BM25 排序"""
+        index.add("d", "筆記", "Python Python Python")
+        index.add("e", "筆記", "隨手提到 Python 一次，其他內容很長很長很長很長很長")
+        assert index.rank("python", ["e", "d"])[0] == "d"
+        assert index.rank("python", ["e", "d"], limit=1) == ["d"]
+
+
+class TestFuzzySearch:
+    """模糊搜尋測試"""
+    
+    @pytest.fixture
+    def index(self):
+        index = InvertedIndex()
+        index.add("a", "Python 教學", "這是關於 Python 的教學")
+        index.add("b", "JavaScript 教學", "這是關於 JavaScript 的教學")
+        index.add("c", "機器學習入門", "監督式學習與模型訓練")
+        index.add("d", "Typhoon 颱風", "天氣筆記")
+        return index
+    
+    @pytest.mark.parametrize("query, expected", [
+        ("pyhton", "a"),       # 相鄰字母對調
+        ("pythn", "a"),        # 漏字
+        ("javascirpt", "b"),
+        ("機器雪習", "c"),      # 錯字
+        ("學習機器", "c"),      # 片語順序不同
+    ])
+    def test_typos_find_document(self, index, query, expected):
+        """測試：拼字錯誤與不完整片語仍找得到"""
+        results = index.fuzzy(query)
+        assert results[0][0] == expected
+        assert 0 < results[0][1] <= 1
+    
+    def test_unrelated_word_not_similar(self, index):
+        """測試：拼法差很多的詞彙不算相近"""
+        assert "typhoon" not in index.similar_words("python")
+        assert index.similar_words("pyth") == {"python": InvertedIndex.PREFIX_SIMILARITY}
+    
+    def test_exact_match_scores_highest(self, index):
+        """測試：完全相符的分數為 1"""
+        assert index.fuzzy("python") == [("a", 1.0)]
+    
+    def test_top_k_and_min_score(self, index):
+        """測試：只回傳分數最高的 limit 筆，且過濾低分"""
+        assert len(index.fuzzy("教學", limit=1)) == 1
+        assert index.fuzzy("xyzzy") == []
+        assert index.fuzzy("pyhton", min_score=0.99) == []
+    
+    def test_removed_words_leave_vocabulary(self, index):
+        """測試：移除文件後二元組索引同步"""
+        index.remove("d")
+        assert index.similar_words("typhon") == {}
+
+
+class TestKnowledgeBaseSearch:
+    """知識庫搜尋整合測試"""
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        return KnowledgeBase(str(tmp_path / "search_kb.json"))
+    
+    def test_search_tracks_updates(self, kb):
+        """測試：更新與刪除後索引同步"""
+        entry_id = kb.create(title="草稿", content="尚未完成", tags=[])
+        assert kb.search("Python") == []
+        
+        kb.update(entry_id, content="Python 筆記")
+        assert [e["id"] for e in kb.search("python")] == [entry_id]
+        
+        kb.delete(entry_id)
+        assert kb.search("python") == []
+    
+    def test_search_keeps_substring_semantics(self, kb):
+        """測試：候選結果仍需符合原文的連續字串"""
+        kb.create(title="開發流程", content="測試驅動", tags=[])
+        kb.create(title="流程開發", content="內容", tags=[])
+        
+        results = kb.search("開發流")
+        assert len(results) == 1
+        assert results[0]["title"] == "開發流程"
+    
+    @pytest.mark.parametrize("filename", ["match_kb.json", "match_kb.db"])
+    def test_search_matches_substring_scan(self, tmp_path, filename):
+        """測試：略過原文比對的單一詞彙查詢與逐筆比對子字串的結果相同"""
+        kb = KnowledgeBase(str(tmp_path / filename))
+        texts = [("Python 教學", "pythonic 寫法與 Jython"), ("開發流程", "測試驅動開發 TDD"),
+                 ("Über Python", "typing 與 mypy"), ("流程", "python3 script")]
+        for title, content in texts:
+            kb.create(title=title, content=content, tags=[])
+        
+        for query in ["python", "PYTH", "py", "thon3", "開發", "發", "流程開", "ü", "ing 與", "ty"]:
+            expected = sorted(e["id"] for e in kb.list_all()
+                              if query.lower() in e["title"].lower() or query.lower() in e["content"].lower())
+            assert sorted(e["id"] for e in kb.search(query)) == expected, query
+        kb.close()
+    
+    def test_search_index_rebuilt_on_load(self, tmp_path):
+        """測試：重新開啟時重建索引"""
+        db_path = str(tmp_path / "reload_kb.json")
+        entry_id = KnowledgeBase(db_path).create(title="索引", content="重建測試", tags=[])
+        
+        kb = KnowledgeBase(db_path)
+        assert [e["id"] for e in kb.search("重建")] == [entry_id]
+
+
+class TestKnowledgeBaseFuzzySearch:
+    """知識庫模糊搜尋與自動完成整合測試（JSON 與 SQLite 後端）"""
+    
+    @pytest.fixture(params=["json", "db"])
+    def kb(self, request, tmp_path):
+        kb = KnowledgeBase(str(tmp_path / f"fuzzy_kb.{request.param}"))
+        kb.create(title="JavaScript 非同步", content="Promise 與 async 的用法", tags=["JavaScript", "前端"])
+        kb.create(title="Python 教學", content="Python 的 asyncio 入門", tags=["Python", "教學"])
+        kb.create(title="python 進階", content="裝飾器與產生器", tags=["Python", "進階"])
+        kb.create(title="機器學習入門", content="監督式學習與模型訓練", tags=["機器學習"])
+        yield kb
+        kb.close()
+    
+    def test_fuzzy_search(self, kb):
+        """測試：模糊搜尋容許錯字"""
+        assert kb.search("javascirpt") == []
+        results = kb.search("javascirpt", fuzzy=True)
+        assert results[0]["title"] == "JavaScript 非同步"
+        assert kb.search("機器雪習", fuzzy=True)[0]["title"] == "機器學習入門"
+    
+    def test_fuzzy_search_transposition(self, kb):
+        """測試：相鄰字母對調（與原詞沒有共同的三元組）在兩種後端結果相同"""
+        assert kb.search("pyhton") == []
+        results = kb.search("pyhton", fuzzy=True)
+        assert sorted(e["title"] for e in results) == ["Python 教學", "python 進階"]
+    
+    def test_search_limit(self, kb):
+        """測試：limit 只回傳相關度最高的幾筆"""
+        assert len(kb.search("python")) == 2
+        assert len(kb.search("python", limit=1)) == 1
+        assert len(kb.search("pyton", fuzzy=True, limit=1)) == 1
+    
+    def test_suggest(self, kb):
+        """測試：標題與標籤前綴自動完成（不分大小寫）"""
+        suggestions = kb.suggest("Py")
+        assert [item["title"] for item in suggestions["titles"]] == ["Python 教學", "python 進階"]
+        assert suggestions["tags"] == [{"tag": "python", "count": 2}]
+        assert kb.suggest("機器")["tags"] == [{"tag": "機器學習", "count": 1}]
+        assert kb.suggest("py", limit=1)["titles"][0]["title"] == "Python 教學"
+        assert kb.suggest("") == {"titles": [], "tags": []}
+    
+    def test_suggest_tracks_updates(self, kb):
+        """測試：更新標題與刪除後自動完成同步"""
+        entry_id = kb.suggest("java")["titles"][0]["id"]
+        kb.update(entry_id, title="TypeScript 型別")
+        assert kb.suggest("java")["titles"] == []
+        assert kb.suggest("type")["titles"] == [{"id": entry_id, "title": "TypeScript 型別"}]
+        kb.delete(entry_id)
+        assert kb.suggest("type") == {"titles": [], "tags": []}
+
+
+class TestTagIndex:
+    """標籤索引測試"""
+    
+    @pytest.fixture
+    def index(self):
+        index = TagIndex()
+        index.add("a", ["python", "教學"])
+        index.add("b", ["javascript", "教學"])
+        index.add("c", ["python", "進階"])
+        index.add("d", ["user story"])
+        return index
+    
+    @pytest.fixture
+    def universe(self):
+        return ["a", "b", "c", "d"]
+    
+    def test_counts_sorted_by_frequency(self, index):
+        """測試：標籤計數依頻率排序"""
+        counts = index.counts()
+        assert list(counts)[:2] == ["python", "教學"]
+        assert counts["進階"] == 1
+    
+    def test_remove_drops_empty_tags(self, index):
+        """測試：移除後清掉沒有條目的標籤"""
+        index.remove("c", ["python", "進階"])
+        assert index.get("python") == {"a"}
+        assert "進階" not in index.counts()
+    
+    def test_page(self, index):
+        """測試：依排序鍵分頁取出符合標籤條件的條目"""
+        index.add("e", ["python"], key="1")  # 其他條目的排序鍵為空字串，e 排在最後
+        assert index.page(["python", "教學"]) == ["a", "b", "c", "e"]
+        assert index.page(["python", "教學"], reverse=True, limit=2) == ["e", "c"]
+        assert index.page(["python", "教學"], reverse=True, offset=2) == ["b", "a"]
+        assert index.page(["python", "教學"], match="all") == ["a"]
+        assert index.page(["python"], exclude=["進階"]) == ["a", "e"]
+        assert index.page(["python", "教學"], after=("", "a")) == ["b", "c", "e"]
+        assert index.page(["python", "教學"], reverse=True, after=("", "b")) == ["a"]
+        assert index.page([]) == []
+        
+        index.remove("e", ["python"], key="1")
+        assert index.page(["python"]) == ["a", "c"]
+    
+    def test_suggest(self, index):
+        """測試：前綴自動完成依使用頻率排序"""
+        index.add("e", ["pytest"])
+        assert index.suggest("py") == [("python", 2), ("pytest", 1)]
+        assert index.suggest("py", limit=1) == [("python", 2)]
+        index.remove("e", ["pytest"])
+        assert index.suggest("pyt") == [("python", 2)]
+        assert index.suggest("rust") == []
+    
+    @pytest.mark.parametrize("expression, expected", [
+        ("python", {"a", "c"}),
+        ("Python AND 教學", {"a"}),
+        ("python 教學", {"a"}),
+        ("python OR javascript", {"a", "b", "c"}),
+        ("教學 NOT python", {"b"}),
+        ("python AND (教學 OR 進階) NOT 進階", {"a"}),
+        ("NOT python", {"b", "d"}),
+        ('"user story" OR 進階', {"c", "d"}),
+    ])
+    def test_query(self, index, universe, expression, expected):
+        """測試：AND/OR/NOT 運算式"""
+        assert index.query(expression, universe) == expected
+    
+    @pytest.mark.parametrize("expression", ["", "python AND", "(python", "python )"])
+    def test_query_syntax_error(self, index, universe, expression):
+        """測試：語法錯誤"""
+        with pytest.raises(ValueError):
+            index.query(expression, universe)
+
+
+class TestSortedIndex:
+    """排序索引測試"""
+    
+    @pytest.fixture
+    def index(self):
+        index = SortedIndex()
+        for doc_id, key in [("a", "3"), ("b", "1"), ("c", "2"), ("d", "2"), ("e", "5")]:
+            index.add(doc_id, key)
+        return index
+    
+    def test_page_ascending(self, index):
+        """測試：升序分頁（同鍵值依 ID 排序）"""
+        assert index.page() == ["b", "c", "d", "a", "e"]
+        assert index.page(offset=1, limit=2) == ["c", "d"]
+    
+    def test_page_descending(self, index):
+        """測試：降序分頁"""
+        assert index.page(reverse=True) == ["e", "a", "d", "c", "b"]
+        assert index.page(reverse=True, offset=1, limit=2) == ["a", "d"]
+        assert index.page(reverse=True, offset=10, limit=2) == []
+    
+    def test_page_after_cursor(self, index):
+        """測試：從游標之後開始"""
+        assert index.page(after=("2", "c"), limit=2) == ["d", "a"]
+        assert index.page(reverse=True, after=("2", "d")) == ["c", "b"]
+    
+    def test_update_and_remove(self, index):
+        """測試：更新鍵值與移除"""
+        index.add("b", "9")
+        index.remove("e")
+        assert index.page() == ["c", "d", "a", "b"]
+        assert index.key("b") == "9"
+        assert len(index) == 4
+    
+    def test_prefix(self):
+        """測試：前綴查詢依鍵值順序"""
+        index = SortedIndex()
+        for doc_id, key in [("a", "python 教學"), ("b", "pytest"), ("c", "rust"), ("d", "py")]:
+            index.add(doc_id, key)
+        assert index.prefix("py") == ["d", "b", "a"]
+        assert index.prefix("py", limit=2) == ["d", "b"]
+        assert index.prefix("z") == []
+
+
+class TestKnowledgeBaseTags:
+    """知識庫標籤過濾整合測試"""
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        kb = KnowledgeBase(str(tmp_path / "tags_kb.json"))
+        kb.create(title="條目1", content="內容", tags=["Python", "教學"])
+        kb.create(title="條目2", content="內容", tags=["JavaScript", "教學"])
+        kb.create(title="條目3", content="內容", tags=["Python", "進階"])
+        return kb
+    
+    def test_filter_match_all(self, kb):
+        """測試：AND 組合"""
+        results = kb.filter_by_tags(["Python", "教學"], match="all")
+        assert [e["title"] for e in results] == ["條目1"]
+    
+    def test_filter_with_exclude(self, kb):
+        """測試：排除標籤"""
+        results = kb.filter_by_tags(["教學"], exclude=["python"])
+        assert [e["title"] for e in results] == ["條目2"]
+    
+    def test_filter_invalid_match(self, kb):
+        """測試：不支援的組合方式"""
+        with pytest.raises(ValueError, match="不支援的組合方式"):
+            kb.filter_by_tags(["python"], match="xor")
+    
+    @pytest.mark.parametrize("filename", ["page_kb.json", "page_kb.db"])
+    def test_filter_page(self, tmp_path, filename):
+        """測試：標籤過濾的 limit / offset 與游標分頁（依建立時間倒序）"""
+        kb = KnowledgeBase(str(tmp_path / filename))
+        for i in range(25):
+            kb.create(title=f"條目{i}", content="內容", tags=["python" if i % 2 else "rust", "共用"])
+        kb.create(title="排除", content="內容", tags=["python", "舊"])
+        
+        expected = [e["id"] for e in kb.filter_by_tags(["Python", "rust"], exclude=["舊"])]
+        assert len(expected) == 25
+        assert expected == [e["id"] for e in kb.list_all()][1:]
+        assert [e["id"] for e in kb.filter_by_tags(["python", "rust"], exclude=["舊"],
+                                                   limit=5, offset=3)] == expected[3:8]
+        
+        pages, cursor = [], None
+        while True:
+            page = kb.filter_page(["python", "rust"], exclude=["舊"], limit=10, cursor=cursor)
+            pages.append([e["id"] for e in page["entries"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert [len(ids) for ids in pages] == [10, 10, 5]
+        assert sum(pages, []) == expected
+        
+        page = kb.filter_page(["python", "共用"], match="all", limit=3)
+        assert [e["title"] for e in page["entries"]] == ["條目23", "條目21", "條目19"]
+        kb.close()
+    
+    def test_query_tags(self, kb):
+        """測試：標籤運算式查詢"""
+        results = kb.query_tags("python NOT 進階")
+        assert [e["title"] for e in results] == ["條目1"]
+    
+    def test_index_tracks_updates(self, kb):
+        """測試：更新與刪除後標籤索引同步"""
+        entry = kb.filter_by_tags(["進階"])[0]
+        kb.update(entry["id"], tags=["Rust"])
+        assert kb.filter_by_tags(["進階"]) == []
+        assert kb.tag_counts()["python"] == 1
+        
+        kb.delete(entry["id"])
+        assert "rust" not in kb.tag_counts()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,330 @@
+"""
+知識庫儲存後端測試
+
+這個檔案包含 SQLite 儲存後端與 JSON → SQLite 轉換的測試案例。
+"""
+
+import pytest
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from entry_store import ContentSegment
+from knowledge_base import KnowledgeBase
+from storage import JsonStorage, SQLiteEntries, SQLiteStorage, migrate_json_to_sqlite
+
+
+class TestSQLiteStorage:
+    """SQLite 儲存後端測試"""
+    
+    @pytest.fixture
+    def kb(self, tmp_path):
+        """建立臨時 SQLite 知識庫"""
+        kb = KnowledgeBase(str(tmp_path / "test_kb.db"))
+        yield kb
+        kb.close()
+    
+    def test_selected_by_suffix(self, kb):
+        """測試：.db 副檔名使用 SQLite 後端"""
+        assert isinstance(kb._storage, SQLiteStorage)
+        assert isinstance(kb.entries, SQLiteEntries)
+        assert kb.db_path.exists()
+    
+    def test_wal_mode(self, kb):
+        """測試：使用 WAL 模式"""
+        mode = kb._storage.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+    
+    def test_crud(self, kb):
+        """測試：完整 CRUD 流程"""
+        entry_id = kb.create(title="SQLite", content="內容", tags=["DB", "db"])
+        assert entry_id in kb.entries
+        assert kb.read(entry_id)["tags"] == ["db"]
+        
+        assert kb.update(entry_id, title="SQLite 進階", tags=["資料庫"]) is True
+        entry = kb.read(entry_id)
+        assert entry["title"] == "SQLite 進階"
+        assert entry["tags"] == ["資料庫"]
+        assert entry["metadata"]["word_count"] == 2
+        
+        assert kb.delete(entry_id) is True
+        assert kb.read(entry_id) is None
+        assert len(kb.entries) == 0
+    
+    def test_search_uses_fts_and_like(self, kb):
+        """測試：長查詢走全文索引，短查詢走 LIKE"""
+        kb.create(title="Python 教學", content="這是關於 Python 的教學", tags=[])
+        kb.create(title="規格驅動開發", content="SDD 方法論", tags=[])
+        
+        assert [e["title"] for e in kb.search("PYTHON")] == ["Python 教學"]
+        assert [e["title"] for e in kb.search("驅動開發")] == ["規格驅動開發"]
+        assert [e["title"] for e in kb.search("開發")] == ["規格驅動開發"]
+        assert kb.search("100%") == []
+    
+    @pytest.mark.parametrize("query", ["ü", "üb", "Ü", "É", "é", "ÜBER", "élan"])
+    def test_non_ascii_search_matches_json(self, kb, tmp_path, query):
+        """測試：非 ASCII 查詢（含 LIKE 處理的短查詢）不分大小寫，結果與 JSON 後端相同"""
+        json_kb = KnowledgeBase(str(tmp_path / "parity.json"))
+        for target in (kb, json_kb):
+            target.create(title="Über Straße", content="Élan vital", tags=[])
+            target.create(title="Plain", content="ASCII only", tags=[])
+        
+        assert [e["title"] for e in kb.search(query)] == ["Über Straße"]
+        assert [e["title"] for e in json_kb.search(query)] == ["Über Straße"]
+        json_kb.close()
+    
+    def test_lock_rolls_back_on_error(self, kb):
+        """測試：寫入鎖區塊發生例外時不提交未完成的寫入"""
+        entry_id = kb.create(title="原本", content="內容", tags=[])
+        entry = dict(kb.read(entry_id), title="改到一半")
+        with pytest.raises(RuntimeError):
+            with kb._storage.locked():
+                kb._storage._upsert(entry_id, entry)
+                raise RuntimeError("中途失敗")
+        
+        assert not kb._storage.conn.in_transaction
+        assert kb._storage.conn.execute(
+            "SELECT title FROM knowledge_base WHERE id = ?", (entry_id,)).fetchone() == ("原本",)
+    
+    def test_search_tracks_updates(self, kb):
+        """測試：全文索引隨更新同步"""
+        entry_id = kb.create(title="草稿", content="尚未完成", tags=[])
+        kb.update(entry_id, content="Python 筆記")
+        assert [e["id"] for e in kb.search("python")] == [entry_id]
+        kb.delete(entry_id)
+        assert kb.search("python") == []
+    
+    def test_tag_queries(self, kb):
+        """測試：標籤過濾與計數"""
+        kb.create(title="條目1", content="內容", tags=["Python", "教學"])
+        kb.create(title="條目2", content="內容", tags=["JavaScript", "教學"])
+        kb.create(title="條目3", content="內容", tags=["Python", "進階"])
+        
+        assert len(kb.filter_by_tags(["python"])) == 2
+        assert [e["title"] for e in kb.filter_by_tags(["python", "教學"], match="all")] == ["條目1"]
+        assert [e["title"] for e in kb.query_tags("教學 NOT python")] == ["條目2"]
+        assert kb.tag_counts() == {"python": 2, "教學": 2, "javascript": 1, "進階": 1}
+    
+    def test_list_all_sorted_by_database(self, kb):
+        """測試：排序由資料庫索引完成"""
+        kb.create(title="B", content="內容", tags=[])
+        time.sleep(0.01)
+        kb.create(title="A", content="內容", tags=[])
+        
+        assert [e["title"] for e in kb.list_all()] == ["A", "B"]
+        assert [e["title"] for e in kb.list_all(sort_by="created_at", order="asc")] == ["B", "A"]
+        assert [e["title"] for e in kb.list_all(sort_by="title", order="asc")] == ["A", "B"]
+    
+    def test_persistence(self, tmp_path):
+        """測試：重新開啟後資料仍在"""
+        db_path = str(tmp_path / "persist.db")
+        with KnowledgeBase(db_path) as kb1:
+            entry_id = kb1.create(title="持久化", content="內容", tags=["測試"])
+        
+        with KnowledgeBase(db_path) as kb2:
+            assert kb2.read(entry_id)["title"] == "持久化"
+            assert kb2.filter_by_tags(["測試"])[0]["id"] == entry_id
+    
+    def test_fuzzy_vocabulary_backfilled(self, tmp_path):
+        """測試：沒有詞彙表的舊資料庫在開啟時補建，模糊搜尋可用"""
+        db_path = str(tmp_path / "old.db")
+        with KnowledgeBase(db_path) as kb:
+            entry_id = kb.create(title="Python 教學", content="內容", tags=[])
+            kb._storage.conn.executescript("DROP TABLE entry_words; DROP TABLE word_bigrams;")
+        
+        with KnowledgeBase(db_path) as kb:
+            assert [e["id"] for e in kb.search("pyhton", fuzzy=True)] == [entry_id]
+            kb.delete(entry_id)
+            assert kb.search("pyhton", fuzzy=True) == []
+    
+    def test_tag_order_backfilled(self, tmp_path):
+        """測試：標籤表沒有建立時間欄位的舊資料庫在開啟時補上，標籤分頁可用"""
+        db_path = str(tmp_path / "old_tags.db")
+        with KnowledgeBase(db_path) as kb:
+            ids = [kb.create(title=f"條目{i}", content="內容", tags=["python"]) for i in range(3)]
+            kb._storage.conn.executescript(
+                "DROP INDEX idx_entry_tags_created; ALTER TABLE entry_tags DROP COLUMN created_at;")
+        
+        with KnowledgeBase(db_path) as kb:
+            page = kb.filter_page(["python"], limit=2)
+            assert [e["id"] for e in page["entries"]] == ids[:0:-1]
+            assert [e["id"] for e in kb.filter_page(["python"], cursor=page["next_cursor"])["entries"]] == ids[:1]
+    
+    def test_export_json(self, kb, tmp_path, monkeypatch):
+        """測試：匯出逐筆讀取條目"""
+        monkeypatch.chdir(tmp_path)
+        kb.create(title="匯出", content="內容", tags=[])
+        assert Path(kb.export(format="json")).exists()
+
+
+class TestSplitLayout:
+    """區段檔模式測試"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "split_kb.json")
+    
+    @pytest.fixture
+    def segment_reads(self, monkeypatch):
+        """記錄從區段檔解碼內容的次數"""
+        calls = []
+        original = ContentSegment.read
+        monkeypatch.setattr(ContentSegment, "read",
+                            lambda self, span: calls.append(span) or original(self, span))
+        return calls
+    
+    def fill(self, db_path, count=5, **options):
+        kb = KnowledgeBase(db_path, split_content=True, **options)
+        ids = [kb.create(title=f"標題{i}", content=f"第 {i} 篇內容", tags=[f"t{i % 2}"])
+               for i in range(count)]
+        kb.compact()
+        kb.close()
+        return ids
+    
+    def test_metadata_and_segment_files(self, db_path):
+        """測試：快照檔只含中繼資料，內容存在區段檔"""
+        self.fill(db_path)
+        with open(db_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        
+        assert snapshot["layout"] == "split"
+        assert all("content" not in entry for entry in snapshot["entries"].values())
+        segment = Path(db_path).with_name(snapshot["segment"]).read_bytes().decode('utf-8')
+        assert "第 3 篇內容" in segment
+    
+    def test_content_decoded_on_demand(self, db_path, segment_reads):
+        """測試：開啟、列出標籤與計數時不解碼內容，讀取條目時才解碼"""
+        ids = self.fill(db_path)
+        
+        kb = KnowledgeBase(db_path)
+        assert kb.tag_counts() == {"t0": 3, "t1": 2}
+        assert len(kb.list_page(limit=2)["entries"]) == 2
+        assert len(segment_reads) == 2
+        
+        assert kb.read(ids[3])["content"] == "第 3 篇內容"
+        assert [e["id"] for e in kb.search("第 4 篇")] == [ids[4]]
+        kb.close()
+    
+    def test_appends_new_content_to_segment(self, db_path):
+        """測試：壓縮時只追加新內容，不重寫整個區段檔"""
+        self.fill(db_path, journal=True)
+        kb = KnowledgeBase(db_path, journal=True)
+        segment = kb.entries.segment.path
+        size = segment.stat().st_size
+        
+        entry_id = kb.create(title="新條目", content="新內容", tags=[])
+        kb.compact()
+        assert kb.entries.segment.path == segment
+        assert segment.stat().st_size == size + len("新內容".encode('utf-8'))
+        kb.close()
+        
+        assert KnowledgeBase(db_path).read(entry_id)["content"] == "新內容"
+    
+    def test_rewrites_segment_when_mostly_garbage(self, db_path):
+        """測試：失效內容過多時改寫新的區段檔並刪除舊檔"""
+        ids = self.fill(db_path)
+        kb = KnowledgeBase(db_path)
+        old_segment = kb.entries.segment.path
+        for entry_id in ids[1:]:
+            kb.delete(entry_id)
+        kb.update(ids[0], content="更新")
+        
+        assert kb.entries.segment.path != old_segment
+        assert not old_segment.exists()
+        assert kb.entries.segment.path.read_bytes() == "更新".encode('utf-8')
+        kb.close()
+    
+    def test_convert_between_layouts(self, db_path):
+        """測試：split_content 可在兩種格式之間轉換"""
+        kb = KnowledgeBase(db_path)
+        entry_id = kb.create(title="轉換", content="內容", tags=["格式"])
+        kb.close()
+        
+        kb = KnowledgeBase(db_path, split_content=True)
+        segment = kb.entries.segment.path
+        kb.close()
+        assert KnowledgeBase(db_path).read(entry_id)["content"] == "內容"
+        
+        kb = KnowledgeBase(db_path, split_content=False)
+        kb.close()
+        assert not segment.exists()
+        with open(db_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)[entry_id]["content"] == "內容"
+    
+    def test_shared_reload(self, db_path):
+        """測試：共用模式下另一個程序重寫區段檔後仍讀到正確內容"""
+        ids = self.fill(db_path, count=2)
+        kb1 = KnowledgeBase(db_path, shared=True)
+        kb2 = KnowledgeBase(db_path, shared=True)
+        kb2.update(ids[0], content="改過的內容")
+        kb2.delete(ids[1])
+        
+        assert [e["id"] for e in kb1.search("改過")] == [ids[0]]
+        assert kb1.read(ids[1]) is None
+        kb1.close()
+        kb2.close()
+
+
+class TestMigration:
+    """JSON → SQLite 轉換測試"""
+    
+    def test_migrate_sample_data(self, tmp_path):
+        """測試：轉換範例資料"""
+        sample = Path(__file__).parent.parent / "examples" / "sample_data.json"
+        json_path = tmp_path / "sample.json"
+        json_path.write_text(sample.read_text(encoding='utf-8'), encoding='utf-8')
+        
+        count = migrate_json_to_sqlite(json_path, tmp_path / "sample.db")
+        
+        source = JsonStorage(json_path).load()
+        assert count == len(source)
+        with KnowledgeBase(str(tmp_path / "sample.db")) as kb:
+            assert len(kb.entries) == count
+            for entry_id, entry in source.items():
+                # 範例資料沒有版本欄位，轉換後視為第 1 版
+                assert kb.read(entry_id) == {"version": 1, **entry}
+    
+    def test_migrate_includes_journal(self, tmp_path):
+        """測試：尚未壓縮的日誌也會被轉換，且不改寫來源快照"""
+        json_path = tmp_path / "journal.json"
+        kb = KnowledgeBase(str(json_path), journal=True)
+        entry_id = kb.create(title="日誌中", content="內容", tags=[])
+        kb.close()
+        snapshot = json_path.read_text(encoding='utf-8')
+        
+        assert migrate_json_to_sqlite(json_path, tmp_path / "journal.db") == 1
+        assert json_path.read_text(encoding='utf-8') == snapshot
+        
+        conn = sqlite3.connect(str(tmp_path / "journal.db"))
+        assert conn.execute("SELECT id FROM knowledge_base").fetchall() == [(entry_id,)]
+        conn.close()
+    
+    def test_migrate_split_layout(self, tmp_path):
+        """測試：區段檔模式的內容也會被轉換"""
+        json_path = tmp_path / "split.json"
+        kb = KnowledgeBase(str(json_path), split_content=True)
+        ids = [kb.create(title=f"標題{i}", content=f"第 {i} 篇內容", tags=["區段"])
+               for i in range(3)]
+        kb.close()
+        
+        assert migrate_json_to_sqlite(json_path, tmp_path / "split.db") == 3
+        with KnowledgeBase(str(tmp_path / "split.db")) as kb:
+            assert [kb.read(entry_id)["content"] for entry_id in ids] == \
+                ["第 0 篇內容", "第 1 篇內容", "第 2 篇內容"]
+    
+    def test_migrate_missing_source(self, tmp_path):
+        """測試：來源不存在時拋出錯誤，且不建立空的來源檔"""
+        json_path = tmp_path / "missing.json"
+        
+        with pytest.raises(FileNotFoundError):
+            migrate_json_to_sqlite(json_path, tmp_path / "missing.db")
+        assert not json_path.exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -10,34 +10,121 @@
 4. 或使用 GitHub Spec Kit: /speckit.implement
 
 TODO: 根據規格實作以下功能
-- [ ] 新聞內容提取（URL 或文字）
-- [ ] 三種受眾類型的 Prompt 模板
-- [ ] OpenAI/Anthropic API 整合
+- [x] 新聞內容提取（URL 或文字）
+- [x] 三種受眾類型的 Prompt 模板
+- [x] OpenAI/Anthropic API 整合（llm_engine：並行、限速、重試）
 - [ ] 驗收標準自動化檢查
-- [ ] 成本追蹤
+- [x] 成本追蹤
 """
 
-from typing import Dict, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from html.parser import HTMLParser
+from typing import Awaitable, Dict, List, Optional, Sequence, TypeVar
+
+import requests
+
+from llm_engine import LLMEngine, LLMError
+from prompts import get_prompt
+
+# 建議的最短新聞長度（E004）
+MIN_NEWS_LENGTH = 300
+
+T = TypeVar("T")
+
+# 每百萬 token 的預估價格（美元，輸入 / 輸出），依實際方案調整
+PRICING_PER_MILLION = {
+    "openai": (0.15, 0.60),
+    "anthropic": (0.80, 4.00),
+}
+
+
+class _ArticleTextParser(HTMLParser):
+    """取出網頁標題與內文（略過 script、style、導覽列等非內文區塊）"""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "article", "section"}
+
+    def __init__(self):
+        super().__init__()
+        self.title = ""
+        self.parts: List[str] = []
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data.strip()
+        elif not self._skipping:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        lines = (line.strip() for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
 
 
 class NewsToLessonConverter:
-    """新聞轉教案轉換器"""
+    """
+    新聞轉教案轉換器
+
+    同步方法（convert_*）在已有事件迴圈的環境（例如 Jupyter）中也能呼叫，
+    會改在另一個執行緒執行；在協程中建議直接 await 對應的 aconvert_* 方法。
+    用完以 close() 或 with 陳述式釋放請求用的執行緒。
+    """
     
-    def __init__(self, api_key: str, provider: str = "openai"):
+    def __init__(self, api_key: str, provider: str = "openai", **engine_options):
         """
         初始化轉換器
         
         Args:
             api_key: API Key (OpenAI 或 Anthropic)
             provider: API 提供者 ("openai" 或 "anthropic")
+            **engine_options: 傳給 LLMEngine 的設定（base_url、concurrency、
+                requests_per_minute、tokens_per_minute、max_retries 等）
+            
+        Raises:
+            ValueError: 不支援的 API 提供者
         """
         self.api_key = api_key
         self.provider = provider
         self.supported_audiences = ["executive", "adult", "senior"]
-        
-        # TODO: 初始化 API 客戶端
-        pass
+        self.engine = LLMEngine(api_key, provider=provider, **engine_options)
+        self.lessons_generated = 0
+    
+    def close(self):
+        """釋放 LLMEngine 的執行緒"""
+        self.engine.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    @staticmethod
+    def _run(coroutine: Awaitable[T]) -> T:
+        """同步執行協程；目前執行緒已有事件迴圈時（asyncio.run 會失敗）改在新的執行緒執行"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
     
     def convert_from_url(self, url: str, audience: str = "adult") -> Dict:
         """
@@ -48,17 +135,13 @@ class NewsToLessonConverter:
             audience: 受眾類型 (executive/adult/senior)
             
         Returns:
-            教案內容（Markdown 格式）
+            教案內容（Markdown 格式，見 convert_from_text）
             
         Raises:
             ValueError: 受眾類型不支援或 URL 無法訪問
+            LLMError: API 調用失敗
         """
-        # TODO: 實作 URL 解析
-        # TODO: 提取新聞內容
-        # TODO: 調用 AI API 生成教案
-        # TODO: 驗收標準檢查
-        
-        raise NotImplementedError("請根據規格實作此功能")
+        return self._run(self.aconvert_from_url(url, audience))
     
     def convert_from_text(self, text: str, audience: str = "adult") -> Dict:
         """
@@ -69,64 +152,140 @@ class NewsToLessonConverter:
             audience: 受眾類型
             
         Returns:
-            教案內容
+            {"audience", "source", "generated_at", "content": Markdown 教案,
+             "usage": {"input_tokens", "output_tokens", "cost_usd"}, "warnings"}
+            
+        Raises:
+            ValueError: 受眾類型不支援
+            LLMError: API 調用失敗（APIKeyError、QuotaExceededError 為其子類別）
         """
-        # TODO: 實作文字轉換
-        raise NotImplementedError("請根據規格實作此功能")
+        return self._run(self.aconvert_from_text(text, audience))
     
-    def _get_prompt_template(self, audience: str) -> str:
+    def convert_batch(self, texts: Sequence[str],
+                      audiences: Optional[Sequence[str]] = None) -> List[Dict]:
         """
-        取得對應受眾的 Prompt 模板
+        批次轉換：每篇新聞 × 每種受眾同時生成（同時進行的數量由 LLMEngine 控制）
         
         Args:
-            audience: 受眾類型
+            texts: 新聞文字列表
+            audiences: 受眾類型（None 代表全部三種）
             
         Returns:
-            Prompt 模板字串
+            結果列表（順序為 texts × audiences）；失敗的項目為
+            {"index", "audience", "error", "code"}
+            
+        Raises:
+            ValueError: 受眾類型不支援
         """
-        # TODO: 實作三種受眾的 Prompt 模板
-        # 參考 specs/news-to-lesson.spec.md 中的模板
+        return self._run(self.aconvert_batch(texts, audiences))
+    
+    async def aconvert_from_url(self, url: str, audience: str = "adult") -> Dict:
+        """convert_from_url 的 asyncio 版本（下載網頁在執行緒中進行）"""
+        self._check_audience(audience)
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(None, self._fetch_article, url)
+        return await self.aconvert_from_text(text, audience, source=url)
+    
+    async def aconvert_from_text(self, text: str, audience: str = "adult",
+                                 source: str = "直接輸入") -> Dict:
+        """convert_from_text 的 asyncio 版本"""
+        self._check_audience(audience)
+        warnings = []
+        if len(text.strip()) < MIN_NEWS_LENGTH:
+            warnings.append(f"內容過短（{len(text.strip())}字），建議至少 {MIN_NEWS_LENGTH} 字")
         
-        templates = {
-            "executive": """
-你是一位商業顧問，請將以下新聞轉換為適合企業高管的教學內容。
-
-要求：
-- 專業術語密度：12-15%
-- 強調 ROI 和商業價值
-- 包含至少一個企業案例
-- 結論先行結構
-
-新聞內容：
-{news_content}
-""",
-            "adult": """
-你是一位實用主義教師，請將以下新聞轉換為適合成人學員的教學內容。
-
-要求：
-- 實用案例導向
-- 問句比例：10-15%
-- 平易近人的語氣
-- 包含行動建議
-
-新聞內容：
-{news_content}
-""",
-            "senior": """
-你是一位耐心的教育者，請將以下新聞轉換為適合年長者的教學內容。
-
-要求：
-- 淺顯易懂
-- 豐富的類比說明
-- 專業術語需解釋
-- 避免複雜句型
-
-新聞內容：
-{news_content}
-"""
+        response = await self.engine.generate(get_prompt(audience, text))
+        self.lessons_generated += 1
+        return {
+            "audience": audience,
+            "source": source,
+            "generated_at": datetime.now().isoformat(),
+            "content": response["content"],
+            "usage": {
+                "input_tokens": response["input_tokens"],
+                "output_tokens": response["output_tokens"],
+                "cost_usd": self._cost(response["input_tokens"], response["output_tokens"]),
+            },
+            "warnings": warnings,
+        }
+    
+    async def aconvert_batch(self, texts: Sequence[str],
+                             audiences: Optional[Sequence[str]] = None) -> List[Dict]:
+        """convert_batch 的 asyncio 版本"""
+        audiences = list(audiences or self.supported_audiences)
+        for audience in audiences:
+            self._check_audience(audience)
+        jobs = [(index, text, audience) for index, text in enumerate(texts) for audience in audiences]
+        results = await asyncio.gather(
+            *(self.aconvert_from_text(text, audience) for _, text, audience in jobs),
+            return_exceptions=True)
+        
+        output = []
+        for (index, _, audience), result in zip(jobs, results):
+            if isinstance(result, LLMError):
+                output.append({"index": index, "audience": audience,
+                               "error": str(result), "code": result.code})
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                output.append(dict(result, index=index))
+        return output
+    
+    def usage_stats(self) -> Dict:
+        """
+        使用統計（成本追蹤）
+        
+        Returns:
+            {"lessons", "requests", "retries", "input_tokens", "output_tokens",
+             "total_tokens", "cost_usd", "avg_cost_per_lesson_usd"}
+        """
+        usage = self.engine.usage
+        cost = self._cost(usage["input_tokens"], usage["output_tokens"])
+        return {
+            "lessons": self.lessons_generated,
+            **usage,
+            "total_tokens": usage["input_tokens"] + usage["output_tokens"],
+            "cost_usd": cost,
+            "avg_cost_per_lesson_usd": round(cost / self.lessons_generated, 6)
+            if self.lessons_generated else 0.0,
         }
+    
+    def _cost(self, input_tokens: int, output_tokens: int) -> float:
+        """預估成本（美元）"""
+        input_price, output_price = PRICING_PER_MILLION[self.provider]
+        return round((input_tokens * input_price + output_tokens * output_price) / 1_000_000, 6)
+    
+    def _check_audience(self, audience: str):
+        """
+        Raises:
+            ValueError: 受眾類型不支援
+        """
+        if audience not in self.supported_audiences:
+            raise ValueError(
+                f"不支援的受眾類型: {audience}。"
+                f"支援的類型: {', '.join(self.supported_audiences)}"
+            )
+    
+    def _fetch_article(self, url: str) -> str:
+        """
+        下載網頁並取出標題與內文
+        
+        Raises:
+            ValueError: 網址無法訪問（E002）或沒有內文
+        """
+        try:
+            response = requests.get(url, timeout=10)
+        except requests.RequestException:
+            response = None
+        if response is None or response.status_code != 200:
+            raise ValueError("無法訪問該網址，建議直接貼上文字內容（convert_from_text）")
         
-        return templates.get(audience, templates["adult"])
+        parser = _ArticleTextParser()
+        parser.feed(response.text)
+        text = parser.text()
+        if not text:
+            raise ValueError("無法從網頁取出新聞內容，建議直接貼上文字內容（convert_from_text）")
+        return f"{parser.title}\n\n{text}" if parser.title else text
     
     def validate_output(self, content: str, audience: str) -> Dict:
         """
@@ -149,26 +308,46 @@ class NewsToLessonConverter:
 
 def main():
     """主程式入口"""
-    import sys
+    import argparse
+    import json
     import os
+    import sys
+    
+    parser = argparse.ArgumentParser(description="新聞轉教案生成器")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="新聞文章 URL")
+    source.add_argument("--file", help="新聞文字檔路徑")
+    parser.add_argument("--audience", default="adult", help="受眾類型 (executive/adult/senior)")
+    args = parser.parse_args()
     
     # 檢查 API Key
-    api_key = os.getenv("OPENAI_API_KEY") or os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
+    if os.getenv("OPENAI_API_KEY"):
+        api_key, provider = os.getenv("OPENAI_API_KEY"), "openai"
+    elif os.getenv("ANTHROPIC_API_KEY"):
+        api_key, provider = os.getenv("ANTHROPIC_API_KEY"), "anthropic"
+    else:
         print("❌ 錯誤: 請設定 OPENAI_API_KEY 或 ANTHROPIC_API_KEY 環境變數")
         print("\n設定方式:")
         print("  export OPENAI_API_KEY='your-api-key'")
         sys.exit(1)
     
-    print("📰 新聞轉教案生成器")
-    print("=" * 50)
-    print("\n⚠️  此程式需要根據規格完成實作")
-    print("\n請參考:")
-    print("  1. specs/news-to-lesson.spec.md")
-    print("  2. 複製「完整規格複製區」給 AI 工具")
-    print("  3. 或使用 GitHub Spec Kit 自動實作")
-    print("\n" + "=" * 50)
-
+    # 也接受中文的受眾名稱
+    aliases = {"企業高管": "executive", "成人學員": "adult", "年長者": "senior"}
+    audience = aliases.get(args.audience, args.audience)
+    
+    with NewsToLessonConverter(api_key, provider=provider) as converter:
+        try:
+            if args.url:
+                result = converter.convert_from_url(args.url, audience=audience)
+            else:
+                with open(args.file, 'r', encoding='utf-8') as f:
+                    result = converter.convert_from_text(f.read(), audience=audience)
+        except (ValueError, LLMError, OSError) as e:
+            print(f"❌ 錯誤: {e}")
+            sys.exit(1)
+        
+        print(result["content"])
+        print(json.dumps(converter.usage_stats(), ensure_ascii=False, indent=2), file=sys.stderr)
 
 if __name__ == "__main__":
     main()
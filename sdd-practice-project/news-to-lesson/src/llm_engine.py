@@ -0,0 +1,322 @@
+"""
+LLM 請求引擎
+
+以 asyncio 同時送出多個生成請求（每天數百篇新聞 × 三種受眾，單次生成可能長達 30 秒）：
+
+- Semaphore 限制同時進行的請求數
+- 每個提供者各自的 token bucket：每分鐘請求數與每分鐘 token 數
+- 429、5xx、逾時與連線錯誤以隨機抖動的指數退避重試（最多 max_retries 次），
+  伺服器回傳 Retry-After 時以它為準
+- API Key 無效（E001）與額度不足（E005）不重試，直接拋出
+
+HTTP 請求以標準函式庫 urllib 在執行緒中送出，不阻塞事件迴圈，也不需要額外套件；
+base_url 可以指向本機的模擬伺服器做測試。
+
+使用方式：
+
+    engine = LLMEngine(api_key, provider="openai", concurrency=8)
+    results = asyncio.run(engine.generate_many(prompts))
+"""
+
+import asyncio
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 各提供者的 API 設定與預設限額（依實際方案調整）
+PROVIDERS = {
+    "openai": {
+        "base_url": "https://api.openai.com",
+        "path": "/v1/chat/completions",
+        "model": "gpt-4o-mini",
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200_000,
+    },
+    "anthropic": {
+        "base_url": "https://api.anthropic.com",
+        "path": "/v1/messages",
+        "model": "claude-3-5-haiku-latest",
+        "requests_per_minute": 50,
+        "tokens_per_minute": 50_000,
+    },
+}
+ANTHROPIC_VERSION = "2023-06-01"
+
+# 需要重試的 HTTP 狀態碼
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMError(RuntimeError):
+    """API 調用失敗（重試後仍失敗）"""
+
+    code = "E003"
+
+
+class APIKeyError(LLMError):
+    """API Key 無效"""
+
+    code = "E001"
+
+
+class QuotaExceededError(LLMError):
+    """API 額度不足"""
+
+    code = "E005"
+
+
+class _RetryableError(Exception):
+    """可重試的錯誤（內部使用）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    非同步 token bucket
+
+    以固定速率補充額度，最多累積 capacity；額度不足時等待到補足為止。
+    多個協程依序取得額度（先到先得），不會因為小請求插隊讓大請求一直等不到。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: 每秒補充的額度
+            capacity: 最大額度（可連續使用的量）
+
+        Raises:
+            ValueError: rate 或 capacity 不是正數
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError(f"rate 與 capacity 必須大於 0: {rate}, {capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1):
+        """
+        取得額度（必要時等待）
+
+        Args:
+            amount: 需要的額度，超過 capacity 時以 capacity 計算
+        """
+        amount = min(amount, self.capacity)
+        # 同步介面每次以 asyncio.run 建立新的事件迴圈，鎖要跟著換
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """保守估計一次請求的 token 數（中文約一字一 token）"""
+    return len(prompt) + max_tokens
+
+
+class LLMEngine:
+    """並行、限速、自動重試的 LLM 請求引擎"""
+
+    def __init__(self, api_key: str, provider: str = "openai", base_url: Optional[str] = None,
+                 model: Optional[str] = None, concurrency: int = 8,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_tokens: int = 2000, timeout: float = 30.0, max_retries: int = 3,
+                 backoff: float = 1.0, max_backoff: float = 20.0):
+        """
+        初始化
+
+        Args:
+            api_key: API Key
+            provider: 提供者（"openai" 或 "anthropic"）
+            base_url: API 位址（None 代表官方位址；測試時指向模擬伺服器）
+            model: 模型名稱（None 代表提供者的預設模型）
+            concurrency: 同時進行的請求數上限
+            requests_per_minute: 每分鐘請求數上限（None 代表提供者預設值）
+            tokens_per_minute: 每分鐘 token 數上限（None 代表提供者預設值）
+            max_tokens: 每次生成的 token 上限
+            timeout: 單次請求逾時（秒）
+            max_retries: 失敗後最多重試次數
+            backoff: 第一次重試的退避上限（秒），之後每次加倍
+            max_backoff: 退避時間上限（秒）
+
+        Raises:
+            ValueError: 不支援的提供者或 concurrency 小於 1
+        """
+        if provider not in PROVIDERS:
+            raise ValueError(f"不支援的 API 提供者: {provider}。支援: {', '.join(PROVIDERS)}")
+        if concurrency < 1:
+            raise ValueError(f"concurrency 必須大於 0: {concurrency}")
+        config = PROVIDERS[provider]
+        self.api_key = api_key
+        self.provider = provider
+        self.url = (base_url or config["base_url"]).rstrip("/") + config["path"]
+        self.model = model or config["model"]
+        self.concurrency = concurrency
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        rpm = requests_per_minute or config["requests_per_minute"]
+        tpm = tokens_per_minute or config["tokens_per_minute"]
+        # 額度以一分鐘為單位累積，允許短時間的突發請求
+        self.request_bucket = TokenBucket(rpm / 60, rpm)
+        self.token_bucket = TokenBucket(tpm / 60, tpm)
+
+        self.usage = {"requests": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def generate(self, prompt: str) -> Dict:
+        """
+        生成一次回應
+
+        Args:
+            prompt: 提示詞
+
+        Returns:
+            {"content": 生成的文字, "input_tokens", "output_tokens", "attempts": 嘗試次數}
+
+        Raises:
+            APIKeyError: API Key 無效
+            QuotaExceededError: API 額度不足
+            LLMError: 重試後仍失敗
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        url, headers, payload = self._build_request(prompt)
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.request_bucket.acquire()
+                await self.token_bucket.acquire(_estimate_tokens(prompt, self.max_tokens))
+                try:
+                    data = await loop.run_in_executor(self._executor, self._post,
+                                                      url, headers, payload)
+                except _RetryableError as e:
+                    if attempt == self.max_retries:
+                        raise LLMError(f"API 調用失敗（已重試 {self.max_retries} 次）: {e}") from e
+                    self.usage["retries"] += 1
+                    await asyncio.sleep(self._delay(attempt, e.retry_after))
+                    continue
+
+                content, input_tokens, output_tokens = self._parse_response(data)
+                self.usage["requests"] += 1
+                self.usage["input_tokens"] += input_tokens
+                self.usage["output_tokens"] += output_tokens
+                return {
+                    "content": content,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "attempts": attempt + 1,
+                }
+
+    async def generate_many(self, prompts: Iterable[str]) -> List:
+        """
+        同時生成多個回應（同時進行的數量受 concurrency 與限額控制）
+
+        Returns:
+            每個提示詞的結果（順序相同）；失敗的項目為對應的 LLMError
+        """
+        return await asyncio.gather(*(self.generate(prompt) for prompt in prompts),
+                                    return_exceptions=True)
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """退避時間：Retry-After 優先，否則在指數上限內隨機（full jitter）"""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _build_request(self, prompt: str) -> Tuple[str, Dict, Dict]:
+        """依提供者組成請求的 (url, headers, payload)"""
+        messages = [{"role": "user", "content": prompt}]
+        if self.provider == "anthropic":
+            headers = {"x-api-key": self.api_key, "anthropic-version": ANTHROPIC_VERSION}
+        else:
+            headers = {"Authorization": f"Bearer {self.api_key}"}
+        headers["Content-Type"] = "application/json"
+        payload = {"model": self.model, "max_tokens": self.max_tokens, "messages": messages}
+        return self.url, headers, payload
+
+    def _parse_response(self, data: Dict) -> Tuple[str, int, int]:
+        """
+        取出生成內容與 token 用量
+
+        Raises:
+            LLMError: 回應格式不符
+        """
+        try:
+            usage = data.get("usage", {})
+            if self.provider == "anthropic":
+                content = "".join(block["text"] for block in data["content"]
+                                  if block.get("type") == "text")
+                return content, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+            content = data["choices"][0]["message"]["content"]
+            return content, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"無法解析 API 回應: {e}") from e
+
+    def _post(self, url: str, headers: Dict, payload: Dict) -> Dict:
+        """
+        送出請求（在執行緒中執行）
+
+        Raises:
+            APIKeyError: 401 / 403
+            QuotaExceededError: 額度不足（402，或 429 且錯誤類型為額度不足）
+            _RetryableError: 可重試的錯誤
+            LLMError: 其他不可重試的錯誤
+        """
+        request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                         headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            body = e.read().decode('utf-8', errors='replace')
+            if e.code in (401, 403):
+                raise APIKeyError("API Key 無效，請檢查設定（環境變數 OPENAI_API_KEY 或 ANTHROPIC_API_KEY）")
+            if e.code == 402 or (e.code == 429 and "insufficient_quota" in body):
+                raise QuotaExceededError("API 額度不足，請確認帳戶餘額")
+            if e.code in RETRY_STATUS:
+                raise _RetryableError(f"HTTP {e.code}", _retry_after(e.headers.get("Retry-After")))
+            raise LLMError(f"API 調用失敗: HTTP {e.code} {body[:200]}")
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise _RetryableError(str(e))
+        except json.JSONDecodeError as e:
+            raise LLMError(f"無法解析 API 回應: {e}")
+
+    def close(self):
+        """關閉請求用的執行緒"""
+        self._executor.shutdown(wait=False)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒數）；無法解析時回傳 None"""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
@@ -108,13 +108,13 @@ SENIOR_PROMPT = """
 **生成時間：** [當前時間]  
 **原文來源：** [URL or "直接輸入"]
 
-## 📋 簡單說明
+## 📋 摘要
 [用最簡單的語言解釋這篇新聞在說什麼]
 
-## 🎯 重點整理
-1. [重點 1 - 用類比說明]
-2. [重點 2 - 舉生活例子]
-3. [重點 3 - 避免專業術語]
+## 🎯 知識點
+1. [知識點 1 - 用類比說明]
+2. [知識點 2 - 舉生活例子]
+3. [知識點 3 - 避免專業術語]
 
 ## 💡 舉例說明
 [用熟悉的事物類比，例如：「就像...一樣」]
@@ -0,0 +1,137 @@
+"""
+pytest 共用設定
+
+- --run-integration：執行需要真實 API Key 的整合測試
+- mock_llm_server：本機的 OpenAI / Anthropic 模擬伺服器
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """加入自訂 pytest 選項"""
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="執行整合測試（需要真實 API Key）"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: 需要 --run-integration 參數才執行")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-integration"):
+        return
+    skip = pytest.mark.skip(reason="需要 --run-integration 參數才執行")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip)
+
+
+class MockLLMServer:
+    """
+    模擬 OpenAI（/v1/chat/completions）與 Anthropic（/v1/messages）的 API
+
+    可設定：
+    - failures：前幾個請求回傳的錯誤狀態碼（依序取用）
+    - delay：每個請求的處理時間（秒）
+    - overlap：每個請求等到同時進行的請求數曾達到此數量才回應（0 表示不等待）
+    - valid_key：有效的 API Key，其他 Key 回傳 401
+    """
+
+    def __init__(self):
+        self.failures = []
+        self.retry_after = None
+        self.delay = 0.0
+        self.valid_key = "test-api-key"
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.overlap = 0
+        self._overlapped = threading.Event()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with mock._lock:
+                    mock.requests.append({"path": self.path,
+                                          "headers": {k.lower(): v for k, v in self.headers.items()},
+                                          "body": body})
+                    failure = mock.failures.pop(0) if mock.failures else None
+                    mock.active += 1
+                    mock.max_active = max(mock.max_active, mock.active)
+                    if mock.max_active >= mock.overlap:
+                        mock._overlapped.set()
+                try:
+                    # 逾時只是避免測試卡住；沒等到時 max_active 的斷言會失敗
+                    mock._overlapped.wait(timeout=5)
+                    time.sleep(mock.delay)
+                    key = self.headers.get("x-api-key") or \
+                        self.headers.get("Authorization", "").replace("Bearer ", "")
+                    if key != mock.valid_key:
+                        self._reply(401, {"error": {"type": "invalid_api_key"}})
+                    elif failure is not None:
+                        headers = {"Retry-After": str(mock.retry_after)} if mock.retry_after is not None else {}
+                        self._reply(failure, {"error": {"type": "server_error"}}, headers)
+                    else:
+                        self._reply(200, mock.completion(self.path, body))
+                finally:
+                    with mock._lock:
+                        mock.active -= 1
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    @staticmethod
+    def completion(path, body):
+        """依 API 格式回傳固定的教案內容"""
+        prompt = body["messages"][0]["content"]
+        content = f"# 教案\n\n## 📋 摘要\n模擬生成（prompt {len(prompt)} 字）"
+        if path == "/v1/messages":
+            return {"content": [{"type": "text", "text": content}],
+                    "usage": {"input_tokens": len(prompt), "output_tokens": 50}}
+        return {"choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(prompt), "completion_tokens": 50}}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def mock_llm_server():
+    """啟動模擬伺服器，測試結束後關閉"""
+    server = MockLLMServer()
+    server.start()
+    yield server
+    server.stop()
@@ -11,6 +11,7 @@
 4. 或使用 AI 工具根據規格生成實作
 """
 
+import asyncio
 import pytest
 import sys
 from pathlib import Path
@@ -20,6 +21,7 @@ from unittest.mock import Mock, patch
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from converter import NewsToLessonConverter
+from llm_engine import APIKeyError
 from prompts import get_prompt
 
 
@@ -29,7 +31,15 @@ class TestNewsToLessonConverter:
     @pytest.fixture
     def converter(self):
         """建立轉換器實例（使用 mock API key）"""
-        return NewsToLessonConverter(api_key="test-api-key", provider="openai")
+        with NewsToLessonConverter(api_key="test-api-key", provider="openai") as converter:
+            yield converter
+    
+    @pytest.fixture
+    def served_converter(self, mock_llm_server):
+        """連到本機模擬伺服器的轉換器"""
+        with NewsToLessonConverter(api_key="test-api-key", provider="openai",
+                                   base_url=mock_llm_server.url, backoff=0.01) as converter:
+            yield converter
     
     @pytest.fixture
     def sample_news_text(self):
@@ -55,24 +65,24 @@ class TestNewsToLessonConverter:
         assert "adult" in converter.supported_audiences
         assert "senior" in converter.supported_audiences
     
-    def test_get_prompt_template_executive(self, converter):
+    def test_get_prompt_template_executive(self):
         """測試：取得企業高管 Prompt 模板"""
-        template = converter._get_prompt_template("executive")
+        template = get_prompt("executive", "測試新聞內容")
         assert "商業顧問" in template
         assert "ROI" in template
         assert "企業案例" in template
-        assert "{news_content}" in template
+        assert "測試新聞內容" in template
     
-    def test_get_prompt_template_adult(self, converter):
+    def test_get_prompt_template_adult(self):
         """測試：取得成人學員 Prompt 模板"""
-        template = converter._get_prompt_template("adult")
+        template = get_prompt("adult", "測試新聞內容")
         assert "實用主義" in template
         assert "問句比例" in template
         assert "行動建議" in template
     
-    def test_get_prompt_template_senior(self, converter):
+    def test_get_prompt_template_senior(self):
         """測試：取得年長者 Prompt 模板"""
-        template = converter._get_prompt_template("senior")
+        template = get_prompt("senior", "測試新聞內容")
         assert "耐心" in template
         assert "淺顯易懂" in template
         assert "類比" in template
@@ -83,30 +93,84 @@ class TestNewsToLessonConverter:
             converter.convert_from_text(sample_news_text, audience="invalid")
     
     @patch('converter.requests.get')
-    def test_convert_from_url_success(self, mock_get, converter):
+    def test_convert_from_url_success(self, mock_get, served_converter, mock_llm_server):
         """測試：成功從 URL 轉換"""
         # Mock HTTP 回應
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = "<html><body>新聞內容</body></html>"
+        mock_response.text = ("<html><head><title>標題</title><script>ad()</script></head>"
+                              "<body><nav>選單</nav><p>新聞內容</p></body></html>")
         mock_get.return_value = mock_response
         
-        # 這個測試會失敗，因為功能未實作
-        # 實作後應該通過
-        with pytest.raises(NotImplementedError):
-            result = converter.convert_from_url(
-                "https://example.com/news",
-                audience="adult"
-            )
+        result = served_converter.convert_from_url(
+            "https://example.com/news",
+            audience="adult"
+        )
+        
+        assert result["source"] == "https://example.com/news"
+        assert "摘要" in result["content"]
+        prompt = mock_llm_server.requests[0]["body"]["messages"][0]["content"]
+        assert "標題\n\n新聞內容" in prompt
+        assert "選單" not in prompt and "ad()" not in prompt
     
-    def test_convert_from_text_success(self, converter, sample_news_text):
+    @patch('converter.requests.get')
+    def test_convert_from_url_unreachable(self, mock_get, converter):
+        """測試：URL 無法訪問時建議改用文字輸入（E002）"""
+        mock_get.return_value = Mock(status_code=404, text="")
+        with pytest.raises(ValueError, match="無法訪問該網址"):
+            converter.convert_from_url("https://example.com/missing", audience="adult")
+    
+    def test_convert_from_text_success(self, served_converter, sample_news_text, mock_llm_server):
         """測試：成功從文字轉換"""
-        # 這個測試會失敗，因為功能未實作
-        with pytest.raises(NotImplementedError):
-            result = converter.convert_from_text(
-                sample_news_text,
-                audience="adult"
-            )
+        result = served_converter.convert_from_text(
+            sample_news_text,
+            audience="adult"
+        )
+        
+        assert result["audience"] == "adult"
+        assert result["source"] == "直接輸入"
+        assert "摘要" in result["content"]
+        assert result["usage"]["output_tokens"] == 50
+        # 範例新聞不到 300 字
+        assert "內容過短" in result["warnings"][0]
+        assert "實用主義教師" in mock_llm_server.requests[0]["body"]["messages"][0]["content"]
+    
+    def test_sync_call_inside_event_loop(self, served_converter, sample_news_text):
+        """測試：已有事件迴圈時（例如 Jupyter）同步方法仍可使用"""
+        async def notebook_cell():
+            return served_converter.convert_from_text(sample_news_text, audience="senior")
+        
+        result = asyncio.run(notebook_cell())
+        assert result["audience"] == "senior"
+        assert served_converter.usage_stats()["lessons"] == 1
+    
+    def test_close_releases_engine(self, mock_llm_server):
+        """測試：with 陳述式結束時關閉 LLMEngine 的執行緒"""
+        with NewsToLessonConverter(api_key="test-api-key", base_url=mock_llm_server.url) as converter:
+            converter.convert_from_text("新聞內容", audience="adult")
+        assert converter.engine._executor._shutdown
+    
+    def test_invalid_api_key(self, mock_llm_server, sample_news_text):
+        """測試：API Key 無效時顯示錯誤訊息且不重試（E001）"""
+        with NewsToLessonConverter(api_key="wrong-key", base_url=mock_llm_server.url) as converter:
+            with pytest.raises(APIKeyError, match="API Key 無效，請檢查設定"):
+                converter.convert_from_text(sample_news_text, audience="adult")
+        assert len(mock_llm_server.requests) == 1
+    
+    def test_convert_batch_all_audiences(self, mock_llm_server, sample_news_text):
+        """測試：每篇新聞 × 三種受眾同時生成，失敗的項目以錯誤紀錄"""
+        mock_llm_server.overlap = 2  # 第一個請求等到第二個請求進來才回應
+        mock_llm_server.failures = [400]
+        with NewsToLessonConverter(api_key="test-api-key", base_url=mock_llm_server.url,
+                                   concurrency=4) as converter:
+            results = converter.convert_batch([sample_news_text, "第二篇新聞"])
+        
+        assert [(r["index"], r["audience"]) for r in results] == [
+            (0, "executive"), (0, "adult"), (0, "senior"),
+            (1, "executive"), (1, "adult"), (1, "senior")]
+        errors = [r for r in results if "error" in r]
+        assert len(errors) == 1 and errors[0]["code"] == "E003"
+        assert 1 < mock_llm_server.max_active <= 4
     
     def test_validate_output_executive(self, converter):
         """測試：驗收企業高管版教案"""
@@ -135,11 +199,18 @@ class TestNewsToLessonConverter:
                 audience="executive"
             )
     
-    def test_cost_tracking(self, converter):
+    def test_cost_tracking(self, served_converter, sample_news_text):
         """測試：成本追蹤功能"""
-        # TODO: 實作成本追蹤測試
-        # 應該記錄 token 使用量和預估成本
-        pass
+        for audience in served_converter.supported_audiences:
+            served_converter.convert_from_text(sample_news_text, audience=audience)
+        
+        stats = served_converter.usage_stats()
+        assert stats["lessons"] == 3
+        assert stats["output_tokens"] == 150
+        assert stats["total_tokens"] == stats["input_tokens"] + 150
+        expected = (stats["input_tokens"] * 0.15 + 150 * 0.60) / 1_000_000
+        assert stats["cost_usd"] == pytest.approx(expected, abs=1e-6)
+        assert stats["avg_cost_per_lesson_usd"] == pytest.approx(expected / 3, abs=1e-6)
 
 
 class TestPrompts:
@@ -168,10 +239,7 @@ class TestPrompts:
 class TestIntegration:
     """整合測試"""
     
-    @pytest.mark.skipif(
-        not pytest.config.getoption("--run-integration"),
-        reason="需要 --run-integration 參數才執行"
-    )
+    @pytest.mark.integration
     def test_full_conversion_workflow(self):
         """測試：完整轉換工作流程（需要真實 API Key）"""
         import os
@@ -192,17 +260,7 @@ class TestIntegration:
         
         # 驗證結果
         assert result is not None
-        assert "摘要" in result or "summary" in result.lower()
-
-
-def pytest_addoption(parser):
-    """加入自訂 pytest 選項"""
-    parser.addoption(
-        "--run-integration",
-        action="store_true",
-        default=False,
-        help="執行整合測試（需要真實 API Key）"
-    )
+        assert "摘要" in result["content"] or "summary" in result["content"].lower()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+"""
+LLM 請求引擎測試
+
+這個檔案包含 llm_engine 模組（並行上限、token bucket 限速、抖動退避重試、錯誤分類）的測試案例，
+以 conftest 的本機模擬伺服器代替 OpenAI / Anthropic API。
+"""
+
+import asyncio
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from llm_engine import APIKeyError, LLMEngine, LLMError, QuotaExceededError, TokenBucket
+
+
+def _engine(server, **options):
+    options.setdefault("backoff", 0.01)
+    return LLMEngine("test-api-key", base_url=server.url, **options)
+
+
+class TestTokenBucket:
+    """token bucket 測試"""
+
+    def test_rate_limit(self):
+        """測試：額度用完後依速率等待"""
+        bucket = TokenBucket(rate=50, capacity=2)
+
+        async def scenario():
+            start = time.monotonic()
+            for _ in range(7):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # 前 2 個立即取得，其餘 5 個每個約 0.02 秒
+        assert 0.08 <= asyncio.run(scenario()) < 0.5
+
+    def test_invalid_rate(self):
+        """測試：速率必須為正數"""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+
+class TestLLMEngine:
+    """請求引擎測試"""
+
+    @pytest.mark.parametrize("provider, path", [
+        ("openai", "/v1/chat/completions"),
+        ("anthropic", "/v1/messages"),
+    ])
+    def test_providers(self, mock_llm_server, provider, path):
+        """測試：依提供者組成請求並解析回應與 token 用量"""
+        engine = _engine(mock_llm_server, provider=provider)
+        result = asyncio.run(engine.generate("你好"))
+        request = mock_llm_server.requests[0]
+        assert request["path"] == path
+        assert request["body"]["messages"] == [{"role": "user", "content": "你好"}]
+        assert "摘要" in result["content"]
+        assert (result["input_tokens"], result["output_tokens"], result["attempts"]) == (2, 50, 1)
+        if provider == "anthropic":
+            assert request["headers"]["x-api-key"] == "test-api-key"
+
+    def test_bounded_concurrency(self, mock_llm_server):
+        """測試：同時進行的請求數不超過 concurrency，整體比逐一送出快"""
+        mock_llm_server.delay = 0.1
+        engine = _engine(mock_llm_server, concurrency=3)
+        start = time.monotonic()
+        results = asyncio.run(engine.generate_many(f"新聞 {i}" for i in range(9)))
+        elapsed = time.monotonic() - start
+        assert all(isinstance(result, dict) for result in results)
+        assert mock_llm_server.max_active == 3
+        assert elapsed < 0.9 * 0.9
+
+    def test_requests_per_minute_limit(self, mock_llm_server):
+        """測試：每分鐘請求數限額"""
+        engine = _engine(mock_llm_server, requests_per_minute=600)  # 每秒 10 個，最多累積 600
+        engine.request_bucket = TokenBucket(rate=10, capacity=1)
+        start = time.monotonic()
+        asyncio.run(engine.generate_many(["a"] * 4))
+        assert time.monotonic() - start >= 0.25
+
+    def test_retry_with_backoff(self, mock_llm_server):
+        """測試：429 / 5xx 自動重試後成功"""
+        mock_llm_server.failures = [429, 503]
+        engine = _engine(mock_llm_server)
+        result = asyncio.run(engine.generate("重試"))
+        assert result["attempts"] == 3
+        assert engine.usage["retries"] == 2
+        assert len(mock_llm_server.requests) == 3
+
+    def test_retry_after_header(self, mock_llm_server):
+        """測試：伺服器指定 Retry-After 時依指示等待"""
+        mock_llm_server.failures = [429]
+        mock_llm_server.retry_after = 0.2
+        engine = _engine(mock_llm_server)
+        start = time.monotonic()
+        asyncio.run(engine.generate("等待"))
+        assert time.monotonic() - start >= 0.2
+
+    def test_gives_up_after_max_retries(self, mock_llm_server):
+        """測試：重試 max_retries 次仍失敗時拋出 LLMError（E003）"""
+        mock_llm_server.failures = [500] * 10
+        engine = _engine(mock_llm_server, max_retries=2)
+        with pytest.raises(LLMError, match="已重試 2 次") as error:
+            asyncio.run(engine.generate("失敗"))
+        assert error.value.code == "E003"
+        assert len(mock_llm_server.requests) == 3
+
+    def test_non_retryable_errors(self, mock_llm_server):
+        """測試：API Key 無效、額度不足、一般 4xx 不重試"""
+        with pytest.raises(APIKeyError) as error:
+            asyncio.run(LLMEngine("wrong", base_url=mock_llm_server.url).generate("x"))
+        assert error.value.code == "E001"
+
+        mock_llm_server.failures = [402, 400]
+        engine = _engine(mock_llm_server)
+        with pytest.raises(QuotaExceededError):
+            asyncio.run(engine.generate("x"))
+        with pytest.raises(LLMError, match="HTTP 400"):
+            asyncio.run(engine.generate("x"))
+        assert len(mock_llm_server.requests) == 3
+
+    def test_connection_error_retried(self):
+        """測試：連線失敗視為可重試的錯誤"""
+        engine = LLMEngine("key", base_url="http://127.0.0.1:9", max_retries=1, backoff=0.01)
+        with pytest.raises(LLMError, match="已重試 1 次"):
+            asyncio.run(engine.generate("x"))
+
+    def test_invalid_provider(self):
+        """測試：不支援的提供者"""
+        with pytest.raises(ValueError, match="不支援的 API 提供者"):
+            LLMEngine("key", provider="gemini")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
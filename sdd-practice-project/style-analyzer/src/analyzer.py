@@ -4,36 +4,195 @@
 這個模組提供文字風格分析的核心功能。
 """
 
+import codecs
+import copy
+import functools
+import io
+import itertools
 import json
+import os
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lexicon import Lexicon
+from metrics import DEFAULT_LEXICON, MetricsAccumulator, batch_metrics
+from phrases import PhraseMiner, phrase_counts, top_phrases
+from profiler import NULL_PROFILER, StageProfiler
+from result_cache import AnalysisCache
+from segmenter import count_sentences, iter_segments, sentence_spans
+from style_profile import StyleProfile
+
+# 分析結果的版本：指標的計算方式改變時遞增，讓快取中的舊結果失效
+ANALYZER_VERSION = "3"
 
 
 class StyleAnalyzer:
     """文字風格分析器"""
     
-    def __init__(self):
-        """初始化分析器"""
+    def __init__(self, batch_size: int = 256, chunk_size: int = 1 << 20,
+                 cache_path: Optional[str] = None, lexicon: Optional[Lexicon] = None,
+                 profile: bool = False):
+        """
+        初始化分析器
+        
+        Args:
+            batch_size: batch_analyze 每次一起計算指標的檔案數
+            chunk_size: 串流分析時每次讀取的位元組數
+            cache_path: 分析結果快取的資料庫路徑（None 代表不使用快取）；
+                內容沒有改變的檔案直接回傳上次的結果
+            lexicon: 熱情度詞庫（positive、negative 兩個類別，None 代表預設詞庫）
+            profile: 是否記錄各階段的耗時與計數（見 profile_report）
+        """
         self.supported_formats = ['.txt', '.md']
         self.min_length = 100
+        # 超過此大小的檔案改用串流分析（不再拒絕大檔案）
         self.max_size_mb = 10
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.lexicon = lexicon or DEFAULT_LEXICON
+        # 詞庫不同時結果不同，快取版本也要區分
+        version = f"{ANALYZER_VERSION}:{self.lexicon.signature}"
+        self.cache = AnalysisCache(cache_path, version) if cache_path else None
+        self.profiler: StageProfiler = StageProfiler() if profile else NULL_PROFILER
     
-    def analyze_file(self, file_path: str) -> Dict:
+    def analyze_file(self, file_path: str, streaming: Optional[bool] = None) -> Dict:
         """
         分析單個文字檔案
         
         Args:
             file_path: 檔案路徑
+            streaming: 是否逐段讀取分析（None 代表檔案超過 max_size_mb 時自動使用）
             
         Returns:
             分析結果的字典
             
         Raises:
-            ValueError: 檔案格式不支援或檔案過大
+            ValueError: 檔案格式不支援或編碼錯誤
+            FileNotFoundError: 檔案不存在
+        """
+        path = self._validate(file_path)
+        if self.cache is not None:
+            cached, fingerprint = self._cache_lookup(path)
+            if cached is not None:
+                return self._from_cache(cached)
+        
+        if streaming or (streaming is None and self._is_large(path)):
+            result = self._analyze_stream(path)
+        else:
+            result = self._analyze_text(file_path)[0]
+        
+        if self.cache is not None:
+            self._cache_store(fingerprint, result)
+        return result
+    
+    def _cache_lookup(self, path: Path) -> Tuple[Optional[Dict], Tuple]:
+        with self.profiler.stage("cache"):
+            return self.cache.lookup(path)
+    
+    def _cache_store(self, fingerprint: Tuple, result: Dict):
+        with self.profiler.stage("cache"):
+            self.cache.store(fingerprint, result)
+    
+    def _compute_metrics(self, texts: List[str]) -> List[Dict]:
+        """切分句子並計算指標（兩個階段分開計時）"""
+        profiler = self.profiler
+        with profiler.stage("segment"):
+            spans = [sentence_spans(text) for text in texts]
+        profiler.count("sentences", sum(map(len, spans)))
+        with profiler.stage("metrics"):
+            return batch_metrics(texts, self.lexicon, spans)
+    
+    def _from_cache(self, result: Dict) -> Dict:
+        """快取的結果：警告依目前的 min_length 重新產生"""
+        result["warnings"] = self._warnings(result["word_count"])
+        return result
+    
+    def _is_large(self, path: Path) -> bool:
+        return path.stat().st_size > self.max_size_mb * 1024 * 1024
+    
+    def _analyze_text(self, file_path: str) -> Tuple[Dict, str]:
+        """一次讀入並分析檔案，回傳 (分析結果, 內容)"""
+        path, content, warnings = self._read_file(file_path)
+        metrics = self._compute_metrics([content])[0]
+        return self._build_result(path, len(content), warnings, metrics), content
+    
+    def _analyze_with_phrases(self, file_path: str) -> Tuple[Dict, Counter]:
+        """
+        分析檔案，另外回傳所有候選短語的次數（給 StyleProfile 統計語料庫的短語）
+        
+        串流分析的大檔案只有短語計數器（TopKCounter）保留的次數。
+        """
+        path = self._validate(file_path)
+        if self._is_large(path):
+            return self._stream(path)
+        result, content = self._analyze_text(file_path)
+        return result, phrase_counts(content)
+    
+    def _analyze_stream(self, path: Path) -> Dict:
+        """
+        串流分析：每次讀取 chunk_size 個位元組，在句子邊界切段後累積指標
+        
+        記憶體只需要一個區塊、一個未完成的句子與有上限的短語計數器。
+        """
+        return self._stream(path)[0]
+    
+    def _stream(self, path: Path) -> Tuple[Dict, Counter]:
+        """串流分析，回傳 (分析結果, 短語計數器保留的次數)"""
+        profiler = self.profiler
+        accumulator = MetricsAccumulator(lexicon=self.lexicon)
+        for segment in self._iter_segments(path):
+            with profiler.stage("segment"):
+                spans = sentence_spans(segment)
+            profiler.count("sentences", len(spans))
+            with profiler.stage("metrics"):
+                accumulator.add(segment, spans)
+        profiler.count("files")
+        
+        characters = accumulator.characters
+        result = self._build_result(path, characters, self._warnings(characters),
+                                    accumulator.result())
+        return result, accumulator.phrases.counts
+    
+    @staticmethod
+    def _decoder() -> io.IncrementalNewlineDecoder:
+        """UTF-8 遞增解碼器，換行轉換與以文字模式開檔相同"""
+        return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    
+    def _iter_chunks(self, path: Path) -> Iterator[str]:
+        """逐塊讀取並解碼（讀檔與解碼分開計時；多位元組字元被切開時留到下一塊）"""
+        profiler = self.profiler
+        decoder = self._decoder()
+        with open(path, 'rb') as f:
+            while True:
+                with profiler.stage("read"):
+                    data = f.read(self.chunk_size)
+                profiler.count("bytes", len(data))
+                try:
+                    with profiler.stage("decode"):
+                        text = decoder.decode(data, final=not data)
+                except UnicodeDecodeError:
+                    raise ValueError("檔案編碼錯誤，請使用 UTF-8 編碼")
+                profiler.count("characters", len(text))
+                if text:
+                    yield text
+                if not data:
+                    return
+    
+    def _iter_segments(self, path: Path) -> Iterator[str]:
+        """逐段讀取檔案（每段結束在句子邊界）"""
+        return iter_segments(self._iter_chunks(path))
+    
+    def _validate(self, file_path: str) -> Path:
+        """
+        驗證檔案存在且格式支援
+        
+        Raises:
+            ValueError: 檔案格式不支援
             FileNotFoundError: 檔案不存在
         """
-        # 驗證檔案
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"檔案不存在: {file_path}")
@@ -43,77 +202,251 @@ class StyleAnalyzer:
                 f"不支援的檔案格式: {path.suffix}。"
                 f"支援的格式: {', '.join(self.supported_formats)}"
             )
+        return path
+    
+    def _read_file(self, file_path: str) -> Tuple[Path, str, List[str]]:
+        """
+        驗證並讀取檔案
+        
+        Returns:
+            (路徑, 內容, 警告訊息列表)
+        """
+        path = self._validate(file_path)
+        profiler = self.profiler
         
-        # 讀取檔案
+        # 讀取檔案（讀取位元組與解碼分開計時）
+        with profiler.stage("read"):
+            with open(path, 'rb') as f:
+                data = f.read()
+        profiler.count("bytes", len(data))
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with profiler.stage("decode"):
+                content = self._decoder().decode(data, final=True)
         except UnicodeDecodeError:
             raise ValueError("檔案編碼錯誤，請使用 UTF-8 編碼")
+        profiler.count("characters", len(content))
+        profiler.count("files")
         
-        # 檢查內容長度
-        if len(content) < self.min_length:
-            warnings = [f"內容過短（{len(content)}字），建議至少 500 字以獲得準確分析"]
-        else:
-            warnings = []
-        
-        # 執行分析
-        result = {
+        return path, content, self._warnings(len(content))
+    
+    def _warnings(self, characters: int) -> List[str]:
+        """檢查內容長度"""
+        if characters < self.min_length:
+            return [f"內容過短（{characters}字），建議至少 500 字以獲得準確分析"]
+        return []
+    
+    def _build_result(self, path: Path, word_count: int, warnings: List[str], metrics: Dict) -> Dict:
+        """由 metrics 模組計算的指標組成分析報告"""
+        metrics = dict(metrics)
+        sentence_count = metrics.pop("sentence_count")
+        return {
             "file_name": path.name,
             "analysis_date": datetime.now().isoformat(),
-            "word_count": len(content),
-            "sentence_count": self._count_sentences(content),
-            "metrics": self._analyze_content(content),
+            "word_count": word_count,
+            "sentence_count": sentence_count,
+            "metrics": metrics,
             "warnings": warnings
         }
-        
-        return result
     
     def _count_sentences(self, text: str) -> int:
-        """計算句子數量"""
-        # 簡單實作：以句號、問號、驚嘆號為句子分隔
-        import re
-        sentences = re.split(r'[。！？\.\!\?]', text)
-        return len([s for s in sentences if s.strip()])
+        """計算句子數量（以句號、問號、驚嘆號為句子分隔）"""
+        return count_sentences(text)
     
     def _analyze_content(self, text: str) -> Dict:
         """
         分析文字內容
         
-        這是一個簡化版本，實際實作需要使用 NLP 工具
+        指標由 metrics.batch_metrics 計算（熱情度以標點與詞庫估計，
+        不依賴 VADER，中文也適用）
         """
-        sentences = self._count_sentences(text)
-        words = len(text)
-        
-        return {
-            "enthusiasm_score": 0.0,  # TODO: 實作情感分析
-            "avg_sentence_length": words / sentences if sentences > 0 else 0,
-            "max_sentence_length": 0,  # TODO: 實作
-            "min_sentence_length": 0,  # TODO: 實作
-            "question_ratio": 0.0,  # TODO: 實作
-            "top_phrases": []  # TODO: 實作
-        }
+        metrics = self._compute_metrics([text])[0]
+        del metrics["sentence_count"]
+        return metrics
     
-    def batch_analyze(self, file_paths: List[str]) -> List[Dict]:
+    def batch_analyze(self, file_paths: List[str], workers: int = 1) -> List[Dict]:
         """
         批次分析多個檔案
         
         Args:
             file_paths: 檔案路徑列表
+            workers: 平行處理的程序數（1 代表在目前程序中依序處理）
             
         Returns:
-            分析結果列表
+            分析結果列表（順序與 file_paths 相同）
         """
-        results = []
-        for path in file_paths:
+        return list(self.iter_analyze(file_paths, workers=workers))
+    
+    def iter_analyze(self, file_paths: Iterable[str], workers: Optional[int] = 1,
+                     ordered: bool = True, chunk_size: int = 32) -> Iterator[Dict]:
+        """
+        逐筆產出分析結果（可用多個程序平行處理）
+        
+        檔案路徑每 chunk_size 個分成一個工作交給 ProcessPoolExecutor，
+        同時最多只有 workers × 2 個工作在執行或等待，
+        因此路徑可以是很長的產生器，結果也不會全部堆在記憶體中。
+        
+        Args:
+            file_paths: 檔案路徑（可為產生器）
+            workers: 程序數（None 代表 CPU 核心數，1 代表不開新程序）
+            ordered: True 依輸入順序產出；False 哪個工作先完成就先產出
+            chunk_size: 每個工作包含的檔案數
+            
+        Yields:
+            每個檔案的分析結果；失敗的檔案為 {"file_name", "error"}
+        """
+        for results, profiler in self._run_chunks(_analyze_chunk, file_paths, workers,
+                                                  ordered, chunk_size):
+            self.profiler.merge(profiler)
+            yield from results
+    
+    def profile_report(self) -> Dict:
+        """
+        各階段的耗時與計數（StageProfiler.report；batch_analyze 時包含所有工作程序）
+        
+        Raises:
+            RuntimeError: 建立分析器時沒有開啟 profile
+        """
+        if not self.profiler.enabled:
+            raise RuntimeError("請以 StyleAnalyzer(profile=True) 開啟階段計時")
+        return self.profiler.report()
+    
+    def build_profile(self, file_paths: Iterable[str], profile: Optional[StyleProfile] = None,
+                      workers: Optional[int] = 1) -> StyleProfile:
+        """
+        把檔案的分析結果累積成作者風格輪廓
+        
+        每個工作把一批檔案累積成一份輪廓（短語以每篇文件的完整次數計入，
+        不只是每篇的前幾名），再合併到 profile。不使用分析結果快取。
+        
+        Args:
+            file_paths: 檔案路徑（可為產生器）
+            profile: 要更新的既有輪廓（None 代表建立新的輪廓）
+            workers: 程序數（None 代表 CPU 核心數，1 代表不開新程序）
+            
+        Returns:
+            更新後的輪廓；失敗的檔案略過並計入 skipped
+        """
+        profile = profile if profile is not None else StyleProfile()
+        worker = functools.partial(_profile_chunk, phrase_capacity=profile.phrases.capacity,
+                                   sketch_width=profile.phrases.sketch.width)
+        for partial, profiler in self._run_chunks(worker, file_paths, workers, False, 32):
+            self.profiler.merge(profiler)
+            profile.merge(partial)
+        return profile
+    
+    def mine_phrases(self, file_paths: Iterable[str], k: int = 20, workers: Optional[int] = 1,
+                     chunk_size: int = 32, capacity: int = 1000) -> List[Dict]:
+        """
+        統計整個語料庫的高頻短語
+        
+        每個工作以 PhraseMiner（Count-Min sketch + 候選短語）統計一批檔案，
+        結果再合併，記憶體與語料庫大小無關。無法讀取的檔案略過。
+        
+        Args:
+            file_paths: 檔案路徑（可為產生器）
+            k: 回傳數量
+            workers: 程序數（None 代表 CPU 核心數，1 代表不開新程序）
+            chunk_size: 每個工作包含的檔案數
+            capacity: 保留的候選短語數量
+            
+        Returns:
+            [{"phrase": 短語, "count": 估計次數}]
+        """
+        miner = PhraseMiner(capacity)
+        for partial in self._run_chunks(functools.partial(_mine_chunk, capacity=capacity),
+                                        file_paths, workers, False, chunk_size):
+            miner.merge(partial)
+        return top_phrases(miner, k)
+    
+    def _run_chunks(self, function: Callable, file_paths: Iterable[str], workers: Optional[int],
+                    ordered: bool, chunk_size: int) -> Iterator:
+        """
+        把路徑每 chunk_size 個分成一個工作，以 function(self, 路徑列表) 處理並逐一產出結果
+        
+        同時最多只有 workers × 2 個工作在執行或等待。
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size 必須大於 0: {chunk_size}")
+        workers = workers or os.cpu_count() or 1
+        paths = iter(file_paths)
+        chunks = iter(lambda: list(itertools.islice(paths, chunk_size)), [])
+        
+        if workers == 1:
+            for chunk in chunks:
+                yield function(self, chunk)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
             try:
-                result = self.analyze_file(path)
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    "file_name": Path(path).name,
-                    "error": str(e)
-                })
+                for chunk in chunks:
+                    pending.append(executor.submit(function, self, chunk))
+                    # 佇列滿了就先交出完成的結果，再送下一個工作
+                    while len(pending) >= workers * 2:
+                        yield from self._collect(pending, ordered)
+                while pending:
+                    yield from self._collect(pending, ordered)
+            finally:
+                # 呼叫者提早停止讀取時，取消還沒開始的工作
+                for future in pending:
+                    future.cancel()
+    
+    @staticmethod
+    def _collect(pending: deque, ordered: bool) -> Iterator:
+        """等待並移除（至少）一個完成的工作，產出它的結果"""
+        if ordered:
+            done = [pending.popleft()]
+        else:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            done = [future for future in pending if future in finished]
+            for future in done:
+                pending.remove(future)
+        for future in done:
+            yield future.result()
+    
+    def _analyze_batch(self, file_paths: List[str]) -> List[Dict]:
+        """
+        分析一批檔案
+        
+        每 batch_size 個檔案讀完後一起計算指標（句子切分一次、
+        指標以 NumPy 陣列歸約），超過 max_size_mb 的檔案改用串流分析，
+        讀取失敗的檔案以錯誤訊息取代結果。有快取時只分析內容改變的檔案。
+        """
+        results = []
+        for start in range(0, len(file_paths), self.batch_size):
+            chunk = []
+            fingerprints = []
+            for path in file_paths[start:start + self.batch_size]:
+                fingerprint = None
+                try:
+                    validated = self._validate(path)
+                    if self.cache is not None:
+                        cached, fingerprint = self._cache_lookup(validated)
+                        if cached is not None:
+                            chunk.append(self._from_cache(cached))
+                            fingerprints.append(None)
+                            continue
+                    if self._is_large(validated):
+                        chunk.append(self._analyze_stream(Path(path)))
+                    else:
+                        chunk.append(self._read_file(path))
+                except Exception as e:
+                    chunk.append({
+                        "file_name": Path(path).name,
+                        "error": str(e)
+                    })
+                fingerprints.append(fingerprint)
+            
+            # 一般檔案一起計算指標；大檔案（已串流分析）、快取結果與錯誤直接放進結果
+            documents = [item for item in chunk if isinstance(item, tuple)]
+            computed = iter(self._compute_metrics([content for _, content, _ in documents]))
+            for item, fingerprint in zip(chunk, fingerprints):
+                if isinstance(item, tuple):
+                    path, content, warnings = item
+                    item = self._build_result(path, len(content), warnings, next(computed))
+                if fingerprint is not None:
+                    self._cache_store(fingerprint, item)
+                results.append(item)
         return results
     
     def save_result(self, result: Dict, output_path: Optional[str] = None) -> str:
@@ -131,32 +464,87 @@ class StyleAnalyzer:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = f"analysis_{timestamp}.json"
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with self.profiler.stage("serialize"):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
         
         return output_path
 
 
+def _analyze_chunk(analyzer: StyleAnalyzer, file_paths: List[str]) -> Tuple[List[Dict], StageProfiler]:
+    """
+    在工作程序中分析一批檔案（ProcessPoolExecutor 需要模組層級的函式）
+    
+    以空的 profiler 記錄這批檔案，連同結果一起交回，由呼叫端合併。
+    """
+    worker = copy.copy(analyzer)
+    worker.profiler = analyzer.profiler.spawn()
+    return worker._analyze_batch(file_paths), worker.profiler
+
+
+def _mine_chunk(analyzer: StyleAnalyzer, file_paths: List[str], capacity: int) -> PhraseMiner:
+    """在工作程序中統計一批檔案的短語（不計入分析階段的計時）"""
+    analyzer = copy.copy(analyzer)
+    analyzer.profiler = NULL_PROFILER
+    miner = PhraseMiner(capacity)
+    for file_path in file_paths:
+        try:
+            for segment in analyzer._iter_segments(analyzer._validate(file_path)):
+                miner.add_text(segment)
+        except (OSError, ValueError):
+            continue
+    return miner
+
+
+def _profile_chunk(analyzer: StyleAnalyzer, file_paths: List[str], phrase_capacity: int,
+                   sketch_width: int) -> Tuple[StyleProfile, StageProfiler]:
+    """在工作程序中把一批檔案累積成風格輪廓（失敗的檔案計入 skipped）"""
+    worker = copy.copy(analyzer)
+    worker.profiler = analyzer.profiler.spawn()
+    profile = StyleProfile(phrase_capacity=phrase_capacity, sketch_width=sketch_width)
+    for file_path in file_paths:
+        try:
+            result, phrases = worker._analyze_with_phrases(file_path)
+        except Exception:
+            profile.skipped += 1
+            continue
+        profile.add(result, phrases)
+    return profile, worker.profiler
+
+
 def main():
     """主程式入口"""
+    import argparse
     import sys
     
-    if len(sys.argv) < 2:
-        print("使用方式: python analyzer.py <檔案路徑>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="文字風格分析")
+    parser.add_argument("path", help="檔案或目錄路徑")
+    parser.add_argument("--profile", action="store_true",
+                        help="在標準錯誤輸出各階段（讀檔、解碼、切分、指標、序列化）的耗時")
+    args = parser.parse_args()
     
-    file_path = sys.argv[1]
-    analyzer = StyleAnalyzer()
+    file_path = args.path
+    analyzer = StyleAnalyzer(profile=args.profile)
     
     try:
-        result = analyzer.analyze_file(file_path)
-        output_path = analyzer.save_result(result)
-        print(f"✅ 分析完成！結果已儲存至: {output_path}")
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if Path(file_path).is_dir():
+            # 目錄：遞迴分析所有檔案，結果逐行寫入同一個 JSONL 檔
+            from pipeline import run_pipeline
+            output_path = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            summary = run_pipeline(file_path, output_path, analyzer, workers=None)
+            print(f"✅ 分析完成！{summary['written']} 個檔案（{summary['errors']} 個失敗），"
+                  f"結果已儲存至: {output_path}")
+        else:
+            result = analyzer.analyze_file(file_path)
+            output_path = analyzer.save_result(result)
+            print(f"✅ 分析完成！結果已儲存至: {output_path}")
+            print(json.dumps(result, ensure_ascii=False, indent=2))
     except Exception as e:
         print(f"❌ 錯誤: {e}")
         sys.exit(1)
-
+    
+    if args.profile:
+        print(analyzer.profiler.format_report(), file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+"""
+詞庫比對
+
+把多個類別的詞（例如正面詞、負面詞）建成一個 Aho-Corasick 自動機，
+掃描文字一次就能數出每個類別的出現次數，詞庫再大也不需要逐詞搜尋。
+
+不屬於任何詞的字元一定讓自動機回到起點，所以只需要掃描
+由詞庫字元組成的片段（以正規表示式找出），其餘文字直接跳過。
+
+英文等以空白分詞的詞必須是完整的單字（"hate" 不會比對到 "whatever"），
+中文詞沒有分詞邊界，仍以子字串比對。
+"""
+
+import hashlib
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# 中日韓文字從 U+2E80 開始；在這之前的字母與數字才算英文等拼音文字的單字字元
+_CJK_START = "\u2e80"
+
+
+def _is_word_char(ch: str) -> bool:
+    """是否為拼音文字的單字字元（字母、數字、底線；中日韓文字不算）"""
+    return (ch.isalnum() or ch == "_") and ch < _CJK_START
+
+
+class Lexicon:
+    """多類別詞庫的 Aho-Corasick 自動機"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]], ignore_case: bool = True):
+        """
+        Args:
+            categories: {類別名稱: 詞列表}
+            ignore_case: 是否忽略英文大小寫
+
+        Raises:
+            ValueError: 詞庫中有空字串
+        """
+        self.categories = list(categories)
+        self.ignore_case = ignore_case
+        self.words: Dict[str, Tuple[str, ...]] = {}
+
+        # 狀態 0 為起點；goto[狀態][字元] = 下一個狀態
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 到達此狀態時結束的詞（含失敗鏈上的詞）：
+        # (類別索引, 詞長, 開頭需要單字邊界, 結尾需要單字邊界)
+        self._output: List[Tuple[Tuple[int, int, bool, bool], ...]] = [()]
+
+        for index, name in enumerate(self.categories):
+            words = tuple(self._normalize(word) for word in categories[name])
+            if any(not word for word in words):
+                raise ValueError(f"詞庫「{name}」不可包含空字串")
+            self.words[name] = words
+            for word in words:
+                self._insert(word, index)
+        self._build_failure_links()
+
+        alphabet = sorted({ch for words in self.words.values() for word in words for ch in word})
+        self._runs = re.compile("[%s]+" % "".join(re.escape(ch) for ch in alphabet)) if alphabet else None
+
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _insert(self, word: str, category: int):
+        state = 0
+        for ch in word:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += ((category, len(word), _is_word_char(word[0]),
+                                 _is_word_char(word[-1])),)
+
+    def _build_failure_links(self):
+        """以廣度優先建立失敗連結，並把失敗鏈上的輸出併入"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(ch, 0)
+                self._fail[child] = link if link != child else 0
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    @property
+    def signature(self) -> str:
+        """詞庫內容的摘要（詞庫改變時分析結果的快取也要失效）"""
+        digest = hashlib.sha256(repr((self.ignore_case, sorted(
+            (name, sorted(words)) for name, words in self.words.items()))).encode('utf-8'))
+        return digest.hexdigest()[:12]
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        計算各類別的詞在文字中出現的次數
+
+        Args:
+            text: 原始文字
+
+        Returns:
+            {類別名稱: 出現次數}（重疊的詞各自計算；英文詞前後不能緊鄰其他字母或數字）
+        """
+        totals = [0] * len(self.categories)
+        if self._runs is not None:
+            goto, fail, output = self._goto, self._fail, self._output
+            text = self._normalize(text)
+            for match in self._runs.finditer(text):
+                state = 0
+                # position 是目前字元之後的位置（比對到的詞在此結束）
+                for position, ch in enumerate(match.group(), match.start() + 1):
+                    while state and ch not in goto[state]:
+                        state = fail[state]
+                    state = goto[state].get(ch, 0)
+                    for category, length, left, right in output[state]:
+                        start = position - length
+                        if left and start > 0 and _is_word_char(text[start - 1]):
+                            continue
+                        if right and position < len(text) and _is_word_char(text[position]):
+                            continue
+                        totals[category] += 1
+        return dict(zip(self.categories, totals))
@@ -0,0 +1,205 @@
+"""
+批次風格指標計算
+
+把整批文件以 segmenter 各掃描一次切成句子，句長與句尾標點放進 NumPy 陣列，
+各文件的指標以陣列歸約（reduceat / bincount）一次算完，
+不需要逐字元、逐文件的 Python 迴圈。
+沒有安裝 NumPy 時退回純 Python 計算，結果相同。
+熱情度詞庫以 Aho-Corasick 自動機（lexicon 模組）一次掃描比對，詞庫可自訂。
+
+串流分析大型檔案時改用 MetricsAccumulator 逐段累積（計數、最大最小值、
+有上限的短語計數器），記憶體與檔案大小無關。
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lexicon import Lexicon
+from phrases import TopKCounter, extract_top_phrases, iter_phrase_batches, top_phrases
+from segmenter import EXCLAMATION, QUESTION, Span, sentence_spans
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 依環境而定
+    np = None
+
+
+# 熱情度詞庫（英文以小寫比對）
+POSITIVE_WORDS = (
+    "太棒", "很棒", "真棒", "好棒", "讚", "厲害", "精彩", "完美", "喜歡", "期待",
+    "興奮", "開心", "驚豔", "驚喜", "太好了", "一起",
+    "amazing", "awesome", "great", "excellent", "love", "exciting", "fantastic", "wonderful",
+)
+NEGATIVE_WORDS = (
+    "糟糕", "失望", "討厭", "無聊", "可惜", "差勁", "痛苦", "難過", "生氣", "爛",
+    "terrible", "awful", "boring", "hate", "disappointing", "worst",
+)
+
+# 自訂詞庫需包含 positive 與 negative 兩個類別
+DEFAULT_LEXICON = Lexicon({"positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS})
+
+# 熱情度 = 基準 + 驚嘆句比例與正面詞密度加分 − 負面詞密度扣分，限制在 0～1
+ENTHUSIASM_BASE = 0.4
+EXCLAMATION_WEIGHT = 0.35
+POSITIVE_WEIGHT = 0.25
+NEGATIVE_WEIGHT = 0.3
+
+
+def _enthusiasm(sentences: int, exclamations: int, positive: int, negative: int) -> float:
+    """由句數與各項計數算出熱情度（0.0～1.0）"""
+    if not sentences:
+        return 0.0
+    score = (ENTHUSIASM_BASE
+             + EXCLAMATION_WEIGHT * exclamations / sentences
+             + POSITIVE_WEIGHT * min(1.0, positive / sentences)
+             - NEGATIVE_WEIGHT * min(1.0, negative / sentences))
+    return round(min(1.0, max(0.0, score)), 3)
+
+
+def batch_metrics(texts: Sequence[str], lexicon: Lexicon = DEFAULT_LEXICON,
+                  spans: Optional[Sequence[List[Span]]] = None) -> List[Dict]:
+    """
+    計算一批文件的風格指標
+
+    Args:
+        texts: 文件內容
+        lexicon: 熱情度詞庫（positive、negative 兩個類別）
+        spans: 各文件已切分好的句子位置（None 代表在這裡切分）
+
+    Returns:
+        每份文件的指標（順序與 texts 相同），欄位為
+        sentence_count、enthusiasm_score、avg_sentence_length、
+        max_sentence_length、min_sentence_length、question_ratio、top_phrases
+    """
+    lengths: List[int] = []
+    kinds: List[int] = []
+    counts: List[int] = []
+    if spans is None:
+        spans = [sentence_spans(text) for text in texts]
+    for document in spans:
+        counts.append(len(document))
+        lengths.extend(end - start for start, end, _ in document)
+        kinds.extend(kind for _, _, kind in document)
+
+    if np is not None:
+        columns = _reduce_numpy(lengths, kinds, counts)
+    else:
+        columns = _reduce_python(lengths, kinds, counts)
+
+    results = []
+    for text, count, longest, shortest, questions, exclamations in zip(texts, counts, *columns):
+        hits = lexicon.count(text)
+        results.append({
+            "sentence_count": count,
+            "enthusiasm_score": _enthusiasm(count, exclamations, hits["positive"], hits["negative"]),
+            "avg_sentence_length": len(text) / count if count else 0,
+            "max_sentence_length": longest,
+            "min_sentence_length": shortest,
+            "question_ratio": questions / count if count else 0.0,
+            "top_phrases": extract_top_phrases(text),
+        })
+    return results
+
+
+class MetricsAccumulator:
+    """
+    逐段累積的指標（串流分析用）
+
+    每次 add() 的段落都必須結束在句子邊界（見 segmenter.iter_segments），
+    最後 result() 的結果與把所有段落接起來交給 batch_metrics 相同。
+    """
+
+    def __init__(self, phrase_capacity: int = 1000, lexicon: Lexicon = DEFAULT_LEXICON):
+        """
+        Args:
+            phrase_capacity: 短語計數器的容量
+            lexicon: 熱情度詞庫（positive、negative 兩個類別）
+        """
+        self.lexicon = lexicon
+        self.characters = 0
+        self.sentences = 0
+        self.longest = 0
+        self.shortest: Optional[int] = None
+        self.questions = 0
+        self.exclamations = 0
+        self.positive = 0
+        self.negative = 0
+        self.phrases = TopKCounter(phrase_capacity)
+
+    def add(self, segment: str, spans: Optional[List[Span]] = None):
+        """
+        累積一個段落
+
+        Args:
+            segment: 結束在句子邊界的段落
+            spans: 已切分好的句子位置（None 代表在這裡切分）
+        """
+        self.characters += len(segment)
+        if spans is None:
+            spans = sentence_spans(segment)
+        if spans:
+            lengths = [end - start for start, end, _ in spans]
+            self.sentences += len(spans)
+            self.longest = max(self.longest, max(lengths))
+            shortest = min(lengths)
+            self.shortest = shortest if self.shortest is None else min(self.shortest, shortest)
+            kinds = [kind for _, _, kind in spans]
+            self.questions += kinds.count(QUESTION)
+            self.exclamations += kinds.count(EXCLAMATION)
+        hits = self.lexicon.count(segment)
+        self.positive += hits["positive"]
+        self.negative += hits["negative"]
+        self.phrases.update_batches(iter_phrase_batches(segment))
+
+    def result(self) -> Dict:
+        """目前累積的指標（欄位同 batch_metrics）"""
+        count = self.sentences
+        return {
+            "sentence_count": count,
+            "enthusiasm_score": _enthusiasm(count, self.exclamations, self.positive, self.negative),
+            "avg_sentence_length": self.characters / count if count else 0,
+            "max_sentence_length": self.longest,
+            "min_sentence_length": self.shortest or 0,
+            "question_ratio": self.questions / count if count else 0.0,
+            "top_phrases": top_phrases(self.phrases),
+        }
+
+
+def _reduce_numpy(lengths: List[int], kinds: List[int], counts: List[int]) -> Tuple[List, ...]:
+    """以陣列歸約算出各文件的最長句、最短句、問句數與驚嘆句數"""
+    counts_arr = np.asarray(counts, dtype=np.int64)
+    longest = np.zeros(len(counts), dtype=np.int64)
+    shortest = np.zeros(len(counts), dtype=np.int64)
+    questions = np.zeros(len(counts), dtype=np.int64)
+    exclamations = np.zeros(len(counts), dtype=np.int64)
+
+    if lengths:
+        lengths_arr = np.asarray(lengths, dtype=np.int64)
+        kinds_arr = np.asarray(kinds, dtype=np.int8)
+        # 沒有句子的文件不佔陣列位置，reduceat 只對有句子的文件取區段起點
+        starts = np.concatenate(([0], np.cumsum(counts_arr)[:-1]))
+        non_empty = counts_arr > 0
+        longest[non_empty] = np.maximum.reduceat(lengths_arr, starts[non_empty])
+        shortest[non_empty] = np.minimum.reduceat(lengths_arr, starts[non_empty])
+
+        doc_of_sentence = np.repeat(np.arange(len(counts)), counts_arr)
+        questions = np.bincount(doc_of_sentence, weights=kinds_arr == QUESTION,
+                                minlength=len(counts)).astype(np.int64)
+        exclamations = np.bincount(doc_of_sentence, weights=kinds_arr == EXCLAMATION,
+                                   minlength=len(counts)).astype(np.int64)
+
+    return tuple(column.tolist() for column in (longest, shortest, questions, exclamations))
+
+
+def _reduce_python(lengths: List[int], kinds: List[int], counts: List[int]) -> Tuple[List, ...]:
+    """沒有 NumPy 時的等價計算"""
+    longest, shortest, questions, exclamations = [], [], [], []
+    start = 0
+    for count in counts:
+        doc_lengths = lengths[start:start + count]
+        doc_kinds = kinds[start:start + count]
+        longest.append(max(doc_lengths, default=0))
+        shortest.append(min(doc_lengths, default=0))
+        questions.append(doc_kinds.count(QUESTION))
+        exclamations.append(doc_kinds.count(EXCLAMATION))
+        start += count
+    return longest, shortest, questions, exclamations
@@ -0,0 +1,385 @@
+"""
+高頻短語提取
+
+候選短語為 n-gram（n = 2～4）：中文以字為單位、英文以單字為單位，
+不跨越標點；開頭或結尾是停用詞的 n-gram 會被過濾。
+
+計數使用有上限的串流 top-k 計數器（Misra-Gries 演算法），
+記憶體只和容量有關，與文字長度無關，適合串流分析很大的檔案。
+
+整個語料庫的短語則用 PhraseMiner：Count-Min sketch 估計所有短語的次數，
+另外只保留估計次數最高的候選短語；兩者都可以合併，
+因此可以分給多個程序各自計算後再合起來。
+"""
+
+import hashlib
+import heapq
+import itertools
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 依環境而定
+    np = None
+
+# 回傳的短語數量與最少出現次數
+TOP_PHRASES = 3
+MIN_COUNT = 2
+NGRAM_SIZES = (2, 3, 4)
+
+_CJK = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+# 中文字段落、英文單字；其他非空白字元（標點）會切斷 n-gram
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|([A-Za-z][A-Za-z0-9'\-]*)|[^\s{_CJK}A-Za-z]+")
+
+CJK_STOP_CHARS = frozenset("的了是在我你他她它們這那一和與及也就都很嗎吧呢啊而或但不有個之於以為被把給讓")
+LATIN_STOPWORDS = frozenset("""
+a an the and or but of to in on at for with by from as is are was were be been it its
+this that these those i you he she we they me my your our their not no so if then than
+""".split())
+
+
+def _ngrams(units, stop: frozenset, joiner: str) -> List[str]:
+    """
+    產生 n-gram，略過開頭或結尾是停用詞的組合
+
+    Args:
+        units: 中文字串（以字為單位）或英文單字列表
+        stop: 停用詞集合
+        joiner: 組合時的分隔字元
+    """
+    grams = []
+    for n in NGRAM_SIZES:
+        grams.extend(joiner.join(units[i:i + n]) for i in range(len(units) - n + 1)
+                     if units[i] not in stop and units[i + n - 1] not in stop)
+    return grams
+
+
+def iter_phrase_batches(text: str) -> Iterator[List[str]]:
+    """
+    以片段為單位產生候選短語
+
+    每個中文字段落或連續的英文單字為一個片段，片段之間以標點切開，
+    一次交給計數器可以用 Counter 的 C 實作累加。
+
+    Args:
+        text: 原始文字
+
+    Yields:
+        一個片段中的候選短語（英文轉小寫）
+    """
+    words: List[str] = []
+    for match in _TOKEN_RE.finditer(text):
+        cjk, word = match.group(1), match.group(2)
+        if word:
+            words.append(word.lower())
+            continue
+        # 中文字段落或標點會結束英文片段
+        if len(words) > 1:
+            yield _ngrams(words, LATIN_STOPWORDS, " ")
+        words = []
+        if cjk and len(cjk) > 1:
+            yield _ngrams(cjk, CJK_STOP_CHARS, "")
+    if len(words) > 1:
+        yield _ngrams(words, LATIN_STOPWORDS, " ")
+
+
+def phrase_counts(text: str) -> Counter:
+    """文字中所有候選短語的次數"""
+    counts: Counter = Counter()
+    for batch in iter_phrase_batches(text):
+        counts.update(batch)
+    return counts
+
+
+def iter_phrases(text: str) -> Iterator[str]:
+    """
+    產生文字中的候選短語
+
+    Args:
+        text: 原始文字
+
+    Yields:
+        候選短語（英文轉小寫），同一短語出現幾次就產生幾次
+    """
+    return itertools.chain.from_iterable(iter_phrase_batches(text))
+
+
+class TopKCounter:
+    """
+    有上限的串流計數器（Misra-Gries）
+
+    最多保留 2 × capacity 個計數；超過時把所有計數減去第 capacity + 1 大的計數，
+    並丟掉歸零的項目。出現次數超過 總數 / capacity 的短語保證會留下，
+    回報的次數最多低估 error。不同短語數量不超過上限時計數完全精確。
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity: 保證保留的計數數量
+
+        Raises:
+            ValueError: capacity 小於 1
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity 必須大於 0: {capacity}")
+        self.capacity = capacity
+        self.counts: Counter = Counter()
+        self.error = 0
+
+    def add(self, item: str, count: int = 1):
+        """累加一個項目"""
+        self.counts[item] += count
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def update(self, items: Iterable[str]):
+        """累加一批項目（整批累加後才檢查容量）"""
+        self.counts.update(items)
+        if len(self.counts) > 2 * self.capacity:
+            self._prune()
+
+    def update_batches(self, batches: Iterable[Iterable[str]]):
+        """逐批累加（見 iter_phrase_batches），記憶體上限為 2 × capacity 加一批的大小"""
+        for batch in batches:
+            self.update(batch)
+
+    def _prune(self):
+        threshold = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += threshold
+        counts = self.counts
+        for item, count in list(counts.items()):
+            if count > threshold:
+                counts[item] = count - threshold
+            else:
+                del counts[item]
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        """次數最多的 n 個項目（同次數時較長的短語在前）"""
+        return heapq.nsmallest(n, self.counts.items(),
+                               key=lambda item: (-item[1], -len(item[0]), item[0]))
+
+
+def _hash_pair(item: str) -> Tuple[int, int]:
+    """
+    穩定的 64 位元雜湊拆成兩個 32 位元值（不受 PYTHONHASHSEED 影響，不同程序的 sketch 才能合併）
+    """
+    value = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value & 0xFFFFFFFF, (value >> 32) | 1
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch：固定大小的近似計數表
+
+    每個項目在 depth 列中各對應一格（雙重雜湊），計數時各格都加上次數，
+    估計值取各格的最小值：只會高估、不會低估，
+    高估量超過 總數 × e / width 的機率小於 e^-depth。
+    """
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4):
+        """
+        Args:
+            width: 每列的格數
+            depth: 列數（雜湊函式數量）
+
+        Raises:
+            ValueError: width 或 depth 小於 1
+        """
+        if width < 1 or depth < 1:
+            raise ValueError(f"width 與 depth 必須大於 0: {width}, {depth}")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        if np is not None:
+            self.table = np.zeros((depth, width), dtype=np.int64)
+        else:
+            self.table = [[0] * width for _ in range(depth)]
+
+    def _columns(self, items: Sequence[str]) -> List[List[int]]:
+        """每個項目在各列對應的格子位置"""
+        columns = []
+        for item in items:
+            first, step = _hash_pair(item)
+            columns.append([(first + row * step) % self.width for row in range(self.depth)])
+        return columns
+
+    def update(self, counts: Mapping[str, int]) -> List[int]:
+        """
+        累加一批計數
+
+        Args:
+            counts: {項目: 次數}
+
+        Returns:
+            累加後各項目的估計次數（順序與 counts 相同）
+        """
+        items = list(counts)
+        if not items:
+            return []
+        columns = self._columns(items)
+        values = list(counts.values())
+        self.total += sum(values)
+
+        if np is not None:
+            index = np.asarray(columns, dtype=np.int64).T
+            rows = np.arange(self.depth)[:, None]
+            np.add.at(self.table, (np.broadcast_to(rows, index.shape), index),
+                      np.asarray(values, dtype=np.int64))
+            return self.table[rows, index].min(axis=0).tolist()
+
+        for column, value in zip(columns, values):
+            for row, cell in enumerate(column):
+                self.table[row][cell] += value
+        return [min(self.table[row][cell] for row, cell in enumerate(column)) for column in columns]
+
+    def estimate(self, items: Sequence[str]) -> List[int]:
+        """估計各項目的次數"""
+        if not items:
+            return []
+        columns = self._columns(items)
+        if np is not None:
+            index = np.asarray(columns, dtype=np.int64).T
+            return self.table[np.arange(self.depth)[:, None], index].min(axis=0).tolist()
+        return [min(self.table[row][cell] for row, cell in enumerate(column)) for column in columns]
+
+    def to_dict(self) -> Dict:
+        table = self.table.tolist() if np is not None else [list(row) for row in self.table]
+        return {"width": self.width, "depth": self.depth, "total": self.total, "table": table}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        sketch.total = data["total"]
+        if np is not None:
+            sketch.table = np.asarray(data["table"], dtype=np.int64)
+        else:
+            sketch.table = [list(row) for row in data["table"]]
+        return sketch
+
+    def merge(self, other: "CountMinSketch"):
+        """
+        併入另一個同樣大小的 sketch
+
+        Raises:
+            ValueError: 大小不同
+        """
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("只能合併 width 與 depth 相同的 sketch")
+        self.total += other.total
+        if np is not None:
+            self.table += np.asarray(other.table, dtype=np.int64)
+        else:
+            for row, other_row in zip(self.table, other.table):
+                for cell, value in enumerate(other_row):
+                    row[cell] += value
+
+
+class PhraseMiner:
+    """
+    語料庫層級的高頻短語統計（Count-Min sketch + 候選短語）
+
+    所有短語都計入 sketch；估計次數高於目前候選門檻的短語才成為候選，
+    候選超過 2 × capacity 個時只留下估計次數最高的 capacity 個。
+    記憶體固定為 sketch 大小加上候選數量，與語料庫大小無關。
+    """
+
+    def __init__(self, capacity: int = 1000, width: int = 1 << 16, depth: int = 4):
+        """
+        Args:
+            capacity: 保留的候選短語數量
+            width: sketch 每列的格數
+            depth: sketch 的列數
+
+        Raises:
+            ValueError: capacity 小於 1
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity 必須大於 0: {capacity}")
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+
+    def add_text(self, text: str):
+        """累加一段文字中的所有候選短語（同一段文字先以 Counter 彙總再寫入 sketch）"""
+        self.update(phrase_counts(text))
+
+    def update(self, counts: Mapping[str, int]):
+        """累加一批短語計數"""
+        estimates = self.sketch.update(counts)
+        threshold = self._threshold()
+        candidates = self.candidates
+        for phrase, estimate in zip(counts, estimates):
+            if estimate > threshold:
+                candidates[phrase] = estimate
+        if len(candidates) > 2 * self.capacity:
+            self._prune()
+
+    def _threshold(self) -> int:
+        """成為候選需要超過的估計次數"""
+        if len(self.candidates) < self.capacity:
+            return 0
+        return heapq.nlargest(self.capacity, self.candidates.values())[-1]
+
+    def _prune(self):
+        kept = heapq.nlargest(self.capacity, self.candidates.items(), key=lambda item: item[1])
+        self.candidates = dict(kept)
+
+    def merge(self, other: "PhraseMiner"):
+        """併入另一個 PhraseMiner（例如另一個程序處理的部分語料）"""
+        self.sketch.merge(other.sketch)
+        phrases = list(self.candidates.keys() | other.candidates.keys())
+        self.candidates = dict(zip(phrases, self.sketch.estimate(phrases)))
+        if len(self.candidates) > self.capacity:
+            self._prune()
+
+    def to_dict(self) -> Dict:
+        return {"capacity": self.capacity, "sketch": self.sketch.to_dict(),
+                "candidates": dict(self.candidates)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PhraseMiner":
+        sketch = CountMinSketch.from_dict(data["sketch"])
+        miner = cls(data["capacity"], sketch.width, sketch.depth)
+        miner.sketch = sketch
+        miner.candidates = dict(data["candidates"])
+        return miner
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        """估計次數最多的 n 個短語（以 sketch 重新估計，同次數時較長的短語在前）"""
+        phrases = list(self.candidates)
+        estimates = zip(phrases, self.sketch.estimate(phrases))
+        return heapq.nsmallest(n, estimates, key=lambda item: (-item[1], -len(item[0]), item[0]))
+
+
+def top_phrases(counter: TopKCounter, k: int = TOP_PHRASES) -> List[Dict]:
+    """
+    選出高頻短語
+
+    依次數排序，並略過已選短語的子字串（「具體來說」出現時，
+    次數相同的「具體」、「來說」不再重複列出）。
+
+    Args:
+        counter: 已累積的短語計數（TopKCounter 或 PhraseMiner）
+        k: 回傳數量
+
+    Returns:
+        [{"phrase": 短語, "count": 次數}]
+    """
+    selected: List[Tuple[str, int]] = []
+    for phrase, count in counter.most_common(k * 20):
+        if count < MIN_COUNT or len(selected) == k:
+            break
+        if any(phrase in chosen for chosen, _ in selected):
+            continue
+        selected.append((phrase, count))
+    return [{"phrase": phrase, "count": count} for phrase, count in selected]
+
+
+def extract_top_phrases(text: str, k: int = TOP_PHRASES) -> List[Dict]:
+    """計算單一文件的高頻短語"""
+    counter = TopKCounter()
+    counter.update_batches(iter_phrase_batches(text))
+    return top_phrases(counter, k)
@@ -0,0 +1,154 @@
+"""
+目錄分析管線
+
+以產生器串接各個階段，每個階段只在下一個階段需要時才產生資料：
+
+    discover（遞迴找出支援格式的檔案）
+        → analyze（StyleAnalyzer.iter_analyze：逐批讀取並分析，最多 workers × 2 批在處理中）
+        → write_jsonl（每個結果寫成一行 JSON）
+
+寫入端拉一筆，前面的階段才往前推進一點（背壓），因此分析 20 萬個檔案時
+記憶體中只有處理中的幾批內容與結果，不會保存全部路徑、內容或結果。
+"""
+
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, Optional, Sequence, Union
+
+from analyzer import StyleAnalyzer
+from profiler import NULL_PROFILER, StageProfiler
+
+
+def discover(root: Union[str, Path], formats: Sequence[str]) -> Iterator[str]:
+    """
+    遞迴找出目錄中支援格式的檔案
+
+    同一層依名稱排序，子目錄在走到時才讀取；不跟隨符號連結的目錄，避免循環。
+
+    Args:
+        root: 目錄（或單一檔案）路徑
+        formats: 支援的副檔名，例如 ['.txt', '.md']
+
+    Yields:
+        檔案路徑
+
+    Raises:
+        FileNotFoundError: 路徑不存在
+    """
+    root = Path(root)
+    if not root.exists():
+        raise FileNotFoundError(f"路徑不存在: {root}")
+    if root.is_file():
+        if root.suffix in formats:
+            yield str(root)
+        return
+
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            # 沒有權限的目錄略過
+            continue
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif os.path.splitext(entry.name)[1] in formats and entry.is_file():
+                yield entry.path
+        # 反向放入堆疊，讓子目錄依名稱順序處理
+        stack.extend(reversed(subdirectories))
+
+
+def analyze(analyzer: StyleAnalyzer, paths: Iterable[str], workers: Optional[int] = 1,
+            root: Union[str, Path, None] = None) -> Iterator[Dict]:
+    """
+    逐筆分析，並在結果中加上檔案路徑
+
+    iter_analyze 依輸入順序產出，因此只需記住已交出、尚未取回結果的路徑
+    （最多 workers × 2 批）就能對上每個結果。
+
+    Args:
+        analyzer: 分析器
+        paths: 檔案路徑（可為產生器）
+        workers: 程序數
+        root: 提供時 path 欄位改為相對於 root 的路徑
+
+    Yields:
+        {"path": 路徑, **分析結果}
+    """
+    submitted = deque()
+
+    def remember(iterable):
+        for path in iterable:
+            submitted.append(path)
+            yield path
+
+    for result in analyzer.iter_analyze(remember(paths), workers=workers, ordered=True):
+        path = submitted.popleft()
+        if root is not None:
+            path = os.path.relpath(path, root)
+        yield {"path": path, **result}
+
+
+def write_jsonl(results: Iterable[Dict], output: Union[str, Path, IO[str]],
+                flush_every: int = 100, profiler: StageProfiler = NULL_PROFILER) -> Dict:
+    """
+    把結果逐行寫成 JSON Lines
+
+    Args:
+        results: 分析結果（可為產生器）
+        output: 輸出檔案路徑或已開啟的文字檔
+        flush_every: 每寫入幾筆就 flush 一次（中途中斷時已寫入的結果仍可讀取）
+        profiler: 記錄 serialize 階段耗時的 profiler
+
+    Returns:
+        {"written": 寫入筆數, "errors": 其中失敗的檔案數}
+    """
+    if isinstance(output, (str, Path)):
+        with open(output, 'w', encoding='utf-8') as f:
+            return write_jsonl(results, f, flush_every, profiler)
+
+    written = errors = 0
+    for result in results:
+        with profiler.stage("serialize"):
+            output.write(json.dumps(result, ensure_ascii=False))
+            output.write("\n")
+            written += 1
+            if written % flush_every == 0:
+                output.flush()
+        errors += "error" in result
+    output.flush()
+    return {"written": written, "errors": errors}
+
+
+def run_pipeline(root: Union[str, Path], output: Union[str, Path, IO[str]],
+                 analyzer: Optional[StyleAnalyzer] = None, workers: Optional[int] = 1) -> Dict:
+    """
+    分析目錄下所有支援格式的檔案，結果寫入單一 JSONL 檔
+
+    Args:
+        root: 目錄路徑
+        output: 輸出的 JSONL 檔案路徑或已開啟的文字檔
+        analyzer: 分析器（None 代表使用預設設定）
+        workers: 程序數（None 代表 CPU 核心數）
+
+    Returns:
+        {"written": 寫入筆數, "errors": 失敗的檔案數}
+
+    Raises:
+        FileNotFoundError: 目錄不存在
+    """
+    analyzer = analyzer or StyleAnalyzer()
+    root = Path(root)
+    # 在建立輸出檔之前先檢查（discover 是產生器，開始讀取時才會拋出錯誤）
+    if not root.exists():
+        raise FileNotFoundError(f"路徑不存在: {root}")
+    paths = discover(root, analyzer.supported_formats)
+    base = root if root.is_dir() else root.parent
+    return write_jsonl(analyze(analyzer, paths, workers, root=base), output,
+                       profiler=analyzer.profiler)
@@ -0,0 +1,124 @@
+"""
+分析階段的計時與計數
+
+StyleAnalyzer 在每個階段（讀檔、解碼、句子切分、指標計算、序列化、快取）
+外層以 profiler.stage(名稱) 計時，並累加位元組、字元、句子與檔案數。
+
+沒有開啟時使用 NULL_PROFILER：stage() 回傳同一個空的 context manager，
+count() 什麼都不做，計時只包在每個檔案或每個區塊外層，不在逐句的迴圈裡，
+所以關閉時幾乎沒有額外成本。
+"""
+
+import contextlib
+import time
+from collections import defaultdict
+from typing import Dict, Iterator
+
+# 報告中階段的順序
+STAGES = ("read", "decode", "segment", "metrics", "serialize", "cache")
+
+
+class StageProfiler:
+    """累積各階段的耗時、呼叫次數與計數"""
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """計時一個階段（例外時仍然計入）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def count(self, name: str, amount: int = 1):
+        """累加計數（bytes、characters、sentences、files）"""
+        self.counters[name] += amount
+
+    def spawn(self) -> "StageProfiler":
+        """同類型的空 profiler（給工作程序使用，回來後再 merge）"""
+        return StageProfiler()
+
+    def merge(self, other: "StageProfiler"):
+        """併入另一個 profiler 的結果"""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        for name, calls in other.calls.items():
+            self.calls[name] += calls
+        for name, amount in other.counters.items():
+            self.counters[name] += amount
+
+    def reset(self):
+        """清除累積的結果"""
+        self.seconds.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def report(self) -> Dict:
+        """
+        彙總報告
+
+        Returns:
+            {"total_seconds", "stages": {階段: {seconds, calls, share}},
+             "counters": {...}, "throughput_mb_per_s"}
+        """
+        total = sum(self.seconds.values())
+        names = [name for name in STAGES if name in self.seconds]
+        names += sorted(name for name in self.seconds if name not in STAGES)
+        stages = {
+            name: {
+                "seconds": round(self.seconds[name], 6),
+                "calls": self.calls[name],
+                "share": round(self.seconds[name] / total, 4) if total else 0.0,
+            }
+            for name in names
+        }
+        megabytes = self.counters.get("bytes", 0) / (1024 * 1024)
+        return {
+            "total_seconds": round(total, 6),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "throughput_mb_per_s": round(megabytes / total, 3) if total else 0.0,
+        }
+
+    def format_report(self) -> str:
+        """可讀的文字報告"""
+        report = self.report()
+        lines = [f"{'階段':<10}{'秒數':>12}{'次數':>10}{'比例':>9}"]
+        for name, stage in report["stages"].items():
+            lines.append(f"{name:<12}{stage['seconds']:>12.4f}{stage['calls']:>12}"
+                         f"{stage['share']:>10.1%}")
+        lines.append(f"合計 {report['total_seconds']:.4f} 秒，"
+                     f"{report['throughput_mb_per_s']} MB/s")
+        lines.append("計數: " + ", ".join(f"{name}={amount}"
+                                         for name, amount in sorted(report["counters"].items())))
+        return "\n".join(lines)
+
+
+class NullProfiler(StageProfiler):
+    """關閉時使用的 profiler：不計時、不計數"""
+
+    enabled = False
+    _NULL_CONTEXT = contextlib.nullcontext()
+
+    def stage(self, name: str):
+        return self._NULL_CONTEXT
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+    def spawn(self) -> "NullProfiler":
+        return self
+
+    def merge(self, other: StageProfiler):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
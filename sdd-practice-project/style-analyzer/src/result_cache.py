@@ -0,0 +1,141 @@
+"""
+分析結果快取
+
+以 SQLite 保存每份檔案內容的分析結果，重新分析同一批檔案時只需處理有變動的部分。
+
+查詢順序：
+1. (路徑, 大小, 修改時間) 與上次相同 → 直接沿用上次算出的內容雜湊
+2. 否則重新計算內容的 SHA-256（檔案只是被複製或 touch 時內容雜湊不變，仍然命中）
+3. 以 (內容雜湊, 分析器版本) 取出結果；分析器版本改變時舊結果自動失效
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+"""
+
+# (絕對路徑, 大小, 修改時間, 內容雜湊)
+Fingerprint = Tuple[str, int, int, str]
+
+
+def file_digest(path, block_size: int = 1 << 20) -> str:
+    """逐塊計算檔案內容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """以內容雜湊為鍵的分析結果快取"""
+
+    def __init__(self, path, version: str):
+        """
+        Args:
+            path: 快取資料庫路徑
+            version: 分析器版本（含影響結果的設定），不同版本的結果互不共用
+        """
+        self.path = str(path)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self):
+        # 交給其他程序時不帶連線，各程序第一次使用時自行開啟
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        return state
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def lookup(self, file_path) -> Tuple[Optional[Dict], Fingerprint]:
+        """
+        查詢快取
+
+        Args:
+            file_path: 檔案路徑
+
+        Returns:
+            (快取的分析結果或 None, 指紋)；未命中時以指紋呼叫 store() 保存結果
+
+        Raises:
+            OSError: 檔案無法讀取
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        # 大小與修改時間沒變時沿用記錄的內容雜湊，不必重新讀檔
+        known = row is not None
+        digest = row[0] if known else file_digest(path)
+        fingerprint = (path, stat.st_size, stat.st_mtime_ns, digest)
+
+        row = self.conn.execute(
+            "SELECT result FROM results WHERE digest = ? AND version = ?",
+            (digest, self.version)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None, fingerprint
+
+        self.hits += 1
+        if not known:
+            self._remember(fingerprint)
+            self.conn.commit()
+        result = json.loads(row[0])
+        result["file_name"] = Path(file_path).name
+        return result, fingerprint
+
+    def store(self, fingerprint: Fingerprint, result: Dict):
+        """保存分析結果（錯誤結果不保存）"""
+        if "error" in result:
+            return
+        self._remember(fingerprint)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (digest, version, result) VALUES (?, ?, ?)",
+            (fingerprint[3], self.version, json.dumps(result, ensure_ascii=False))
+        )
+        self.conn.commit()
+
+    def _remember(self, fingerprint: Fingerprint):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            fingerprint
+        )
+
+    def stats(self) -> Dict:
+        """命中與未命中次數（目前程序）"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
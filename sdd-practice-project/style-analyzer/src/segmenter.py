@@ -0,0 +1,99 @@
+"""
+句子切分
+
+以預先編譯的正規表示式掃描一次文件，產出每個句子的位置（起訖偏移量）
+與句尾標點種類，不複製句子字串；所有指標都由這份切分結果計算。
+
+句子以句號、問號、驚嘆號為界，前後空白不算在句子內，
+連續標點（例如「？！」）只以第一個標點作為句尾。
+串流切段時，超過 MAX_SEGMENT_LENGTH 仍沒有句尾標點的文字會被強制切開。
+"""
+
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+# 句尾標點分類
+OTHER, QUESTION, EXCLAMATION = 0, 1, 2
+
+DELIMITERS = "。！？.!?"
+_KIND = {"？": QUESTION, "?": QUESTION, "！": EXCLAMATION, "!": EXCLAMATION}
+_LAST_DELIMITER_RE = re.compile(rf"[{DELIMITERS}][^{DELIMITERS}]*\Z")
+_LAST_SPACE_RE = re.compile(r"\s\S*\Z")
+
+# 串流切段時未完成句子的長度上限（字元）
+MAX_SEGMENT_LENGTH = 1 << 16
+
+# 句子本體（不含前後空白與標點）＋ 其後的空白與句尾標點（可能沒有）
+_SENTENCE_RE = re.compile(
+    rf"([^{DELIMITERS}\s](?:[^{DELIMITERS}]*[^{DELIMITERS}\s])?)\s*([{DELIMITERS}]?)"
+)
+
+# (起點, 終點, 句尾標點種類)
+Span = Tuple[int, int, int]
+
+
+def iter_spans(text: str) -> Iterator[Span]:
+    """
+    逐句產出句子位置
+
+    Args:
+        text: 原始文字
+
+    Yields:
+        (起點, 終點, 句尾標點種類)，text[起點:終點] 即為去除前後空白的句子
+    """
+    for match in _SENTENCE_RE.finditer(text):
+        yield match.start(1), match.end(1), _KIND.get(match.group(2), OTHER)
+
+
+def sentence_spans(text: str) -> List[Span]:
+    """一次取出所有句子位置（見 iter_spans）"""
+    return [(match.start(1), match.end(1), _KIND.get(match.group(2), OTHER))
+            for match in _SENTENCE_RE.finditer(text)]
+
+
+def count_sentences(text: str) -> int:
+    """計算句子數量"""
+    return sum(1 for _ in _SENTENCE_RE.finditer(text))
+
+
+def iter_segments(chunks: Iterable[str],
+                  max_length: int = MAX_SEGMENT_LENGTH) -> Iterator[str]:
+    """
+    把任意切開的文字片段重新切成「結束在句尾標點」的段落
+
+    串流讀取時，檔案區塊的邊界可能落在句子中間；最後一個句尾標點之後的文字
+    會留到下一個區塊一起處理，因此每個段落的切分結果都和整份文件一起切分相同。
+
+    未完成的句子超過 max_length 時（例如沒有標點的長文），在最後一個空白處強制切開，
+    空白之後仍超過上限（沒有空白的文字）則整段切出，因此保留的文字不超過 max_length，
+    記憶體與檔案大小無關。只有長度超過上限的句子會被算成多句。
+
+    Args:
+        chunks: 依序讀出的文字區塊
+        max_length: 未完成句子的長度上限（字元）
+
+    Yields:
+        段落（強制切開的段落與最後一段可能沒有句尾標點）
+
+    Raises:
+        ValueError: max_length 小於 1
+    """
+    if max_length < 1:
+        raise ValueError(f"max_length 必須大於 0: {max_length}")
+    carry = ""
+    for chunk in chunks:
+        buffer = carry + chunk
+        match = _LAST_DELIMITER_RE.search(buffer)
+        cut = 0 if match is None else match.start() + 1
+        if len(buffer) - cut > max_length:
+            space = _LAST_SPACE_RE.search(buffer, cut)
+            if space is not None and len(buffer) - space.end() <= max_length:
+                cut = space.start() + 1
+            else:
+                cut = len(buffer)
+        carry = buffer[cut:]
+        if cut:
+            yield buffer[:cut]
+    if carry:
+        yield carry
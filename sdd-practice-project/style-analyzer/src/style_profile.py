@@ -0,0 +1,270 @@
+"""
+作者風格輪廓
+
+把多份文件的分析結果（analyze_file / batch_analyze 的輸出）累積成一份輪廓，
+只保存可以合併的統計量：
+
+- 數量與總和
+- 平均與變異數（Welford 演算法，合併時用 Chan 的公式）
+- 固定區間的直方圖
+- 高頻短語的 Count-Min sketch（phrases.PhraseMiner）
+
+加入一篇新文章的成本只和這篇文章有關，不必重新分析整個語料庫；
+分給多個程序各自累積的輪廓也可以直接合併。
+"""
+
+import bisect
+import json
+import math
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+from phrases import PhraseMiner, top_phrases
+
+# 輪廓統計的欄位：(分析結果中的欄位, 是否在 metrics 底下)
+STAT_FIELDS = {
+    "word_count": False,
+    "sentence_count": False,
+    "enthusiasm_score": True,
+    "avg_sentence_length": True,
+    "max_sentence_length": True,
+    "question_ratio": True,
+}
+
+# 直方圖的區間邊界（最後一個區間包含所有更大的值）
+HISTOGRAM_EDGES = {
+    "enthusiasm_score": [i / 10 for i in range(11)],
+    "question_ratio": [i / 10 for i in range(11)],
+    "avg_sentence_length": [0, 10, 20, 30, 40, 60, 80, 120],
+}
+
+
+class RunningStats:
+    """可合併的數量、總和、平均、變異數與最大最小值（Welford 演算法）"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def add(self, value: float):
+        """加入一個值"""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: "RunningStats"):
+        """併入另一組統計（Chan 的平行變異數公式）"""
+        if not other.count:
+            return
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        """母體變異數"""
+        return self.m2 / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningStats":
+        stats = cls()
+        stats.__dict__.update(data)
+        return stats
+
+    def summary(self) -> Dict:
+        """平均、標準差與最大最小值"""
+        return {
+            "mean": self.mean,
+            "std": math.sqrt(self.variance),
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+class Histogram:
+    """固定區間的直方圖"""
+
+    def __init__(self, edges: Sequence[float]):
+        """
+        Args:
+            edges: 遞增的區間邊界；小於第一個邊界的值算在第一個區間，
+                大於等於最後一個邊界的值算在最後一個區間
+
+        Raises:
+            ValueError: 邊界少於兩個或沒有遞增
+        """
+        if len(edges) < 2 or any(a >= b for a, b in zip(edges, edges[1:])):
+            raise ValueError(f"區間邊界必須遞增且至少兩個: {edges}")
+        self.edges = list(edges)
+        self.counts = [0] * (len(edges) - 1)
+
+    def add(self, value: float):
+        """加入一個值"""
+        index = bisect.bisect_right(self.edges, value) - 1
+        self.counts[min(max(index, 0), len(self.counts) - 1)] += 1
+
+    def merge(self, other: "Histogram"):
+        """
+        併入另一個直方圖
+
+        Raises:
+            ValueError: 區間邊界不同
+        """
+        if self.edges != other.edges:
+            raise ValueError("只能合併區間邊界相同的直方圖")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self) -> Dict:
+        return {"edges": self.edges, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Histogram":
+        histogram = cls(data["edges"])
+        histogram.counts = list(data["counts"])
+        return histogram
+
+
+class StyleProfile:
+    """可逐篇更新、可合併的作者風格輪廓"""
+
+    def __init__(self, name: str = "", phrase_capacity: int = 200, sketch_width: int = 1 << 12):
+        """
+        Args:
+            name: 輪廓名稱（例如作者名稱）
+            phrase_capacity: 保留的候選短語數量
+            sketch_width: 短語 sketch 每列的格數
+        """
+        self.name = name
+        self.documents = 0
+        self.skipped = 0
+        self.stats = {field: RunningStats() for field in STAT_FIELDS}
+        self.histograms = {field: Histogram(edges) for field, edges in HISTOGRAM_EDGES.items()}
+        self.phrases = PhraseMiner(phrase_capacity, width=sketch_width)
+
+    def add(self, result: Dict, phrases: Optional[Mapping[str, int]] = None):
+        """
+        加入一份分析結果
+
+        Args:
+            result: analyze_file 的輸出
+            phrases: 這份文件所有候選短語的次數（phrases.phrase_counts）；
+                None 代表只用分析結果中的 top_phrases（每篇最多 3 個），
+                語料庫的高頻短語會漏掉不在任何一篇前 3 名的短語
+
+        Raises:
+            ValueError: 分析結果是錯誤訊息
+        """
+        if "error" in result:
+            raise ValueError(f"無法加入失敗的分析結果: {result.get('file_name')}")
+        metrics = result["metrics"]
+        self.documents += 1
+        for field, nested in STAT_FIELDS.items():
+            self.stats[field].add((metrics if nested else result)[field])
+        for field, histogram in self.histograms.items():
+            histogram.add(metrics[field])
+        if phrases is None:
+            phrases = {item["phrase"]: item["count"] for item in metrics["top_phrases"]}
+        self.phrases.update(phrases)
+
+    def add_results(self, results: Iterable[Dict]) -> "StyleProfile":
+        """加入多份分析結果，略過失敗的檔案（計入 skipped）"""
+        for result in results:
+            if "error" in result:
+                self.skipped += 1
+            else:
+                self.add(result)
+        return self
+
+    def merge(self, other: "StyleProfile") -> "StyleProfile":
+        """併入另一份輪廓（例如另一個程序處理的部分文件）"""
+        self.documents += other.documents
+        self.skipped += other.skipped
+        for field, stats in self.stats.items():
+            stats.merge(other.stats[field])
+        for field, histogram in self.histograms.items():
+            histogram.merge(other.histograms[field])
+        self.phrases.merge(other.phrases)
+        return self
+
+    def summary(self, k: int = 10) -> Dict:
+        """
+        輪廓摘要
+
+        Args:
+            k: 列出的高頻短語數量
+
+        Returns:
+            {"name", "documents", "total_words", "total_sentences",
+             "metrics": {欄位: {mean, std, min, max}}, "histograms", "top_phrases"}
+        """
+        return {
+            "name": self.name,
+            "documents": self.documents,
+            "total_words": int(self.stats["word_count"].total),
+            "total_sentences": int(self.stats["sentence_count"].total),
+            "metrics": {field: stats.summary() for field, stats in self.stats.items()},
+            "histograms": {field: histogram.to_dict() for field, histogram in self.histograms.items()},
+            "top_phrases": top_phrases(self.phrases, k),
+        }
+
+    def to_dict(self) -> Dict:
+        """完整狀態（可用 from_dict 還原後繼續累積）"""
+        return {
+            "name": self.name,
+            "documents": self.documents,
+            "skipped": self.skipped,
+            "stats": {field: stats.to_dict() for field, stats in self.stats.items()},
+            "histograms": {field: histogram.to_dict() for field, histogram in self.histograms.items()},
+            "phrases": self.phrases.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StyleProfile":
+        profile = cls(data["name"])
+        profile.documents = data["documents"]
+        profile.skipped = data["skipped"]
+        profile.stats = {field: RunningStats.from_dict(stats) for field, stats in data["stats"].items()}
+        profile.histograms = {field: Histogram.from_dict(histogram)
+                              for field, histogram in data["histograms"].items()}
+        profile.phrases = PhraseMiner.from_dict(data["phrases"])
+        return profile
+
+    def save(self, path: str):
+        """儲存為 JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "StyleProfile":
+        """從 JSON 載入"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def merge_profiles(profiles: List[StyleProfile], name: str = "") -> StyleProfile:
+    """合併多份輪廓為一份新的輪廓（不修改原本的輪廓）"""
+    if not profiles:
+        return StyleProfile(name)
+    merged = StyleProfile.from_dict(profiles[0].to_dict())
+    merged.name = name or merged.name
+    for profile in profiles[1:]:
+        merged.merge(profile)
+    return merged
@@ -111,5 +111,170 @@ class TestStyleAnalyzer:
         assert Path(saved_path).exists()
 
 
+
+class TestStreamingAnalyze:
+    """串流分析測試"""
+    
+    @pytest.fixture
+    def article(self, tmp_path):
+        test_file = tmp_path / "book.txt"
+        test_file.write_text("第一章開始了。真的嗎？太棒了！\n具體來說，這是一本書。" * 200,
+                             encoding='utf-8')
+        return test_file
+    
+    @staticmethod
+    def _without_date(result):
+        return {k: v for k, v in result.items() if k != "analysis_date"}
+    
+    def test_streaming_matches_full_read(self, article):
+        """測試：串流分析（小區塊）與一次讀入結果相同"""
+        analyzer = StyleAnalyzer(chunk_size=13)
+        streamed = analyzer.analyze_file(str(article), streaming=True)
+        full = analyzer.analyze_file(str(article), streaming=False)
+        assert self._without_date(streamed) == self._without_date(full)
+        assert streamed["sentence_count"] == 800
+    
+    def test_large_files_stream_automatically(self, article, monkeypatch):
+        """測試：超過 max_size_mb 的檔案自動改用串流分析，不會被拒絕"""
+        analyzer = StyleAnalyzer()
+        analyzer.max_size_mb = 0.001
+        calls = []
+        original = analyzer._analyze_stream
+        monkeypatch.setattr(analyzer, "_analyze_stream", lambda path: calls.append(path) or original(path))
+        assert analyzer.analyze_file(str(article))["sentence_count"] == 800
+        assert analyzer.batch_analyze([str(article)])[0]["sentence_count"] == 800
+        assert len(calls) == 2
+    
+    def test_streaming_encoding_error(self, tmp_path):
+        """測試：串流分析遇到非 UTF-8 內容"""
+        test_file = tmp_path / "big5.txt"
+        test_file.write_bytes("中文內容。".encode("big5") * 10)
+        with pytest.raises(ValueError, match="編碼錯誤"):
+            StyleAnalyzer().analyze_file(str(test_file), streaming=True)
+
+
+class TestParallelAnalyze:
+    """平行批次分析測試"""
+    
+    @pytest.fixture
+    def analyzer(self):
+        return StyleAnalyzer()
+    
+    @pytest.fixture
+    def files(self, tmp_path):
+        """建立 20 個測試檔案與 2 個會失敗的路徑"""
+        paths = []
+        for i in range(20):
+            test_file = tmp_path / f"article{i:02d}.txt"
+            test_file.write_text(f"第 {i} 篇文章。" * (i + 1) + "真的嗎？" * (i % 3), encoding='utf-8')
+            paths.append(str(test_file))
+        paths.insert(5, str(tmp_path / "missing.txt"))
+        image = tmp_path / "image.jpg"
+        image.write_text("test", encoding='utf-8')
+        paths.append(str(image))
+        return paths
+    
+    @staticmethod
+    def _comparable(results):
+        return [{k: v for k, v in r.items() if k != "analysis_date"} for r in results]
+    
+    def test_ordered_matches_sequential(self, analyzer, files):
+        """測試：多程序依序產出的結果與單程序相同（含錯誤）"""
+        expected = self._comparable(analyzer.batch_analyze(files))
+        parallel = analyzer.iter_analyze(iter(files), workers=2, chunk_size=3)
+        assert self._comparable(parallel) == expected
+        assert expected[5] == {"file_name": "missing.txt",
+                               "error": expected[5]["error"]}
+        assert "不支援的檔案格式" in expected[-1]["error"]
+    
+    def test_as_completed(self, analyzer, files):
+        """測試：依完成順序產出時，結果集合相同"""
+        results = list(analyzer.iter_analyze(files, workers=3, ordered=False, chunk_size=2))
+        assert sorted(r["file_name"] for r in results) == sorted(Path(p).name for p in files)
+    
+    def test_batch_analyze_workers(self, analyzer, files):
+        """測試：batch_analyze 指定程序數"""
+        results = analyzer.batch_analyze(files, workers=2)
+        assert [r["file_name"] for r in results] == [Path(p).name for p in files]
+    
+    def test_invalid_chunk_size(self, analyzer, files):
+        """測試：chunk_size 必須為正數"""
+        with pytest.raises(ValueError):
+            list(analyzer.iter_analyze(files, chunk_size=0))
+
+
+    
+    def test_mine_phrases(self, analyzer, files):
+        """測試：語料庫短語統計（多程序合併與單程序相同，略過無法讀取的檔案）"""
+        expected = analyzer.mine_phrases(files, k=5)
+        assert expected[0]["count"] >= 8
+        assert analyzer.mine_phrases(files, k=5, workers=2, chunk_size=3) == expected
+
+
+class TestResultCache:
+    """分析結果快取測試"""
+    
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = []
+        for i in range(4):
+            path = tmp_path / f"doc{i}.txt"
+            path.write_text(f"第{i}篇文章。真的很棒！你覺得呢？" * (i + 5), encoding='utf-8')
+            paths.append(str(path))
+        return paths
+    
+    def test_unchanged_files_hit(self, files, tmp_path):
+        """測試：重新分析時只有改變的檔案重新計算，結果與不用快取相同"""
+        cache_path = str(tmp_path / "cache.db")
+        first = StyleAnalyzer(cache_path=cache_path).batch_analyze(files)
+        
+        Path(files[1]).write_text("改過的內容。" * 30, encoding='utf-8')
+        analyzer = StyleAnalyzer(cache_path=cache_path)
+        second = analyzer.batch_analyze(files)
+        assert analyzer.cache.stats() == {"hits": 3, "misses": 1}
+        assert second[0] == first[0]
+        fresh = StyleAnalyzer().batch_analyze(files)
+        assert TestParallelAnalyze._comparable(second) == TestParallelAnalyze._comparable(fresh)
+    
+    def test_content_hash_fallback(self, files, tmp_path):
+        """測試：內容相同的檔案（複製或修改時間改變）以內容雜湊命中"""
+        analyzer = StyleAnalyzer(cache_path=str(tmp_path / "cache.db"))
+        analyzer.analyze_file(files[0])
+        copy = tmp_path / "copy.md"
+        copy.write_text(Path(files[0]).read_text(encoding='utf-8'), encoding='utf-8')
+        result = analyzer.analyze_file(str(copy))
+        assert result["file_name"] == "copy.md"
+        assert analyzer.cache.stats() == {"hits": 1, "misses": 1}
+    
+    def test_version_invalidates(self, files, tmp_path, monkeypatch):
+        """測試：分析器版本改變時舊結果失效；錯誤不寫入快取"""
+        import analyzer as analyzer_module
+        cache_path = str(tmp_path / "cache.db")
+        StyleAnalyzer(cache_path=cache_path).batch_analyze(files + ["missing.txt"])
+        monkeypatch.setattr(analyzer_module, "ANALYZER_VERSION", "test")
+        analyzer = StyleAnalyzer(cache_path=cache_path)
+        analyzer.batch_analyze(files)
+        assert analyzer.cache.stats() == {"hits": 0, "misses": 4}
+    
+    def test_warnings_follow_settings(self, tmp_path):
+        """測試：快取的結果依目前的 min_length 產生警告"""
+        path = tmp_path / "short.txt"
+        path.write_text("很短的文章。", encoding='utf-8')
+        cache_path = str(tmp_path / "cache.db")
+        assert StyleAnalyzer(cache_path=cache_path).analyze_file(str(path))["warnings"]
+        analyzer = StyleAnalyzer(cache_path=cache_path)
+        analyzer.min_length = 1
+        assert analyzer.analyze_file(str(path))["warnings"] == []
+        assert analyzer.cache.stats()["hits"] == 1
+    
+    def test_parallel_workers_share_cache(self, files, tmp_path):
+        """測試：工作程序寫入同一個快取"""
+        cache_path = str(tmp_path / "cache.db")
+        StyleAnalyzer(cache_path=cache_path).batch_analyze(files, workers=2)
+        analyzer = StyleAnalyzer(cache_path=cache_path)
+        analyzer.batch_analyze(files)
+        assert analyzer.cache.stats() == {"hits": 4, "misses": 0}
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,65 @@
+"""
+詞庫比對測試
+
+這個檔案包含 lexicon 模組（Aho-Corasick 多類別詞庫比對）的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from lexicon import Lexicon
+from metrics import NEGATIVE_WORDS, POSITIVE_WORDS
+
+
+class TestLexicon:
+    """Aho-Corasick 詞庫測試"""
+
+    def test_overlapping_words(self):
+        """測試：重疊與互為子字串的中文詞都會計算"""
+        lexicon = Lexicon({"a": ["好", "很好", "好棒"], "b": ["棒"]})
+        assert lexicon.count("真的很好棒") == {"a": 3, "b": 1}
+    
+    def test_latin_words_need_boundaries(self):
+        """測試：英文詞只比對完整單字，不比對其他單字的一部分"""
+        lexicon = Lexicon({"positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS})
+        assert lexicon.count("Whatever you say, it is lawful.") == {"positive": 0, "negative": 0}
+        assert lexicon.count("I wear a glove. The greatest chateau.") == \
+            {"positive": 0, "negative": 0}
+        assert lexicon.count("I hate it, awful! Great, love_ is not love.") == \
+            {"positive": 2, "negative": 2}
+        # 緊鄰中文字時仍算完整單字
+        assert lexicon.count("AMAZING的體驗") == {"positive": 1, "negative": 0}
+
+    def test_matches_naive_count(self):
+        """測試：與逐詞 str.count 的結果相同（預設詞庫沒有自我重疊的詞）"""
+        lexicon = Lexicon({"positive": POSITIVE_WORDS, "negative": NEGATIVE_WORDS})
+        text = "太棒了！AMAZING 的體驗，一點都不無聊。可惜 worst case 很糟糕，太好了。" * 3
+        lowered = text.lower()
+        assert lexicon.count(text) == {
+            "positive": sum(lowered.count(word) for word in POSITIVE_WORDS),
+            "negative": sum(lowered.count(word) for word in NEGATIVE_WORDS),
+        }
+
+    def test_case_sensitive(self):
+        """測試：可以區分大小寫"""
+        lexicon = Lexicon({"word": ["AI"]}, ignore_case=False)
+        assert lexicon.count("AI ai Ai") == {"word": 1}
+
+    def test_signature_changes_with_words(self):
+        """測試：詞庫內容改變時摘要不同，順序不影響"""
+        first = Lexicon({"positive": ["讚", "好"], "negative": []})
+        assert first.signature == Lexicon({"negative": [], "positive": ["好", "讚"]}).signature
+        assert first.signature != Lexicon({"positive": ["讚"], "negative": []}).signature
+
+    def test_empty_word_rejected(self):
+        """測試：詞庫不可包含空字串"""
+        with pytest.raises(ValueError):
+            Lexicon({"positive": [""]})
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,79 @@
+"""
+批次風格指標測試
+
+這個檔案包含 metrics 模組（句長統計、問句比例、熱情度、串流累積）的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import metrics
+from metrics import MetricsAccumulator, batch_metrics
+from segmenter import iter_segments
+
+
+class TestBatchMetrics:
+    """批次指標測試"""
+
+    def test_sentence_statistics(self):
+        """測試：句長、問句比例（可手動驗證）"""
+        result = batch_metrics(["一二三。一二三四五？一！"])[0]
+        assert result["sentence_count"] == 3
+        assert result["max_sentence_length"] == 5
+        assert result["min_sentence_length"] == 1
+        assert result["question_ratio"] == pytest.approx(1 / 3)
+        assert result["avg_sentence_length"] == pytest.approx(12 / 3)
+
+    def test_batch_matches_single(self):
+        """測試：整批計算與逐篇計算結果相同（含沒有句子的文件）"""
+        texts = ["第一篇。很長的第二句嗎？", "", "Hello world! Is it? Yes.", "。。。", "單句"]
+        assert batch_metrics(texts) == [batch_metrics([text])[0] for text in texts]
+        assert batch_metrics(texts)[1]["max_sentence_length"] == 0
+
+    def test_python_fallback_matches_numpy(self, monkeypatch):
+        """測試：沒有 NumPy 時結果相同"""
+        texts = ["第一篇。很長的第二句嗎？", "", "Hello world! Is it? Yes.", "太棒了！"]
+        expected = batch_metrics(texts)
+        monkeypatch.setattr(metrics, "np", None)
+        assert batch_metrics(texts) == expected
+
+    @pytest.mark.parametrize("text, low, high", [
+        ("太棒了！", 0.71, 1.0),
+        ("這是一個事實。", 0.3, 0.5),
+        ("很糟糕。", 0.0, 0.29),
+        # "whatever" 裡的 hate、"lawful" 裡的 awful 不算負面詞
+        ("Whatever happens, that is lawful. Whatever.", 0.4, 0.4),
+    ])
+    def test_enthusiasm_acceptance(self, text, low, high):
+        """測試：規格的熱情度驗收標準"""
+        score = batch_metrics([text])[0]["enthusiasm_score"]
+        assert low <= score <= high
+
+
+
+class TestMetricsAccumulator:
+    """串流累積測試"""
+
+    def test_matches_batch(self):
+        """測試：逐段累積的結果與整份計算相同"""
+        text = ("AI 時代真的很棒！具體來說，規格驅動開發更重要了。你準備好了嗎？"
+                "具體來說，先寫規格。換句話說，規格就是溝通。" * 5)
+        accumulator = MetricsAccumulator()
+        chunks = [text[i:i + 9] for i in range(0, len(text), 9)]
+        for segment in iter_segments(chunks):
+            accumulator.add(segment)
+        assert accumulator.result() == batch_metrics([text])[0]
+        phrases = [item["phrase"] for item in accumulator.result()["top_phrases"]]
+        assert phrases[:2] == ["規格", "具體來說"]
+
+    def test_empty(self):
+        """測試：沒有內容"""
+        assert MetricsAccumulator().result() == batch_metrics([""])[0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
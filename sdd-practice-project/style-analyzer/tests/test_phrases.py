@@ -0,0 +1,163 @@
+"""
+高頻短語提取測試
+
+這個檔案包含 phrases 模組（候選短語、串流 top-k 計數、Count-Min sketch、短語篩選）的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import phrases
+from phrases import (CountMinSketch, PhraseMiner, TopKCounter, extract_top_phrases,
+                     iter_phrases, top_phrases)
+
+
+class TestIterPhrases:
+    """候選短語測試"""
+
+    def test_cjk_ngrams_stop_at_punctuation(self):
+        """測試：中文 2～4 字 n-gram，不跨越標點"""
+        phrases = list(iter_phrases("規格驅動，開發"))
+        assert "規格" in phrases
+        assert "規格驅動" in phrases
+        assert "動開" not in phrases
+        assert "開發" in phrases
+
+    def test_stop_characters_filtered(self):
+        """測試：開頭或結尾是停用字的組合被過濾"""
+        phrases = list(iter_phrases("我的時代"))
+        assert "時代" in phrases
+        assert "我的" not in phrases
+        assert "的時代" not in phrases
+
+    def test_latin_word_ngrams(self):
+        """測試：英文以單字組成 n-gram（小寫、過濾停用詞、不跨越中文）"""
+        phrases = list(iter_phrases("Spec Driven Development is the way. 中文 Test Plan"))
+        assert "spec driven" in phrases
+        assert "spec driven development" in phrases
+        assert "development is" not in phrases
+        assert "way test" not in phrases
+        assert "test plan" in phrases
+
+
+class TestTopKCounter:
+    """串流 top-k 計數器測試"""
+
+    def test_exact_when_small(self):
+        """測試：項目數量不超過容量時計數精確"""
+        counter = TopKCounter(10)
+        counter.update(["a", "b", "a", "c", "a", "b"])
+        assert counter.most_common(2) == [("a", 3), ("b", 2)]
+        assert counter.error == 0
+
+    def test_bounded_memory_keeps_heavy_hitters(self):
+        """測試：容量有限時仍保留高頻項目，且計數最多低估 error"""
+        counter = TopKCounter(5)
+        stream = []
+        for i in range(2000):
+            stream.append(f"rare{i}")
+            if i % 3 == 0:
+                stream.append("frequent")
+        counter.update(stream)
+        assert len(counter.counts) <= 10
+        phrase, count = counter.most_common(1)[0]
+        assert phrase == "frequent"
+        assert 667 - counter.error <= count <= 667
+
+    def test_invalid_capacity(self):
+        """測試：容量必須為正數"""
+        with pytest.raises(ValueError):
+            TopKCounter(0)
+
+
+
+class TestCountMinSketch:
+    """Count-Min sketch 測試"""
+
+    def test_never_underestimates(self):
+        """測試：估計值不低於真實次數，空間足夠時完全精確"""
+        counts = {f"p{i}": i % 7 + 1 for i in range(500)}
+        sketch = CountMinSketch(width=64, depth=3)
+        sketch.update(counts)
+        estimates = sketch.estimate(list(counts))
+        assert all(estimate >= counts[item] for item, estimate in zip(counts, estimates))
+        assert sketch.total == sum(counts.values())
+
+        exact = CountMinSketch()
+        exact.update(counts)
+        assert exact.estimate(["p3", "p6"]) == [4, 7]
+
+    def test_python_fallback_matches_numpy(self, monkeypatch):
+        """測試：沒有 NumPy 時結果相同"""
+        counts = {"規格": 3, "開發": 5, "spec driven": 2}
+        expected = CountMinSketch(width=16).update(counts)
+        monkeypatch.setattr(phrases, "np", None)
+        sketch = CountMinSketch(width=16)
+        assert sketch.update(counts) == expected
+        sketch.merge(sketch)
+        assert sketch.estimate(["開發"]) == [2 * expected[1]]
+
+    def test_merge_requires_same_shape(self):
+        """測試：大小不同的 sketch 不能合併"""
+        with pytest.raises(ValueError):
+            CountMinSketch(width=16).merge(CountMinSketch(width=32))
+
+
+class TestPhraseMiner:
+    """語料庫短語統計測試"""
+
+    def test_finds_heavy_hitters_with_small_capacity(self):
+        """測試：候選數量很少時仍找出最高頻的短語，次數不低估"""
+        miner = PhraseMiner(capacity=5, width=256)
+        for i in range(300):
+            # 每段文字都有不同的雜訊短語
+            noise = "".join(chr(0x4E00 + 13 * i + j) for j in range(4))
+            miner.add_text(f"規格。{noise}。規格。")
+        phrase, count = miner.most_common(1)[0]
+        assert phrase == "規格"
+        assert count >= 600
+        assert len(miner.candidates) <= 10
+
+    def test_merge_matches_single_pass(self):
+        """測試：分開統計再合併，與一次統計的結果相同"""
+        texts = ["具體來說，先寫規格。", "規格就是溝通。", "具體來說，規格很重要。"] * 4
+        whole = PhraseMiner()
+        for text in texts:
+            whole.add_text(text)
+        left, right = PhraseMiner(), PhraseMiner()
+        for text in texts[:5]:
+            left.add_text(text)
+        for text in texts[5:]:
+            right.add_text(text)
+        left.merge(right)
+        assert top_phrases(left) == top_phrases(whole)
+        assert top_phrases(whole)[0] == {"phrase": "規格", "count": 12}
+
+
+class TestTopPhrases:
+    """短語篩選測試"""
+
+    def test_prefers_longer_phrase_with_same_count(self):
+        """測試：次數相同時只列出最長的短語"""
+        text = "具體來說，很好。具體來說，不錯。換句話說，可以。換句話說，就是。AI 時代"
+        result = extract_top_phrases(text)
+        assert result == [{"phrase": "具體來說", "count": 2},
+                          {"phrase": "換句話說", "count": 2}]
+
+    def test_requires_repetition(self):
+        """測試：只出現一次的短語不算高頻"""
+        assert extract_top_phrases("規格驅動開發") == []
+
+    def test_limit(self):
+        """測試：回傳數量"""
+        counter = TopKCounter()
+        counter.update(["甲乙"] * 5 + ["丙丁"] * 4 + ["戊己"] * 3)
+        assert [item["phrase"] for item in top_phrases(counter, k=2)] == ["甲乙", "丙丁"]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
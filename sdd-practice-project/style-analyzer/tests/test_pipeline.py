@@ -0,0 +1,110 @@
+"""
+目錄分析管線測試
+
+這個檔案包含 pipeline 模組（目錄探索、逐筆分析、JSONL 輸出）的測試案例。
+"""
+
+import io
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from analyzer import StyleAnalyzer
+from pipeline import analyze, discover, run_pipeline, write_jsonl
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """建立巢狀目錄：支援與不支援的格式、同名檔案、無法解碼的檔案"""
+    root = tmp_path / "archive"
+    (root / "2024" / "01").mkdir(parents=True)
+    (root / "2025").mkdir()
+    (root / "a.txt").write_text("第一篇。真的很棒！", encoding='utf-8')
+    (root / "2024" / "01" / "a.txt").write_text("同名的另一篇。你覺得呢？", encoding='utf-8')
+    (root / "2024" / "notes.md").write_text("# 筆記\n規格驅動開發。", encoding='utf-8')
+    (root / "2024" / "image.jpg").write_bytes(b"\xff\xd8")
+    (root / "2025" / "broken.txt").write_bytes(b"\xff\xfe\xfa")
+    return root
+
+
+class TestDiscover:
+    """目錄探索測試"""
+
+    def test_recursive_filtered_and_ordered(self, archive):
+        """測試：遞迴找出支援的格式，先列出同一層的檔案，再依名稱進入子目錄"""
+        paths = [Path(p).relative_to(archive).as_posix()
+                 for p in discover(archive, ['.txt', '.md'])]
+        assert paths == ["a.txt", "2024/notes.md", "2024/01/a.txt", "2025/broken.txt"]
+
+    def test_is_lazy(self, archive):
+        """測試：產生器只在需要時掃描"""
+        paths = discover(archive, ['.txt'])
+        assert next(paths).endswith("a.txt")
+
+    def test_missing_root(self, tmp_path):
+        """測試：路徑不存在"""
+        with pytest.raises(FileNotFoundError):
+            list(discover(tmp_path / "missing", ['.txt']))
+
+
+class TestPipeline:
+    """管線整體測試"""
+
+    def test_run_pipeline_writes_jsonl(self, archive, tmp_path):
+        """測試：每個檔案一行，帶相對路徑，失敗的檔案也有紀錄"""
+        output = tmp_path / "results.jsonl"
+        summary = run_pipeline(archive, output)
+        assert summary == {"written": 4, "errors": 1}
+
+        records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+        assert [r["path"] for r in records] == [
+            "a.txt", str(Path("2024/notes.md")),
+            str(Path("2024/01/a.txt")), str(Path("2025/broken.txt"))]
+        assert "編碼錯誤" in records[3]["error"]
+        assert records[2]["file_name"] == "a.txt"
+        assert records[2]["sentence_count"] == 2
+
+    def test_parallel_matches_sequential(self, archive):
+        """測試：多程序時路徑仍對應正確的結果"""
+        analyzer = StyleAnalyzer()
+        paths = list(discover(archive, analyzer.supported_formats))
+        sequential = [(r["path"], r.get("word_count")) for r in analyze(analyzer, paths)]
+        parallel = [(r["path"], r.get("word_count")) for r in analyze(analyzer, iter(paths), workers=2)]
+        assert parallel == sequential
+
+    def test_backpressure(self, archive):
+        """測試：寫入端只拉需要的量，前面的階段不會先把路徑讀完"""
+        consumed = []
+
+        def paths():
+            for path in discover(archive, ['.txt', '.md']):
+                consumed.append(path)
+                yield path
+
+        analyzer = StyleAnalyzer()
+        results = analyze(analyzer, paths())
+        next(results)
+        # 只讀取了第一批（iter_analyze 每批 32 個，這裡只有 4 個檔案）
+        assert len(consumed) == 4
+        results.close()
+
+    def test_write_jsonl_to_stream(self):
+        """測試：寫入已開啟的檔案"""
+        stream = io.StringIO()
+        assert write_jsonl(iter([{"a": 1}, {"error": "x"}]), stream) == {"written": 2, "errors": 1}
+        assert stream.getvalue() == '{"a": 1}\n{"error": "x"}\n'
+
+    def test_missing_root_creates_no_output(self, tmp_path):
+        """測試：目錄不存在時不建立輸出檔"""
+        output = tmp_path / "results.jsonl"
+        with pytest.raises(FileNotFoundError):
+            run_pipeline(tmp_path / "missing", output)
+        assert not output.exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
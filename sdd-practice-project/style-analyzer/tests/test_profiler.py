@@ -0,0 +1,129 @@
+"""
+階段計時測試
+
+這個檔案包含 profiler 模組與 StyleAnalyzer 各階段計時、計數與彙總報告的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import analyzer as analyzer_module
+from analyzer import StyleAnalyzer
+from profiler import NULL_PROFILER, StageProfiler
+
+
+class TestStageProfiler:
+    """StageProfiler 測試"""
+
+    def test_stage_and_counters(self):
+        """測試：例外時仍然計時；報告依階段順序"""
+        profiler = StageProfiler()
+        with profiler.stage("metrics"):
+            pass
+        with pytest.raises(KeyError):
+            with profiler.stage("read"):
+                raise KeyError("x")
+        profiler.count("bytes", 2048)
+        report = profiler.report()
+        assert list(report["stages"]) == ["read", "metrics"]
+        assert report["stages"]["read"]["calls"] == 1
+        assert report["counters"] == {"bytes": 2048}
+        assert sum(stage["share"] for stage in report["stages"].values()) == pytest.approx(1, abs=1e-3)
+
+    def test_merge_and_reset(self):
+        """測試：合併其他 profiler 的結果、清除"""
+        first, second = StageProfiler(), StageProfiler()
+        for profiler in (first, second):
+            with profiler.stage("segment"):
+                pass
+            profiler.count("sentences", 3)
+        first.merge(second)
+        assert first.calls["segment"] == 2
+        assert first.counters["sentences"] == 6
+        first.reset()
+        assert first.report()["total_seconds"] == 0
+
+    def test_null_profiler_records_nothing(self):
+        """測試：關閉時不記錄"""
+        with NULL_PROFILER.stage("read"):
+            NULL_PROFILER.count("bytes", 10)
+        NULL_PROFILER.merge(StageProfiler())
+        assert NULL_PROFILER.spawn() is NULL_PROFILER
+        assert NULL_PROFILER.report()["stages"] == {}
+
+
+class TestAnalyzerProfiling:
+    """分析器各階段計時測試"""
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = []
+        for i in range(6):
+            path = tmp_path / f"article{i}.txt"
+            path.write_text("第一句。第二句嗎？太棒了！\r\n" * (i + 1), encoding='utf-8')
+            paths.append(str(path))
+        return paths
+
+    def test_analyze_file_stages(self, files, tmp_path):
+        """測試：單檔分析記錄讀檔、解碼、切分、指標、序列化與計數"""
+        analyzer = StyleAnalyzer(profile=True)
+        result = analyzer.analyze_file(files[1])
+        analyzer.save_result(result, str(tmp_path / "out.json"))
+        report = analyzer.profile_report()
+        assert list(report["stages"]) == ["read", "decode", "segment", "metrics", "serialize"]
+        assert report["counters"] == {
+            "bytes": Path(files[1]).stat().st_size,
+            "characters": result["word_count"],
+            "sentences": 6,
+            "files": 1,
+        }
+
+    def test_text_mode_newlines_preserved(self, files):
+        """測試：以位元組讀取後解碼，換行轉換與文字模式相同"""
+        result = StyleAnalyzer().analyze_file(files[0])
+        assert result["word_count"] == len("第一句。第二句嗎？太棒了！\n")
+        streamed = StyleAnalyzer(chunk_size=5).analyze_file(files[0], streaming=True)
+        assert streamed["word_count"] == result["word_count"]
+
+    def test_streaming_stages(self, files):
+        """測試：串流分析時每個區塊分別計時"""
+        analyzer = StyleAnalyzer(chunk_size=16, profile=True)
+        analyzer.analyze_file(files[2], streaming=True)
+        report = analyzer.profile_report()
+        assert report["stages"]["read"]["calls"] > 2
+        assert report["counters"]["sentences"] == 9
+
+    def test_batch_report_aggregates_workers(self, files):
+        """測試：多程序批次分析的報告包含所有工作程序"""
+        analyzer = StyleAnalyzer(profile=True)
+        results = analyzer.batch_analyze(files, workers=2)
+        report = analyzer.profile_report()
+        assert report["counters"]["files"] == len(files)
+        assert report["counters"]["sentences"] == sum(r["sentence_count"] for r in results)
+        assert report["stages"]["read"]["calls"] == len(files)
+
+    def test_disabled(self, files):
+        """測試：沒有開啟時使用 NULL_PROFILER，無法取得報告"""
+        analyzer = StyleAnalyzer()
+        analyzer.batch_analyze(files)
+        assert analyzer.profiler is NULL_PROFILER
+        with pytest.raises(RuntimeError):
+            analyzer.profile_report()
+
+    def test_cli_profile_flag(self, files, tmp_path, monkeypatch, capsys):
+        """測試：--profile 把報告輸出到標準錯誤"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "argv", ["analyzer.py", files[0], "--profile"])
+        analyzer_module.main()
+        captured = capsys.readouterr()
+        assert "分析完成" in captured.out
+        assert "serialize" in captured.err
+        assert "MB/s" in captured.err
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
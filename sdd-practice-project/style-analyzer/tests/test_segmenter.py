@@ -0,0 +1,80 @@
+"""
+句子切分測試
+
+這個檔案包含 segmenter 模組（句子位置、句尾標點與串流切段）的測試案例。
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from segmenter import (EXCLAMATION, OTHER, QUESTION, count_sentences, iter_segments,
+                       iter_spans, sentence_spans)
+
+
+class TestSegmenter:
+    """句子切分測試"""
+
+    def test_spans_and_terminators(self):
+        """測試：句子位置與句尾標點種類"""
+        text = "你好。真的嗎？太棒了！沒有結尾"
+        spans = sentence_spans(text)
+        assert [text[start:end] for start, end, _ in spans] == ["你好", "真的嗎", "太棒了", "沒有結尾"]
+        assert [kind for _, _, kind in spans] == [OTHER, QUESTION, EXCLAMATION, OTHER]
+
+    def test_whitespace_is_trimmed(self):
+        """測試：句子前後空白不算在句子內，句子中間的空白保留"""
+        text = "  Hello world !\n  Is it ?"
+        spans = sentence_spans(text)
+        assert [text[start:end] for start, end, _ in spans] == ["Hello world", "Is it"]
+        assert spans[1][2] == QUESTION
+
+    def test_repeated_punctuation(self):
+        """測試：連續標點與空白不算句子，以第一個標點為句尾"""
+        assert [kind for _, _, kind in sentence_spans("什麼？！  \n")] == [QUESTION]
+        assert sentence_spans("。。。") == []
+        assert sentence_spans("") == []
+
+    def test_count_and_iter_agree(self):
+        """測試：count_sentences、iter_spans 與 sentence_spans 一致"""
+        text = "第一句。第二句？\n第三句！第四句"
+        assert list(iter_spans(text)) == sentence_spans(text)
+        assert count_sentences(text) == 4
+    
+    @pytest.mark.parametrize("size", [1, 2, 3, 7])
+    def test_segments_across_chunk_edges(self, size):
+        """測試：任意切開的區塊重組後，切分結果與整份文件相同"""
+        text = "第一句很長。第二句？！  Hello world! 最後沒有標點"
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        segments = list(iter_segments(chunks))
+        assert "".join(segments) == text
+        assert all(segment[-1] in "。！？.!?" for segment in segments[:-1])
+        assert sum(count_sentences(segment) for segment in segments) == count_sentences(text)
+    
+    def test_long_text_without_punctuation(self):
+        """測試：沒有標點的長文在上限內切開，保留的文字不會一直變長"""
+        text = "word " * 200_000
+        chunks = [text[i:i + 4096] for i in range(0, len(text), 4096)]
+        segments = list(iter_segments(chunks, max_length=10_000))
+        assert "".join(segments) == text
+        assert len(segments) > 1
+        assert max(map(len, segments)) <= 10_000 + 4096
+        # 在空白處切開，不會把單字切斷
+        assert all(segment.endswith(" ") for segment in segments)
+    
+    def test_forced_cut_without_whitespace(self):
+        """測試：連空白都沒有的文字直接整段切出"""
+        text = "沒有標點也沒有空白" * 1000
+        chunks = [text[i:i + 100] for i in range(0, len(text), 100)]
+        segments = list(iter_segments(chunks, max_length=500))
+        assert "".join(segments) == text
+        assert max(map(len, segments)) <= 600
+        with pytest.raises(ValueError):
+            list(iter_segments(chunks, max_length=0))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
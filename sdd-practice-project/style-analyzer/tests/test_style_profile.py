@@ -0,0 +1,165 @@
+"""
+作者風格輪廓測試
+
+這個檔案包含 style_profile 模組（可合併的統計量、直方圖、輪廓累積與合併）的測試案例。
+"""
+
+import pytest
+import statistics
+import sys
+from pathlib import Path
+
+# 加入 src 目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from analyzer import StyleAnalyzer
+from style_profile import Histogram, RunningStats, StyleProfile, merge_profiles
+
+
+def _result(words, enthusiasm, phrases=()):
+    """建立最小的分析結果"""
+    return {
+        "file_name": "article.txt",
+        "word_count": words,
+        "sentence_count": words // 10,
+        "metrics": {
+            "enthusiasm_score": enthusiasm,
+            "avg_sentence_length": 10.0,
+            "max_sentence_length": 20,
+            "min_sentence_length": 5,
+            "question_ratio": 0.25,
+            "top_phrases": [{"phrase": p, "count": c} for p, c in phrases],
+        },
+        "warnings": [],
+    }
+
+
+class TestRunningStats:
+    """Welford 統計測試"""
+
+    def test_matches_statistics_module(self):
+        """測試：平均與變異數與 statistics 模組相同"""
+        values = [3.0, 1.5, 8.25, 4.0, 4.0, 10.0]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        assert stats.mean == pytest.approx(statistics.fmean(values))
+        assert stats.variance == pytest.approx(statistics.pvariance(values))
+        assert (stats.minimum, stats.maximum, stats.total) == (1.5, 10.0, sum(values))
+
+    def test_merge_matches_single_pass(self):
+        """測試：分開累積再合併與一次累積相同（含空的統計）"""
+        values = [float(i * i % 17) for i in range(40)]
+        whole, left, right = RunningStats(), RunningStats(), RunningStats()
+        for value in values:
+            whole.add(value)
+        for value in values[:13]:
+            left.add(value)
+        for value in values[13:]:
+            right.add(value)
+        left.merge(right)
+        left.merge(RunningStats())
+        assert left.summary() == pytest.approx(whole.summary())
+        empty = RunningStats()
+        empty.merge(whole)
+        assert empty.summary() == whole.summary()
+
+
+class TestHistogram:
+    """直方圖測試"""
+
+    def test_values_outside_edges_clamped(self):
+        """測試：超出範圍的值算在第一個或最後一個區間"""
+        histogram = Histogram([0, 1, 2])
+        for value in (-1, 0, 0.5, 1, 2, 5):
+            histogram.add(value)
+        assert histogram.counts == [3, 3]
+
+    def test_merge_requires_same_edges(self):
+        """測試：區間不同不能合併；邊界必須遞增"""
+        with pytest.raises(ValueError):
+            Histogram([0, 1]).merge(Histogram([0, 2]))
+        with pytest.raises(ValueError):
+            Histogram([1, 1])
+
+
+class TestStyleProfile:
+    """風格輪廓測試"""
+
+    def test_incremental_and_merge(self):
+        """測試：逐篇累積與分片合併結果相同"""
+        results = [_result(100 * (i + 1), i / 10, [("規格", 2), ("具體來說", i % 3)])
+                   for i in range(9)]
+        whole = StyleProfile("作者").add_results(results)
+        shards = [StyleProfile().add_results(results[i::3]) for i in range(3)]
+        merged = merge_profiles(shards, "作者")
+
+        summary, merged_summary = whole.summary(), merged.summary()
+        for field, values in summary["metrics"].items():
+            assert merged_summary["metrics"][field] == pytest.approx(values)
+        for key in ("name", "documents", "total_words", "histograms", "top_phrases"):
+            assert merged_summary[key] == summary[key]
+        assert summary["documents"] == 9
+        assert summary["total_words"] == 4500
+        assert summary["metrics"]["enthusiasm_score"]["mean"] == pytest.approx(0.4)
+        assert summary["top_phrases"][0] == {"phrase": "規格", "count": 18}
+        assert summary["histograms"]["enthusiasm_score"]["counts"][:3] == [1, 1, 1]
+        # 合併不修改原本的分片
+        assert shards[0].documents == 3
+
+    def test_errors(self):
+        """測試：失敗的結果在 add 時拋出錯誤，在 add_results 時略過"""
+        failed = {"file_name": "missing.txt", "error": "檔案不存在"}
+        with pytest.raises(ValueError):
+            StyleProfile().add(failed)
+        profile = StyleProfile().add_results([failed, _result(100, 0.5)])
+        assert (profile.documents, profile.skipped) == (1, 1)
+
+    def test_save_and_load(self, tmp_path):
+        """測試：儲存後載入可以繼續累積"""
+        profile = StyleProfile("作者").add_results([_result(100, 0.5, [("規格", 3)])])
+        path = str(tmp_path / "profile.json")
+        profile.save(path)
+        loaded = StyleProfile.load(path)
+        assert loaded.summary() == profile.summary()
+        loaded.add(_result(300, 0.7, [("規格", 2)]))
+        assert loaded.summary()["top_phrases"] == [{"phrase": "規格", "count": 5}]
+        assert loaded.summary()["metrics"]["word_count"]["mean"] == 200
+
+    def test_build_profile_from_files(self, tmp_path):
+        """測試：由檔案建立並更新輪廓"""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"article{i}.txt"
+            path.write_text("規格驅動開發真的很棒！你準備好了嗎？" * (i + 3), encoding='utf-8')
+            paths.append(str(path))
+        analyzer = StyleAnalyzer()
+        profile = analyzer.build_profile(paths[:2] + [str(tmp_path / "missing.txt")])
+        analyzer.build_profile(paths[2:], profile=profile)
+        assert (profile.documents, profile.skipped) == (3, 1)
+        assert profile.summary()["total_sentences"] == 2 * (3 + 4 + 5)
+
+    def test_corpus_phrase_outside_document_top3(self, tmp_path):
+        """測試：每篇都不在前 3 名、但全語料最多的短語也會被統計，且與分片方式無關"""
+        local = [["春夏秋冬", "山川河流", "風花雪月"], ["日月星辰", "東南西北", "金木水火"],
+                 ["琴棋書畫", "梅蘭竹菊", "詩詞歌賦"]]
+        paths = []
+        for i, phrases in enumerate(local):
+            # 每篇自己的短語各 5 次，共同短語每篇 2 次（全語料 6 次）
+            sentences = [phrase for phrase in phrases for _ in range(5)] + ["共同短語"] * 2
+            path = tmp_path / f"article{i}.txt"
+            path.write_text("。".join(sentences) + "。", encoding='utf-8')
+            paths.append(str(path))
+        analyzer = StyleAnalyzer()
+        for result in analyzer.batch_analyze(paths):
+            assert "共同短語" not in [item["phrase"] for item in result["metrics"]["top_phrases"]]
+
+        whole = analyzer.build_profile(paths)
+        shards = merge_profiles([analyzer.build_profile(paths[:1]),
+                                 analyzer.build_profile(paths[1:])])
+        for profile in (whole, shards):
+            assert profile.summary(k=1)["top_phrases"] == [{"phrase": "共同短語", "count": 6}]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])